@@ -1,4 +1,6 @@
+import os
 import sys
+from typing import Optional
 
 from PyQt6.QtWidgets import QApplication, QMainWindow
 
@@ -6,14 +8,21 @@ from config import Config
 from gui.home import HomeScreen
 from gui.goal_selection import GoalSelectionScreen
 from gui.debugging import DebuggingScreen
+from gui.loader import BackgroundLoader
+from gui.profiler_panel import ProfilerPanel
+from debug.answer_store import AnswerStore
 from model.agent import AgentRepository
+from profiler import profiler
 
 
 class Application(QApplication):
     def __init__(self, args):
         super(Application, self).__init__(args)
         self.config = Config()
+        profiler.configure(self.config)
         self.agent_repo = AgentRepository(self.config)
+        self.loader = BackgroundLoader(self.agent_repo)
+        self.answer_store: Optional[AnswerStore] = None
         self.window = MainWindow(self)
 
     def start(self):
@@ -28,12 +37,23 @@ class Application(QApplication):
         if folder is None:
             folder = self.config.get("current_folder")
         else:
+            self.loader.cancel()
             self.config.set("current_folder", folder)
-        self.window.setCentralWidget(GoalSelectionScreen(self.config, self.agent_repo, self.show_debugging))
+        self.window.setCentralWidget(GoalSelectionScreen(self.config, self.agent_repo, self.loader,
+                                                         self.show_debugging))
 
     def show_debugging(self, selected_im: int, selected_agent: str):
         self.window.setCentralWidget(DebuggingScreen(self, selected_im, selected_agent))
 
+    def get_answer_store(self) -> Optional[AnswerStore]:
+        # answers are remembered per log folder, unless disabled with "remember_answers": false
+        if self.config.get("remember_answers") is False:
+            return None
+        folder = self.config.get("current_folder")
+        if self.answer_store is None or os.path.dirname(self.answer_store.path) != folder:
+            self.answer_store = AnswerStore.open(folder)
+        return self.answer_store
+
 
 class MainWindow(QMainWindow):
     def __init__(self, app):
@@ -42,6 +62,8 @@ class MainWindow(QMainWindow):
         self.resize(1920, 1024)
         self.frameGeometry().moveCenter(self.screen().availableGeometry().center())
         self.setWindowTitle("Declarative Agent Debugger")
+        if profiler.enabled:
+            self.statusBar().addPermanentWidget(ProfilerPanel(profiler))
 
 
 def main():
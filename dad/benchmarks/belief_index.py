@@ -0,0 +1,41 @@
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import write_trace
+from config import StaticConfig
+from model.agent import AgentRepository
+from model.index import BeliefIndex
+
+
+def benchmark(cycles: int, beliefs: int, intervals: list[int], queries: int = 500):
+    # memory of the snapshots against the time of rebuilding the beliefs of a cycle, per snapshot interval
+    with tempfile.TemporaryDirectory() as folder:
+        name = write_trace(folder, 1, cycles, beliefs=beliefs)[0]
+        data = AgentRepository(StaticConfig({"current_folder": folder, "parse_cache": False})).get_agent_data(name)
+    rng = random.Random(0)
+    query_cycles = [rng.randrange(cycles) for _ in range(queries)]
+    print(f"{cycles} cycles, {len(data.beliefs)} belief changes, {beliefs} distinct percepts")
+    print(f"{'interval':>10} {'build s':>9} {'snapshots':>10} {'entries':>10} {'MB':>8} {'query ms':>9}")
+    for interval in intervals:
+        start = time.perf_counter()
+        index = BeliefIndex(data.beliefs, interval)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        for cycle in query_cycles:
+            index.beliefs_at(cycle)
+        query = (time.perf_counter() - start) / queries
+        stats = index.stats()
+        print(f"{interval or 'adaptive':>10} {build:9.3f} {stats['snapshots']:10d} {stats['snapshot_entries']:10d} "
+              f"{stats['memory_bytes'] / 1e6:8.1f} {query * 1000:9.3f}")
+
+
+def main():
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    beliefs = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    benchmark(cycles, beliefs, [0, 64, 256, 1024, 4096, 16384])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import gc
+import sys
+import tempfile
+import tracemalloc
+
+from benchmarks.synthetic import write_trace
+from config import StaticConfig
+from model.agent import AgentRepository
+
+
+def benchmark(cycles: int, storage: str = ""):
+    # storage "sqlite" ingests the log into a database instead of keeping all objects, states of some cycles are
+    # queried as well so that the objects loaded from the database count
+    with tempfile.TemporaryDirectory() as folder:
+        name = write_trace(folder, 1, cycles)[0]
+        repo = AgentRepository(StaticConfig({"current_folder": folder, "parse_cache": False, "storage": storage}))
+        gc.collect()
+        tracemalloc.start()
+        data = repo.get_agent_data(name)
+        for cycle in range(0, cycles, max(1, cycles // 100)):
+            repo.get_agent_state(name, cycle)
+            repo.get_diff(name, cycle, cycle + 10)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{cycles} cycles ({storage or 'memory'}), {len(data.intended_means)} intended means, "
+              f"{len(data.beliefs)} belief changes")
+        print(f"  retained {current / 1e6:8.1f} MB, {current / cycles:8.0f} bytes per cycle")
+        print(f"  peak     {peak / 1e6:8.1f} MB, {peak / cycles:8.0f} bytes per cycle")
+
+
+def main():
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100000, sys.argv[2] if len(sys.argv) > 2 else "")
+
+
+if __name__ == "__main__":
+    main()
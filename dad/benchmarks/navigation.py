@@ -0,0 +1,83 @@
+import random
+import sys
+import time
+from typing import Callable
+
+from debug.navigation_strategy import JasonDebuggingTree, Result, STRATEGIES
+from model.bdi import IntendedMeans
+
+
+def create_im(im_id: int, parent: IntendedMeans = None) -> IntendedMeans:
+    im = IntendedMeans(im_id, None, 0, 0, "achieved", None, "", 0, [], None, f"+!g{im_id}", "", [], parent, None)
+    if parent:
+        parent.children.append(im)
+    return im
+
+
+def random_tree(nodes: int, rng: random.Random, shape: str) -> list[IntendedMeans]:
+    ims = [create_im(0)]
+    for i in range(1, nodes):
+        if shape == "wide":  # few levels, many siblings
+            parent = ims[rng.randrange(min(len(ims), 1 + nodes // 100))]
+        elif shape == "deep":  # mostly chains
+            parent = ims[max(0, len(ims) - 1 - int(rng.expovariate(0.5)))]
+        else:  # random recursive tree
+            parent = rng.choice(ims)
+        ims.append(create_im(i, parent))
+    return ims
+
+
+def plant_bug(ims: list[IntendedMeans], rng: random.Random, failure_rate: float) -> set[int]:
+    # the nodes whose result is wrong: the bug and all of its ancestors
+    bug = rng.choice(ims)
+    invalid = set()
+    im = bug
+    while im:
+        invalid.add(im.id)
+        im = im.parent
+    for im in ims:  # failures are more likely where the bug is, but not exclusively
+        if rng.random() < (0.5 if im.id in invalid else failure_rate):
+            im.res = "failed"
+    return invalid
+
+
+def count_questions(strategy_class: Callable, tree: JasonDebuggingTree, invalid: set[int]) -> tuple[int, int]:
+    strategy = strategy_class(tree, None, "benchmark")
+    questions = 0
+    node = strategy.get_next()
+    while node is not None:
+        questions += 1
+        strategy.mark_node(node, Result.Invalid if tree.get_im(node).id in invalid else Result.Valid)
+        node = strategy.get_next()
+    return questions, strategy.final_bug
+
+
+def benchmark(nodes: int, runs: int, seed: int = 0):
+    print(f"{nodes} nodes, {runs} runs, mean / max questions (seconds)")
+    for shape in ("wide", "deep", "random"):
+        rng = random.Random(seed)
+        results = {name: [] for name in STRATEGIES}
+        times = {name: 0.0 for name in STRATEGIES}
+        for _ in range(runs):
+            ims = random_tree(nodes, rng, shape)
+            invalid = plant_bug(ims, rng, 0.05)
+            tree = JasonDebuggingTree(ims[0])
+            expected = max(invalid, key=lambda im_id: tree.find(im_id))  # the deepest invalid node
+            for name, strategy_class in STRATEGIES.items():
+                start = time.perf_counter()
+                questions, bug = count_questions(strategy_class, tree, invalid)
+                times[name] += time.perf_counter() - start
+                if tree.get_im(bug).id != expected:
+                    raise AssertionError(f"{name} located {tree.get_im(bug).id} instead of {expected}")
+                results[name].append(questions)
+        print(f"{shape}:")
+        for name, questions in results.items():
+            print(f"  {name:20} {sum(questions) / runs:10.1f} {max(questions):8} ({times[name]:.2f})")
+
+
+def main():
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10000, int(sys.argv[2]) if len(sys.argv) > 2 else 20)
+
+
+if __name__ == "__main__":
+    main()
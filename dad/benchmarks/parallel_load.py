@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import write_trace
+from config import StaticConfig
+from model.agent import AgentRepository
+
+
+def benchmark(agents: int, cycles: int, worker_counts: list[int]):
+    with tempfile.TemporaryDirectory() as folder:
+        names = write_trace(folder, agents, cycles)
+        size = sum(os.path.getsize(os.path.join(folder, name + ".log")) for name in names)
+        print(f"{agents} agents, {cycles} cycles each, {size / 1e6:.1f} MB")
+
+        repo = AgentRepository(StaticConfig({"current_folder": folder, "parse_cache": False}))
+        start = time.perf_counter()
+        for name in names:
+            repo.get_agent_data(name)
+        serial = time.perf_counter() - start
+        print(f"  serial          {serial:8.3f} s")
+
+        for workers in worker_counts:
+            repo = AgentRepository(StaticConfig({"current_folder": folder, "parse_cache": False}))
+            start = time.perf_counter()
+            repo.load_agents(names, workers=workers)
+            duration = time.perf_counter() - start
+            print(f"  {workers:3d} workers     {duration:8.3f} s, speedup {serial / duration:.2f}x")
+
+
+def main():
+    agents = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    cycles = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    if len(sys.argv) > 3:  # e.g. 1,2,4
+        worker_counts = [int(workers) for workers in sys.argv[3].split(",")]
+    else:
+        cores = os.cpu_count() or 1
+        worker_counts = sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+    benchmark(agents, cycles, worker_counts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import os
+import sys
+import time
+
+from model.agent import AgentData, AgentRepository
+from model.cache import load_agent_data, save_agent_data, invalidate
+from model.util import paused_gc
+
+
+def time_call(f, *args) -> float:
+    with paused_gc():
+        start = time.perf_counter()
+        f(*args)
+        return time.perf_counter() - start
+
+
+def benchmark(log_path: str, repetitions: int = 3):
+    invalidate(log_path)
+    cold = min(time_call(AgentRepository.parse_log, log_path, AgentData()) for _ in range(repetitions))
+
+    data = AgentData()
+    AgentRepository.parse_log(log_path, data)
+    save_agent_data(log_path, data)
+    warm = min(time_call(load_agent_data, log_path, AgentData()) for _ in range(repetitions))
+
+    log_size = os.path.getsize(log_path)
+    cache_size = os.path.getsize(log_path + ".cache")
+    print(f"{log_path}: log {log_size / 1e6:.1f} MB, cache {cache_size / 1e6:.1f} MB")
+    print(f"  cold JSON parse  {cold:8.3f} s ({log_size / 1e6 / cold:.1f} MB/s)")
+    print(f"  warm cache load  {warm:8.3f} s ({cache_size / 1e6 / warm:.1f} MB/s), speedup {cold / warm:.1f}x")
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("usage: python -m benchmarks.parse_cache <agent.log>...")
+        sys.exit(1)
+    for log_path in sys.argv[1:]:
+        benchmark(log_path)
+
+
+if __name__ == "__main__":
+    main()
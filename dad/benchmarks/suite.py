@@ -0,0 +1,166 @@
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from itertools import islice
+from typing import Callable
+
+from benchmarks.synthetic import add_generator_arguments, get_generator_options, write_trace
+from config import StaticConfig
+from debug.navigation_strategy import JasonDebuggingTree, Result, STRATEGIES
+from debug.oracle import FailureOracle
+from debug.session import find_failed_goals
+from model.agent import AgentRepository
+from model.index import BeliefTimeline
+
+
+def measure(function: Callable[[], int], repeat: int) -> dict:
+    # best wall time of the repetitions, peak memory of one more run with tracemalloc (which slows it down)
+    seconds = float("inf")
+    count = 0
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        count = function()
+        seconds = min(seconds, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": seconds, "peak_mb": peak / 1e6, "count": count}
+
+
+def run_suite(folder: str, names: list[str], cycles: int, samples: int, repeat: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    results = {}
+
+    def parse() -> int:
+        repo = AgentRepository(StaticConfig({"current_folder": folder, "parse_cache": False}))
+        for name in names:
+            repo.get_indexed_data(name)  # ready for agent states, as before the indexes were built on first use
+        return len(names)
+
+    results["parse"] = measure(parse, repeat)
+
+    repo = AgentRepository(StaticConfig({"current_folder": folder, "parse_cache": False}))
+    data = {name: repo.get_agent_data(name) for name in names}
+    state_queries = [(rng.choice(names), rng.randrange(cycles)) for _ in range(samples)]
+    diff_queries = [(rng.choice(names), *sorted(rng.sample(range(cycles), 2))) for _ in range(samples)]
+
+    def agent_state() -> int:
+        for name, cycle in state_queries:
+            repo.get_agent_state(name, cycle)
+        return len(state_queries)
+
+    def diff() -> int:
+        for name, cycle1, cycle2 in diff_queries:
+            repo.get_diff(name, cycle1, cycle2)
+        return len(diff_queries)
+
+    results["agent_state"] = measure(agent_state, repeat)
+    results["diff"] = measure(diff, repeat)
+
+    def search() -> int:
+        count = 0
+        for name in names:
+            for query in ("percept(_)", "belief:+percept(1)", "trigger:g1/1", "instr:.print(_) cycle:0-1000"):
+                result = repo.search(name, query)
+                count += len(result.intended_means) + len(result.events) + len(result.cycles)
+        return count
+
+    results["search"] = measure(search, repeat)
+
+    def belief_timeline() -> int:
+        for name in names:
+            timeline = BeliefTimeline(data[name].beliefs)
+            for _, cycle in state_queries:
+                for belief in islice(timeline.intervals, 20):
+                    timeline.holds_at(belief, cycle)
+        return len(names)
+
+    results["belief_timeline"] = measure(belief_timeline, repeat)
+
+    # the debugging trees of all intentions, navigated with the goals that failed
+    roots = [im for name in names for im in data[name].intended_means.values() if im.parent is None]
+    failed = [data[name].intended_means[im_id] for name in names for im_id in find_failed_goals(data[name])]
+    results["tree"] = measure(lambda: sum(len(JasonDebuggingTree(root)) for root in roots), repeat)
+    trees = [JasonDebuggingTree(root) for root in failed]
+    oracle = FailureOracle()
+
+    def navigate(strategy_class) -> int:
+        questions = 0
+        for tree in trees:
+            strategy = strategy_class(tree, None, "benchmark")
+            node = strategy.get_next()
+            while node is not None:
+                questions += 1
+                strategy.mark_node(node, oracle.ask(tree.get_im(node)))
+                node = strategy.get_next()
+        return questions
+
+    for name, strategy_class in STRATEGIES.items():
+        results[f"navigation.{name}"] = measure(lambda: navigate(strategy_class), repeat)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    # prints the change of every phase, true if a phase got slower or bigger by more than the threshold
+    regressed = False
+    print(f"{'phase':32} {'seconds':>10} {'baseline':>10} {'ratio':>7} {'peak MB':>10} {'baseline':>10} {'ratio':>7}")
+    for phase, result in results.items():
+        old = baseline.get(phase)
+        if old is None:
+            print(f"{phase:32} {result['seconds']:10.3f} {'-':>10} {'':7} {result['peak_mb']:10.1f}")
+            continue
+        time_ratio = result["seconds"] / old["seconds"] if old["seconds"] else 1.0
+        memory_ratio = result["peak_mb"] / old["peak_mb"] if old["peak_mb"] else 1.0
+        worse = time_ratio > 1 + threshold or memory_ratio > 1 + threshold
+        regressed = regressed or worse
+        print(f"{phase:32} {result['seconds']:10.3f} {old['seconds']:10.3f} {time_ratio:7.2f} "
+              f"{result['peak_mb']:10.1f} {old['peak_mb']:10.1f} {memory_ratio:7.2f}{'  REGRESSION' if worse else ''}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite",
+                                     description="Times and memory-profiles the model layer on synthetic logs.")
+    parser.add_argument("--cycles", type=int, default=20000)
+    parser.add_argument("--agents", type=int, default=1)
+    parser.add_argument("--samples", type=int, default=200, help="queries of the agent state and diff phases")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown reported as regression")
+    add_generator_arguments(parser)
+    args = parser.parse_args()
+
+    parameters = {"cycles": args.cycles, "agents": args.agents, "samples": args.samples, "seed": args.seed,
+                  **get_generator_options(args)}
+    with tempfile.TemporaryDirectory() as folder:
+        names = write_trace(folder, args.agents, args.cycles, args.seed, **get_generator_options(args))
+        results = run_suite(folder, names, args.cycles, args.samples, args.repeat, args.seed)
+
+    report = {"parameters": parameters, "python": platform.python_version(), "results": results}
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, "r") as baseline_file:
+            previous = json.load(baseline_file)
+        if previous.get("parameters") != parameters:
+            print("warning: the baseline was measured with different parameters")
+        baseline = previous.get("results", {})
+    if compare(results, baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
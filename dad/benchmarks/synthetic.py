@@ -0,0 +1,191 @@
+import argparse
+import json
+import os
+import random
+
+
+class TraceGenerator:
+    # writes a log in the JSON lines format of the Jason agent architecture, one line per reasoning cycle
+    def __init__(self, name: str, seed: int = 0, max_intentions: int = 4, depth: int = 4, width: int = 3,
+                 beliefs: int = 200, belief_churn: int = 2, new_intention_rate: float = 0.05,
+                 failure_rate: float = 0.05):
+        self.name = name
+        self.random = random.Random(seed)
+        self.max_intentions = max_intentions
+        self.depth = depth
+        self.width = width
+        self.beliefs = beliefs
+        self.belief_churn = belief_churn
+        self.new_intention_rate = new_intention_rate
+        self.failure_rate = failure_rate
+        self.belief_base: set[str] = set()
+        self.intentions: dict[int, list[dict]] = {}  # intention ID to stack of intended means
+        self.pending_percepts: list[int] = []
+        self.next_id = {"I": 1, "IM": 1, "E": 1}
+
+    def new_id(self, kind: str) -> int:
+        new_id = self.next_id[kind]
+        self.next_id[kind] += 1
+        return new_id
+
+    def header(self) -> dict:
+        plans = {"p_task": {"file": "synthetic.asl", "line": 1, "trigger": "+task(Id)", "body": self.body(0)}}
+        for depth in range(1, self.depth + 1):
+            plans[f"p_g{depth}"] = {"file": "synthetic.asl", "line": 10 * depth, "ctx": f"level({depth})",
+                                    "trigger": f"+!g{depth}(Id)", "body": self.body(depth)}
+        return {"src": "synthetic.asl", "name": self.name, "entity": "agent", "platform": "synthetic",
+                "details": {"plans": plans}}
+
+    def body(self, depth: int) -> str:
+        return "; ".join(x["instr"] for x in self.program(depth, 0))
+
+    def program(self, depth: int, task: int) -> list[dict]:
+        instructions = []
+        for i in range(self.width if depth < self.depth else 0):
+            instructions.append({"instr": f"+step({task},{depth},{i})", "type": "addBel"})
+            instructions.append({"instr": f"!g{depth + 1}({task})", "type": "achieve"})
+        instructions.append({"instr": f"move({task})", "type": "action"})
+        instructions.append({"instr": f".print({task})", "type": "internalAction"})
+        return instructions
+
+    def new_im(self, intention_id: int, depth: int, task: int) -> dict:
+        plan = "p_task" if depth == 0 else f"p_g{depth}"
+        trigger = f"+task({task})[source(percept)]" if depth == 0 else f"+!g{depth}({task})[source(self)]"
+        return {"id": self.new_id("IM"), "i": intention_id, "depth": depth, "task": task, "plan": plan,
+                "trigger": trigger, "program": self.program(depth, task), "pc": 0, "pending": None, "acting": False}
+
+    def cycle(self, nr: int) -> dict:
+        cycle = {"nr": nr}
+        self.change_beliefs(cycle)
+        if self.pending_percepts and len(self.intentions) < self.max_intentions:
+            self.start_intention(cycle, self.pending_percepts.pop(0))
+        elif self.intentions:
+            self.step(cycle, self.random.choice(list(self.intentions)))
+        if self.random.random() < self.new_intention_rate:
+            ev_id = self.new_id("E")
+            self.pending_percepts.append(ev_id)
+            cycle.setdefault("E+", []).append({"t": f"+task({ev_id})[source(percept)]", "src": "B", "id": ev_id})
+        return cycle
+
+    def change_beliefs(self, cycle: dict):
+        for _ in range(self.belief_churn):
+            belief = f"percept({self.random.randrange(self.beliefs)})[source(percept)]"
+            if belief in self.belief_base:
+                if belief not in cycle.get("B+", []):
+                    self.belief_base.remove(belief)
+                    cycle.setdefault("B-", []).append(belief)
+            elif belief not in cycle.get("B-", []):
+                self.belief_base.add(belief)
+                cycle.setdefault("B+", []).append(belief)
+
+    def start_intention(self, cycle: dict, ev_id: int):
+        intention_id = self.new_id("I")
+        im = self.new_im(intention_id, 0, ev_id)
+        self.intentions[intention_id] = [im]
+        cycle["I+"] = intention_id
+        cycle["SE"] = ev_id
+        self.add_im(cycle, im)
+        self.execute(cycle, im)
+
+    def add_im(self, cycle: dict, im: dict):
+        im_data = {"file": "synthetic.asl", "line": 10 * im["depth"] + 1, "i": im["i"], "id": im["id"],
+                   "trigger": im["trigger"], "plan": im["plan"]}
+        if im["depth"]:
+            im_data["ctx"] = f"level({im['depth']})"
+        cycle["IM+"] = [im_data]
+        cycle["SI"] = im["i"]
+
+    def step(self, cycle: dict, intention_id: int):
+        stack = self.intentions[intention_id]
+        im = stack[-1]
+        cycle["SI"] = intention_id
+        if im["acting"]:
+            cycle["A-"] = [intention_id]
+            im["acting"] = False
+        if im["pending"] is not None:
+            child = self.new_im(intention_id, im["depth"] + 1, im["task"])
+            cycle["SE"] = im["pending"]
+            im["pending"] = None
+            stack.append(child)
+            self.add_im(cycle, child)
+            self.execute(cycle, child)
+        elif im["pc"] < len(im["program"]):
+            self.execute(cycle, im)
+        else:
+            im_data = {"id": im["id"], "res": "achieved"}
+            if self.random.random() < self.failure_rate:
+                im_data = {"id": im["id"], "res": "failed", "reason": {
+                    "error_msg": "synthetic failure", "error": "ia_failed", "type": "action",
+                    "code_src": "synthetic.asl", "code_line": 10 * im["depth"] + 2}}
+            cycle["IM-"] = [im_data]
+            stack.pop()
+            if not stack:
+                cycle["I-"] = [intention_id]
+                del self.intentions[intention_id]
+
+    def execute(self, cycle: dict, im: dict):
+        if im["pc"] >= len(im["program"]):
+            return
+        instruction = im["program"][im["pc"]]
+        im["pc"] += 1
+        cycle["I"] = {"file": "synthetic.asl", "im": im["id"], "line": 10 * im["depth"] + 1 + im["pc"],
+                      "instr": instruction["instr"], "type": instruction["type"]}
+        cycle["U"] = f"{{Id={im['task']}}}"
+        if instruction["type"] == "achieve":
+            ev_id = self.new_id("E")
+            im["pending"] = ev_id
+            cycle.setdefault("E+", []).append({"t": instruction["instr"] + "[source(self)]", "src": "G", "id": ev_id})
+        elif instruction["type"] == "action":
+            im["acting"] = True
+            cycle["A+"] = True
+        elif instruction["type"] == "addBel":
+            belief = instruction["instr"][1:] + "[source(self)]"
+            if belief not in self.belief_base and belief not in cycle.get("B-", []):
+                self.belief_base.add(belief)
+                cycle.setdefault("B+", []).append(belief)
+
+    def write(self, path: str, cycles: int):
+        with open(path, "w") as log_file:
+            log_file.write(json.dumps(self.header(), separators=(",", ":")) + "\n")
+            for nr in range(cycles):
+                log_file.write(json.dumps(self.cycle(nr), separators=(",", ":")) + "\n")
+
+
+def write_trace(folder: str, agents: int = 1, cycles: int = 10000, seed: int = 0, **options) -> list[str]:
+    os.makedirs(folder, exist_ok=True)
+    names = [f"agent{i}" for i in range(agents)]
+    for i, name in enumerate(names):
+        TraceGenerator(name, seed + i, **options).write(os.path.join(folder, name + ".log"), cycles)
+    return names
+
+
+def add_generator_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-intentions", type=int, default=4, help="intentions executed at the same time")
+    parser.add_argument("--depth", type=int, default=4, help="depth of the sub-goal tree of an intention")
+    parser.add_argument("--width", type=int, default=3, help="sub-goals per plan")
+    parser.add_argument("--beliefs", type=int, default=200, help="number of distinct percepts")
+    parser.add_argument("--belief-churn", type=int, default=2, help="percepts changed per cycle")
+    parser.add_argument("--new-intention-rate", type=float, default=0.05, help="chance of a new task per cycle")
+    parser.add_argument("--failure-rate", type=float, default=0.05, help="chance of a goal failing")
+
+
+def get_generator_options(args: argparse.Namespace) -> dict:
+    # keyword arguments of TraceGenerator
+    return {"max_intentions": args.max_intentions, "depth": args.depth, "width": args.width, "beliefs": args.beliefs,
+            "belief_churn": args.belief_churn, "new_intention_rate": args.new_intention_rate,
+            "failure_rate": args.failure_rate}
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.synthetic", description="Writes synthetic agent logs.")
+    parser.add_argument("folder")
+    parser.add_argument("cycles", type=int)
+    parser.add_argument("agents", type=int, nargs="?", default=1)
+    add_generator_arguments(parser)
+    args = parser.parse_args()
+    write_trace(args.folder, args.agents, args.cycles, args.seed, **get_generator_options(args))
+
+
+if __name__ == "__main__":
+    main()
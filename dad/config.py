@@ -35,3 +35,12 @@ class Config:
 
     def get(self, key):
         return self.data.get(key, "")
+
+
+class StaticConfig:
+    # configuration that is not read from or saved to config.json, for headless runs
+    def __init__(self, data: dict):
+        self.data = data
+
+    def get(self, key):
+        return self.data.get(key, "")
@@ -0,0 +1,89 @@
+import json
+import os
+import re
+from typing import Optional
+
+from model.bdi import IntendedMeans
+
+ANSWER_FILE = ".dad_answers.jsonl"
+ANNOTATIONS = re.compile(r"\[[^\[\]]*\]$")
+WHITESPACE = re.compile(r"\s+")
+
+
+class AnswerStore:
+    # answers of the oracle (the user), keyed by what the answer depends on, so that the same goal is not asked
+    # about twice: in one debugging tree, or in later sessions on the same logs
+    # the file only gets appended to, later lines override earlier ones
+    def __init__(self, path: str):
+        self.path = path
+        self.answers: dict[tuple[str, str, str], bool] = {}
+        self.lines = 0
+
+    @staticmethod
+    def open(folder: str) -> "AnswerStore":
+        store = AnswerStore(os.path.join(folder, ANSWER_FILE))
+        store.load()
+        return store
+
+    @staticmethod
+    def get_key(im: IntendedMeans) -> tuple[str, str, str]:
+        return im.plan.label if im.plan else "", AnswerStore.normalise(im.trigger), im.res
+
+    @staticmethod
+    def normalise(trigger: str) -> str:
+        # annotations (e.g. the source) do not change the meaning of the goal
+        return ANNOTATIONS.sub("", WHITESPACE.sub("", trigger))
+
+    def get(self, im: IntendedMeans) -> Optional[bool]:
+        # whether the result of the goal was valid, None if never answered
+        return self.answers.get(AnswerStore.get_key(im))
+
+    def put(self, im: IntendedMeans, valid: bool):
+        key = AnswerStore.get_key(im)
+        if self.answers.get(key) == valid:
+            return
+        self.answers[key] = valid
+        try:
+            with open(self.path, "a") as answer_file:
+                answer_file.write(json.dumps([*key, valid]) + "\n")
+            self.lines += 1
+        except OSError:
+            pass  # the answer is still remembered for this session
+
+    def load(self):
+        try:
+            with open(self.path, "r") as answer_file:
+                lines = answer_file.read().splitlines()
+        except OSError:
+            return
+        try:  # one call to the decoder instead of one per line
+            entries = json.loads("[" + ",".join(lines) + "]")
+        except ValueError:  # e.g. a line cut off by a crash
+            entries = []
+            for line in lines:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+        for entry in entries:
+            if isinstance(entry, list) and len(entry) == 4:
+                self.answers[(entry[0], entry[1], entry[2])] = entry[3]
+        self.lines = len(lines)
+        if self.lines > 2 * len(self.answers) + 1000:
+            self.compact()
+
+    def compact(self):
+        # rewrites the file without overridden answers
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as answer_file:
+                for key, valid in self.answers.items():
+                    answer_file.write(json.dumps([*key, valid]) + "\n")
+            os.replace(tmp_path, self.path)
+            self.lines = len(self.answers)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def __len__(self) -> int:
+        return len(self.answers)
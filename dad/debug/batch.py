@@ -0,0 +1,112 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from config import StaticConfig
+from model.agent import AgentRepository
+from model.log_file import is_log_file, get_agent_name, open_log
+from debug.answer_store import AnswerStore
+from debug.navigation_strategy import STRATEGIES
+from debug.oracle import Oracle, RuleOracle, FailureOracle
+from debug.session import DebuggingSession, find_failed_goals
+
+
+def find_agents(folder: str) -> list[str]:
+    agents = []
+    for filename in sorted(os.listdir(folder)):
+        if is_log_file(filename):
+            with open_log(os.path.join(folder, filename)) as log_file:
+                if json.loads(log_file.readline()).get("entity") == "agent":
+                    agents.append(get_agent_name(filename))
+    return agents
+
+
+def debug_agent(folder: str, agent_name: str, goals: Optional[list[int]], oracle_rules: Optional[dict], strategy: str,
+                max_questions: int = 0, remember: bool = False) -> list[dict]:
+    # runs in a worker process: one log is loaded once for all of its goals (by default, the failed ones)
+    repo = AgentRepository(StaticConfig({"current_folder": folder}))
+    if goals is None:
+        goals = find_failed_goals(repo.get_agent_data(agent_name))
+    oracle: Oracle = RuleOracle.from_dict(oracle_rules) if oracle_rules else FailureOracle()
+    answers = AnswerStore.open(folder) if remember else None
+    reports = []
+    for goal in goals:
+        start = time.perf_counter()
+        try:
+            report = DebuggingSession(repo, agent_name, goal, strategy, answers).run(oracle, max_questions)
+        except KeyError as e:
+            report = {"agent": agent_name, "goal": goal, "error": str(e.args[0])}
+        report["seconds"] = round(time.perf_counter() - start, 6)
+        reports.append(report)
+    return reports
+
+
+def run_batch(folder: str, agents: Optional[list[str]] = None, goals: Optional[dict[str, list[int]]] = None,
+              oracle_rules: Optional[dict] = None, strategy: str = "simple", workers: Optional[int] = None,
+              max_questions: int = 0, remember: bool = False) -> list[dict]:
+    # goals: agent name to IM ids, agents without entry get their failed intentions debugged
+    # oracle_rules: see RuleOracle, without rules, goals are invalid if a failure happened below them
+    if agents is None:
+        agents = list(goals) if goals else find_agents(folder)
+    goals = goals or {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(debug_agent, folder, agent, goals.get(agent), oracle_rules, strategy,
+                                   max_questions, remember) for agent in agents]
+        return [report for future in futures for report in future.result()]
+
+
+def parse_goals(values: list[str]) -> dict[str, list[int]]:
+    goals: dict[str, list[int]] = {}
+    for value in values:
+        agent, _, im_id = value.rpartition(":")
+        goals.setdefault(agent, []).append(int(im_id))
+    return goals
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m debug.batch",
+                                     description="Algorithmic debugging without GUI, answers come from an oracle.")
+    parser.add_argument("folder", help="folder with the agent logs")
+    parser.add_argument("--agents", help="comma separated agent names (default: all agents in the folder)")
+    parser.add_argument("--goal", action="append", default=[], metavar="AGENT:IM",
+                        help="debug this intended means instead of the failed intentions (repeatable)")
+    parser.add_argument("--oracle", help="JSON file with oracle rules (default: failed goals are invalid)")
+    parser.add_argument("--strategy", default="simple", choices=list(STRATEGIES))
+    parser.add_argument("--workers", type=int, help="number of worker processes")
+    parser.add_argument("--max-questions", type=int, default=0, help="give up on a goal after so many questions")
+    parser.add_argument("--remember", action="store_true", help="use and extend the answers stored in the folder")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    oracle_rules = None
+    if args.oracle:
+        with open(args.oracle, "r") as oracle_file:
+            oracle_rules = json.load(oracle_file)
+        RuleOracle.from_dict(oracle_rules)  # invalid rules fail here, not in the workers
+
+    start = time.perf_counter()
+    reports = run_batch(args.folder, args.agents.split(",") if args.agents else None, parse_goals(args.goal),
+                        oracle_rules, args.strategy, args.workers, args.max_questions, args.remember)
+    result = {
+        "folder": os.path.abspath(args.folder),
+        "strategy": args.strategy,
+        "goals": len(reports),
+        "bugs": sum(1 for report in reports if report.get("bug")),
+        "questions": sum(report.get("questions", 0) for report in reports),
+        "seconds": round(time.perf_counter() - start, 3),
+        "reports": reports
+    }
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(result, output_file, indent=2)
+    else:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
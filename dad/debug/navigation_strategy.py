@@ -1,8 +1,11 @@
+from array import array
 from enum import Enum
-from typing import Optional, Generator
+from typing import Optional, Iterator
 
 from model.bdi import IntendedMeans
-from model.agent import AgentRepository, AgentData
+from model.agent import AgentRepository
+from debug.answer_store import AnswerStore
+from profiler import profiler
 
 
 class Result(Enum):
@@ -12,63 +15,313 @@ class Result(Enum):
     Skipped = 3
 
 
-class JasonDebuggingTreeNode:
-    def __init__(self, agent_data: AgentData, im: IntendedMeans):
-        self.label = im.trigger
-        self.children: list[JasonDebuggingTreeNode] = []
-        self.parent: Optional[JasonDebuggingTreeNode] = None
-        self.next_sibling: Optional[JasonDebuggingTreeNode] = None
-        self.state = Result.Undecided
-        self.im = im
-        for child_im in im.children:
-            child_node = JasonDebuggingTreeNode(agent_data, child_im)
-            self.append_child(child_node)
-
-    def append_child(self, node: "JasonDebuggingTreeNode"):
-        if self.children:
-            self.children[-1].next_sibling = node
-        self.children.append(node)
-        node.parent = self
-
-    def traverse(self) -> Generator["JasonDebuggingTreeNode", None, None]:
-        yield self
-        for child in self.children:
-            yield from child.traverse()
-
-
-class SimpleJasonNavigationStrategy:
-    def __init__(self, tree: JasonDebuggingTreeNode, agent_repo: AgentRepository, agent_name: str):
+class JasonDebuggingTree:
+    # the intended means below a root IM, nodes are positions in preorder (the root is 0)
+    # tree links are kept in integer arrays, -1 meaning none, and nothing is built or traversed recursively
+    def __init__(self, root: IntendedMeans):
+        self.ims: list[IntendedMeans] = []
+        self.parent = array("q")
+        self.first_child = array("q")
+        self.next_sibling = array("q")
+        self.row = array("q")  # position among the siblings
+        self.child_count = array("q")
+        self.size = array("q")  # number of nodes in the subtree
+        self.nodes: dict[int, int] = {}  # IM id -> node
+        with profiler.phase("debugging_tree"):
+            self.build(root)
+        profiler.count("debugging_tree.nodes", len(self.ims))
+
+    def build(self, root: IntendedMeans):
+        last_child = array("q")
+        stack: list[tuple[IntendedMeans, int]] = [(root, -1)]
+        while stack:
+            im, parent = stack.pop()
+            node = len(self.ims)
+            self.ims.append(im)
+            self.nodes[im.id] = node
+            for values in (self.first_child, self.next_sibling, last_child):
+                values.append(-1)
+            self.parent.append(parent)
+            self.child_count.append(0)
+            self.size.append(1)
+            if parent < 0:
+                self.row.append(0)
+            else:
+                self.row.append(self.child_count[parent])
+                self.child_count[parent] += 1
+                if last_child[parent] < 0:
+                    self.first_child[parent] = node
+                else:
+                    self.next_sibling[last_child[parent]] = node
+                last_child[parent] = node
+            stack.extend((child, node) for child in reversed(im.children))
+        for node in range(len(self.ims) - 1, 0, -1):  # children come after their parent
+            self.size[self.parent[node]] += self.size[node]
+
+    def __len__(self) -> int:
+        return len(self.ims)
+
+    def get_im(self, node: int) -> IntendedMeans:
+        return self.ims[node]
+
+    def get_label(self, node: int) -> str:
+        return self.ims[node].trigger
+
+    def get_parent(self, node: int) -> Optional[int]:
+        parent = self.parent[node]
+        return parent if parent >= 0 else None
+
+    def get_next_sibling(self, node: int) -> Optional[int]:
+        sibling = self.next_sibling[node]
+        return sibling if sibling >= 0 else None
+
+    def get_first_child(self, node: int) -> Optional[int]:
+        child = self.first_child[node]
+        return child if child >= 0 else None
+
+    def children(self, node: int) -> Iterator[int]:
+        child = self.first_child[node]
+        while child >= 0:
+            yield child
+            child = self.next_sibling[child]
+
+    def traverse(self, node: int = 0) -> range:
+        # preorder, a subtree is a contiguous range of nodes
+        return range(node, node + self.size[node])
+
+    def find(self, im_id: int) -> Optional[int]:
+        return self.nodes.get(im_id)
+
+
+class NavigationStrategy:
+    # chooses the nodes the user (the oracle) is asked about: get_next returns the next node to ask about,
+    # the answer is recorded with mark_node, None means the search is over (final_bug is None if no bug was found)
+    # nodes with a remembered answer are marked without asking (see recalled)
+    def __init__(self, tree: JasonDebuggingTree, agent_repo: Optional[AgentRepository], agent_name: str,
+                 answers: Optional[AnswerStore] = None):
         self.tree = tree
         self.agent_repo = agent_repo
-        for node in tree.traverse():
-            node.state = Result.Undecided
+        self.states = array("b", bytes(len(tree)))  # Result value of each node, all undecided
         self.agent_name = agent_name
-        self.prev_node: Optional[JasonDebuggingTreeNode] = None
-        self.final_bug: Optional[JasonDebuggingTreeNode] = None
+        self.answers = answers
+        self.recalled: list[int] = []
+        self.final_bug: Optional[int] = None
 
-    @staticmethod
-    def mark_node(node: JasonDebuggingTreeNode, result: Result):
-        node.state = result
+    def mark_node(self, node: int, result: Result):
+        self.states[node] = result.value
+        if self.answers is not None and result in (Result.Valid, Result.Invalid):
+            self.answers.put(self.tree.get_im(node), result == Result.Valid)
+
+    def get_state(self, node: int) -> Result:
+        return Result(self.states[node])
+
+    def get_next(self) -> Optional[int]:
+        with profiler.phase("navigation.next"):
+            node = self.advance()
+            while node is not None and self.recall(node):
+                node = self.advance()
+        if node is not None:
+            profiler.count("navigation.questions")
+        return node
+
+    def recall(self, node: int) -> bool:
+        valid = self.answers.get(self.tree.get_im(node)) if self.answers is not None else None
+        if valid is None:
+            return False
+        self.states[node] = (Result.Valid if valid else Result.Invalid).value
+        self.recalled.append(node)
+        profiler.count("navigation.recalled")
+        return True
+
+    def advance(self) -> Optional[int]:
+        # the next node to ask about, given the answers so far
+        raise NotImplementedError
 
-    def get_next(self):
-        if not self.prev_node:
-            self.prev_node = self.tree
-            return self.tree
+
+class SimpleJasonNavigationStrategy(NavigationStrategy):
+    # top-down: descends into the first invalid child, walking the siblings in order
+    def __init__(self, tree: JasonDebuggingTree, agent_repo: Optional[AgentRepository], agent_name: str,
+                 answers: Optional[AnswerStore] = None):
+        super(SimpleJasonNavigationStrategy, self).__init__(tree, agent_repo, agent_name, answers)
+        self.prev_node: Optional[int] = None
+
+    def advance(self) -> Optional[int]:
+        tree = self.tree
+        if self.prev_node is None:
+            self.prev_node = 0
+            return self.prev_node
 
         node = self.prev_node
-        if node.state == Result.Invalid:
-            if node.children:
-                self.prev_node = node.children[0]
+        state = self.get_state(node)
+        if state == Result.Invalid:
+            child = tree.get_first_child(node)
+            if child is not None:
+                self.prev_node = child
                 return self.prev_node
             else:
                 self.final_bug = node
                 return None
-        elif node.state == Result.Valid:
-            if node.next_sibling:
-                self.prev_node = node.next_sibling
+        elif state == Result.Valid:
+            sibling = tree.get_next_sibling(node)
+            if sibling is not None:
+                self.prev_node = sibling
                 return self.prev_node
             else:
-                if node.parent and node.parent.state == Result.Invalid:
-                    self.final_bug = node.parent
+                parent = tree.get_parent(node)
+                if parent is not None and self.get_state(parent) == Result.Invalid:
+                    self.final_bug = parent
                 return None
         return None
+
+
+class HeaviestFirstStrategy(NavigationStrategy):
+    # top-down like the simple strategy, but the children of an invalid node are asked about largest subtree first
+    def __init__(self, tree: JasonDebuggingTree, agent_repo: Optional[AgentRepository], agent_name: str,
+                 answers: Optional[AnswerStore] = None):
+        super(HeaviestFirstStrategy, self).__init__(tree, agent_repo, agent_name, answers)
+        self.suspect: Optional[int] = None  # deepest node known to be invalid
+        self.candidates: list[int] = []  # unasked children of the suspect, the heaviest last
+        self.finished = False
+
+    def advance(self) -> Optional[int]:
+        node = 0 if self.suspect is None else self.next_candidate()
+        while node is not None and not self.finished:
+            state = self.get_state(node)
+            if state == Result.Invalid:
+                self.suspect = node
+                self.candidates = sorted(self.tree.children(node), key=self.tree.size.__getitem__)
+            elif state == Result.Valid:
+                if self.suspect is None:  # the root is fine
+                    self.finished = True
+                    return None
+                self.candidates.pop()
+            else:
+                return node
+            node = self.next_candidate()
+        if not self.finished:
+            self.final_bug = self.suspect
+            self.finished = True
+        return None
+
+    def next_candidate(self) -> Optional[int]:
+        return self.candidates[-1] if self.candidates else None
+
+
+class SubtreeWeights:
+    # sums of node weights over subtrees, which are contiguous ranges of preorder positions (Fenwick tree)
+    # subtree ranges are nested or disjoint, so a removed subtree is dropped by subtracting its sum at its root: every
+    # range that contains the root contains all of it, the ranges inside it are not asked about anymore (see removed)
+    def __init__(self, tree: JasonDebuggingTree, weights: list[float]):
+        self.tree = tree
+        self.sums = [0.0] + list(weights)
+        self.removed = bytearray(len(tree))  # roots of removed subtrees, whatever is below them is not looked at
+        n = len(self.sums)
+        for i in range(1, n):  # built in one pass
+            parent = i + (i & -i)
+            if parent < n:
+                self.sums[parent] += self.sums[i]
+
+    def prefix(self, end: int) -> float:
+        total = 0.0
+        while end > 0:
+            total += self.sums[end]
+            end -= end & -end
+        return total
+
+    def get(self, node: int) -> float:
+        if self.removed[node]:
+            return 0.0
+        return self.prefix(node + self.tree.size[node]) - self.prefix(node)
+
+    def add(self, node: int, delta: float):
+        i = node + 1
+        while i < len(self.sums):
+            self.sums[i] += delta
+            i += i & -i
+
+    def remove(self, node: int):
+        # drops the weights of the whole subtree, O(log n)
+        self.add(node, -self.get(node))
+        self.removed[node] = 1
+
+
+class DivideAndQueryStrategy(NavigationStrategy):
+    # Shapiro's divide and query: asks about the node that splits the remaining suspects into halves by weight
+    # an invalid answer narrows the search to the subtree of the node, a valid one removes its subtree
+    def __init__(self, tree: JasonDebuggingTree, agent_repo: Optional[AgentRepository], agent_name: str,
+                 answers: Optional[AnswerStore] = None, weights: Optional[list[float]] = None):
+        super(DivideAndQueryStrategy, self).__init__(tree, agent_repo, agent_name, answers)
+        self.weights = SubtreeWeights(tree, weights if weights is not None else [1.0] * len(tree))
+        self.suspect: Optional[int] = None  # root of the subtree that contains the bug, known to be invalid
+        self.finished = False
+
+    def advance(self) -> Optional[int]:
+        node = 0 if self.suspect is None else self.select()
+        while node is not None and not self.finished:
+            state = self.get_state(node)
+            if state == Result.Invalid:
+                self.suspect = node
+            elif state == Result.Valid:
+                if self.suspect is None:  # the root is fine
+                    self.finished = True
+                    return None
+                self.weights.remove(node)
+            else:
+                return node
+            node = self.select()
+        if not self.finished:
+            self.final_bug = self.suspect
+            self.finished = True
+        return None
+
+    def select(self) -> Optional[int]:
+        # the weights only shrink going down, so only the heavy path and the children along it need to be checked:
+        # below a light child, nothing can be closer to the half
+        # this is O(c log n) for the c children of the nodes on the heavy path, not O(log n): O(n log n) when most
+        # nodes are children of the suspect, removed children are still looked at (with weight 0)
+        total = self.weights.get(self.suspect)
+        best, best_distance = None, total
+        node = self.suspect
+        while node is not None:
+            heaviest, heaviest_weight = None, 0.0
+            for child in self.tree.children(node):
+                weight = self.weights.get(child)
+                if weight <= 0.0:
+                    continue
+                distance = abs(total - 2 * weight)
+                if distance < best_distance:
+                    best, best_distance = child, distance
+                if weight > heaviest_weight:
+                    heaviest, heaviest_weight = child, weight
+            node = heaviest if 2 * heaviest_weight > total else None
+        return best
+
+
+class ExpectedQuestionsStrategy(DivideAndQueryStrategy):
+    # divide and query over the estimated probability of each node being the bug instead of node counts,
+    # which greedily minimises the expected number of questions (the exact optimum is NP-hard for weighted trees)
+    failure_weight = 4.0
+
+    def __init__(self, tree: JasonDebuggingTree, agent_repo: Optional[AgentRepository], agent_name: str,
+                 answers: Optional[AnswerStore] = None):
+        weights = [ExpectedQuestionsStrategy.get_prior(im) for im in tree.ims]
+        super(ExpectedQuestionsStrategy, self).__init__(tree, agent_repo, agent_name, answers, weights)
+
+    @staticmethod
+    def get_prior(im: IntendedMeans) -> float:
+        # goals that failed or found no applicable plan are more likely to be where things went wrong
+        return ExpectedQuestionsStrategy.failure_weight if im.res in ("failed", "np") else 1.0
+
+
+STRATEGIES = {
+    "simple": SimpleJasonNavigationStrategy,
+    "heaviest_first": HeaviestFirstStrategy,
+    "divide_and_query": DivideAndQueryStrategy,
+    "expected_questions": ExpectedQuestionsStrategy
+}
+
+
+def create_strategy(name: str, tree: JasonDebuggingTree, agent_repo: Optional[AgentRepository], agent_name: str,
+                    answers: Optional[AnswerStore] = None) -> NavigationStrategy:
+    with profiler.phase("navigation.create"):
+        return STRATEGIES.get(name or "simple", SimpleJasonNavigationStrategy)(tree, agent_repo, agent_name, answers)
@@ -0,0 +1,68 @@
+import re
+from typing import Optional
+
+from model.bdi import IntendedMeans
+from debug.navigation_strategy import Result
+
+
+class Oracle:
+    # answers in place of the user whether the result of a goal is valid
+    def ask(self, im: IntendedMeans) -> Result:
+        raise NotImplementedError
+
+
+class Rule:
+    # matches goals by any of IM id, plan label, trigger (regular expression, searched) and result
+    def __init__(self, answer: str, im_id: Optional[int] = None, plan: Optional[str] = None,
+                 trigger: Optional[str] = None, res: Optional[list[str]] = None):
+        if answer not in ("valid", "invalid"):
+            raise ValueError(f"Expected the answer valid or invalid, but got: {answer}")
+        self.result = Result.Valid if answer == "valid" else Result.Invalid
+        self.im_id = im_id
+        self.plan = plan
+        self.trigger = re.compile(trigger) if trigger else None
+        self.res = res
+
+    @staticmethod
+    def from_dict(d: dict) -> "Rule":
+        res = d.get("res")
+        return Rule(d["answer"], d.get("id"), d.get("plan"), d.get("trigger"), [res] if isinstance(res, str) else res)
+
+    def matches(self, im: IntendedMeans) -> bool:
+        return (self.im_id is None or im.id == self.im_id) \
+            and (self.plan is None or (im.plan is not None and im.plan.label == self.plan)) \
+            and (self.trigger is None or self.trigger.search(im.trigger) is not None) \
+            and (self.res is None or im.res in self.res)
+
+
+class RuleOracle(Oracle):
+    # the first matching rule decides, rules by IM id make up a scripted session, e.g.
+    # {"default": "valid", "rules": [{"id": 12, "answer": "invalid"}, {"trigger": "^\\+!found", "answer": "valid"}]}
+    def __init__(self, rules: list[Rule], default: Result = Result.Valid):
+        self.rules = rules
+        self.default = default
+
+    @staticmethod
+    def from_dict(d: dict) -> "RuleOracle":
+        default = Result.Invalid if d.get("default") == "invalid" else Result.Valid
+        return RuleOracle([Rule.from_dict(rule) for rule in d.get("rules", [])], default)
+
+    def ask(self, im: IntendedMeans) -> Result:
+        for rule in self.rules:
+            if rule.matches(im):
+                return rule.result
+        return self.default
+
+
+class FailureOracle(Oracle):
+    # without further knowledge: a goal went wrong if it, or any goal below it, failed or found no applicable plan
+    failed = ("failed", "np")
+
+    def ask(self, im: IntendedMeans) -> Result:
+        stack = [im]
+        while stack:
+            im = stack.pop()
+            if im.res in FailureOracle.failed:
+                return Result.Invalid
+            stack.extend(im.children)
+        return Result.Valid
@@ -0,0 +1,77 @@
+from typing import Optional
+
+from model.agent import AgentRepository, AgentData
+from model.bdi import IntendedMeans
+from debug.answer_store import AnswerStore
+from debug.navigation_strategy import JasonDebuggingTree, Result, create_strategy
+from debug.oracle import Oracle
+
+
+class DebuggingSession:
+    # debugging of one goal without GUI, the oracle answers the questions of the navigation strategy
+    def __init__(self, agent_repo: AgentRepository, agent_name: str, im_id: int, strategy: str = "simple",
+                 answers: Optional[AnswerStore] = None):
+        self.agent_name = agent_name
+        self.im = agent_repo.get_agent_data(agent_name).intended_means.get(im_id)
+        if self.im is None:
+            raise KeyError(f"No intended means {im_id} in agent {agent_name}")
+        self.strategy_name = strategy or "simple"
+        self.tree = JasonDebuggingTree(self.im)
+        self.strategy = create_strategy(self.strategy_name, self.tree, agent_repo, agent_name, answers)
+        self.answers: list[tuple[int, bool]] = []  # (IM id, valid) in the order asked
+        self.recalled = 0
+
+    def run(self, oracle: Oracle, max_questions: int = 0) -> dict:
+        # max_questions 0: no limit
+        complete = True
+        node = self.strategy.get_next()
+        while node is not None:
+            if max_questions and len(self.answers) >= max_questions:
+                complete = False
+                break
+            im = self.tree.get_im(node)
+            result = oracle.ask(im)
+            self.answers.append((im.id, result == Result.Valid))
+            self.strategy.mark_node(node, result)
+            node = self.strategy.get_next()
+        self.recalled += len(self.strategy.recalled)
+        return self.get_report(complete)
+
+    def get_report(self, complete: bool) -> dict:
+        bug = self.strategy.final_bug if complete else None
+        return {
+            "agent": self.agent_name,
+            "goal": self.im.id,
+            "trigger": self.im.trigger,
+            "strategy": self.strategy_name,
+            "tree_size": len(self.tree),
+            "questions": len(self.answers),
+            "recalled": self.recalled,
+            "complete": complete,
+            "answers": self.answers,
+            "bug": DebuggingSession.describe(self.tree.get_im(bug)) if bug is not None else None
+        }
+
+    @staticmethod
+    def describe(im: IntendedMeans) -> dict:
+        bug = {
+            "im": im.id,
+            "trigger": im.trigger,
+            "event": im.get_event_name(),
+            "file": im.file,
+            "line": im.line,
+            "result": im.res,
+            "start": im.start,
+            "end": im.end,
+            "plan": im.plan.label if im.plan else "",
+            "code": im.plan.readable() if im.plan else ""
+        }
+        if im.failure_reason:
+            reason = im.failure_reason
+            bug["failure"] = {"type": reason.type, "message": reason.msg, "src": reason.src, "line": reason.line}
+        return bug
+
+
+def find_failed_goals(agent_data: AgentData) -> list[int]:
+    # the top-level IMs of intentions in which a goal failed or found no applicable plan
+    return [intention.get_root_im().id for intention in agent_data.get_failed_intentions()]
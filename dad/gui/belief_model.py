@@ -0,0 +1,296 @@
+import re
+from array import array
+from bisect import bisect_left, insort
+from itertools import accumulate
+from typing import Optional
+
+from PyQt6.QtCore import Qt, QAbstractItemModel, QModelIndex
+from PyQt6.QtGui import QColor
+
+from model.search import FUNCTOR_ARITY, parse_terms
+
+NAMESPACE = re.compile(r"^(\w+)::")
+
+
+def get_namespace(belief: str) -> str:
+    match = NAMESPACE.match(belief)
+    return match.group(1) if match else ""
+
+
+class BeliefFilter:
+    # a prefix of the belief (e.g. "on(b" or "kqml::") or a functor and arity (e.g. on/2), the namespace of the
+    # belief is skipped unless the filter names one
+    def __init__(self, text: str = ""):
+        self.text = text.strip()
+        functor_arity = FUNCTOR_ARITY.match(self.text)
+        self.functor = functor_arity.group(1) if functor_arity else None
+        self.arity = int(functor_arity.group(2)) if functor_arity else -1
+        self.prefix = self.functor if functor_arity else self.text
+        self.namespace = get_namespace(self.prefix) if "::" in self.prefix else None
+
+    def get_prefix(self, namespace: str) -> Optional[str]:
+        # the prefix the beliefs of the namespace have to start with, None if none of them can match
+        if self.namespace is None:
+            return f"{namespace}::{self.prefix}" if namespace else self.prefix
+        return self.prefix if self.namespace == namespace else None
+
+    def select(self, beliefs: list[str], namespace: str) -> list[str]:
+        # beliefs is sorted, so the ones with the prefix are a range found by bisection
+        prefix = self.get_prefix(namespace)
+        if prefix is None:
+            return []
+        start = bisect_left(beliefs, prefix)
+        end = start
+        while end < len(beliefs) and beliefs[end].startswith(prefix):
+            end += 1
+        if self.functor is None:
+            return beliefs[start:end]
+        return [belief for belief in beliefs[start:end] if self.has_arity(belief, len(prefix))]
+
+    def matches(self, belief: str) -> bool:
+        prefix = self.get_prefix(get_namespace(belief))
+        return prefix is not None and belief.startswith(prefix) and \
+            (self.functor is None or self.has_arity(belief, len(prefix)))
+
+    def has_arity(self, belief: str, functor_length: int) -> bool:
+        rest = belief[functor_length:functor_length + 1]
+        if self.arity == 0:
+            return rest in ("", "[")
+        if rest != "(":
+            return False
+        end = belief.find(")", functor_length)
+        arguments = belief[functor_length + 1:end]
+        if end > 0 and not any(bracket in arguments for bracket in "([{\"'"):  # flat arguments, just count them
+            return arguments.count(",") + 1 == self.arity
+        terms = parse_terms(belief)[0]
+        return len(terms) == 1 and isinstance(terms[0], tuple) and len(terms[0][1]) == self.arity
+
+
+class BeliefGroup:
+    # the beliefs of one namespace, sorted, and the ones passing the filter (the same list without a filter)
+    __slots__ = ("namespace", "row", "beliefs", "visible")
+
+    def __init__(self, namespace: str, beliefs: list[str], belief_filter: BeliefFilter):
+        self.namespace = namespace
+        self.row = 0
+        self.beliefs = beliefs
+        self.visible = beliefs
+        self.apply_filter(belief_filter)
+
+    def apply_filter(self, belief_filter: BeliefFilter):
+        self.visible = belief_filter.select(self.beliefs, self.namespace) if belief_filter.text else self.beliefs
+
+    def get_label(self) -> str:
+        return f"{self.namespace or '(default)'} ({len(self.visible)})"
+
+
+class BeliefListModel(QAbstractItemModel):
+    # the beliefs of one cycle, as a flat sorted list or grouped by namespace
+    # the view asks only for the rows it shows, a step to another cycle inserts and removes the changed rows
+    # after a step, added beliefs are highlighted and removed ones stay (highlighted) until the next step
+    color_added = QColor(0, 100, 0)
+    color_removed = QColor(120, 0, 0)
+    max_row_signals = 1000  # larger steps reset the model instead of signalling each row
+
+    def __init__(self):
+        super(BeliefListModel, self).__init__()
+        self.groups: list[BeliefGroup] = []
+        self.group_of: dict[str, BeliefGroup] = {}
+        self.offsets = array("q", [0])  # flat row of the first visible belief of each group
+        self.grouped = False
+        self.filter = BeliefFilter()
+        self.colors: dict[str, QColor] = {}
+        self.removed: list[str] = []
+
+    def set_beliefs(self, beliefs: list[str]):
+        by_namespace: dict[str, list[str]] = {}
+        for belief in sorted(beliefs):
+            namespace = get_namespace(belief)
+            by_namespace.setdefault(namespace, []).append(belief)
+        self.beginResetModel()
+        self.groups = [BeliefGroup(namespace, by_namespace[namespace], self.filter) for namespace in
+                       sorted(by_namespace)]
+        self.group_of = {group.namespace: group for group in self.groups}
+        self.colors = {}
+        self.removed = []
+        self.update_offsets()
+        self.endResetModel()
+
+    def set_filter(self, text: str):
+        self.beginResetModel()
+        self.filter = BeliefFilter(text)
+        for group in self.groups:
+            group.apply_filter(self.filter)
+        self.update_offsets()
+        self.endResetModel()
+
+    def set_grouped(self, grouped: bool):
+        self.beginResetModel()
+        self.grouped = grouped
+        self.endResetModel()
+
+    def update_offsets(self):
+        for row, group in enumerate(self.groups):
+            group.row = row
+        self.offsets = array("q", accumulate((len(group.visible) for group in self.groups), initial=0))
+
+    def apply_diff(self, added: list[str], removed: list[str]):
+        reset = len(self.removed) + len(added) + len(removed) > BeliefListModel.max_row_signals
+        if reset:
+            self.beginResetModel()
+        for belief in self.removed:
+            self.remove(belief, not reset)
+        highlighted = list(self.colors)  # the removed ones are gone, emit_changed skips them
+        self.colors = {}
+        self.removed = []
+        for belief in removed:
+            if self.contains(belief):
+                self.colors[belief] = BeliefListModel.color_removed
+                self.removed.append(belief)
+        for belief in added:
+            if not self.contains(belief):
+                self.insert(belief, not reset)
+            self.colors[belief] = BeliefListModel.color_added
+        if reset:
+            self.endResetModel()
+            return
+        for belief in highlighted + self.removed + added:
+            self.emit_changed(belief)
+
+    def contains(self, belief: str) -> bool:
+        group = self.group_of.get(get_namespace(belief))
+        if group is None:
+            return False
+        position = bisect_left(group.beliefs, belief)
+        return position < len(group.beliefs) and group.beliefs[position] == belief
+
+    def insert(self, belief: str, signal: bool):
+        group = self.get_group(get_namespace(belief), signal)
+        filtered = group.visible is not group.beliefs
+        if filtered and not self.filter.matches(belief):
+            insort(group.beliefs, belief)
+            return
+        position = bisect_left(group.visible, belief)
+        if signal:
+            self.beginInsertRows(self.get_parent(group), self.get_row(group, position), self.get_row(group, position))
+        insort(group.beliefs, belief)
+        if filtered:
+            group.visible.insert(position, belief)
+        self.shift_offsets(group, 1)
+        if signal:
+            self.endInsertRows()
+            self.emit_group_changed(group)
+
+    def remove(self, belief: str, signal: bool):
+        group = self.group_of[get_namespace(belief)]
+        filtered = group.visible is not group.beliefs
+        position = bisect_left(group.visible, belief)
+        if position == len(group.visible) or group.visible[position] != belief:  # filtered out
+            del group.beliefs[bisect_left(group.beliefs, belief)]
+            return
+        if signal:
+            self.beginRemoveRows(self.get_parent(group), self.get_row(group, position), self.get_row(group, position))
+        del group.beliefs[bisect_left(group.beliefs, belief)]
+        if filtered:
+            del group.visible[position]
+        self.shift_offsets(group, -1)
+        if signal:
+            self.endRemoveRows()
+            self.emit_group_changed(group)
+
+    def get_group(self, namespace: str, signal: bool) -> BeliefGroup:
+        group = self.group_of.get(namespace)
+        if group is not None:
+            return group
+        group = BeliefGroup(namespace, [], self.filter)
+        row = bisect_left([other.namespace for other in self.groups], namespace)
+        signal = signal and self.grouped
+        if signal:
+            self.beginInsertRows(QModelIndex(), row, row)
+        self.groups.insert(row, group)
+        self.group_of[namespace] = group
+        self.update_offsets()
+        if signal:
+            self.endInsertRows()
+        return group
+
+    def shift_offsets(self, group: BeliefGroup, n: int):
+        for row in range(group.row + 1, len(self.offsets)):
+            self.offsets[row] += n
+
+    def get_parent(self, group: BeliefGroup) -> QModelIndex:
+        return self.createIndex(group.row, 0) if self.grouped else QModelIndex()
+
+    def get_row(self, group: BeliefGroup, position: int) -> int:
+        return position if self.grouped else self.offsets[group.row] + position
+
+    def get_index(self, belief: str) -> QModelIndex:
+        group = self.group_of.get(get_namespace(belief))
+        if group is None:
+            return QModelIndex()
+        position = bisect_left(group.visible, belief)
+        if position == len(group.visible) or group.visible[position] != belief:
+            return QModelIndex()
+        return self.createIndex(self.get_row(group, position), 0, group)
+
+    def emit_changed(self, belief: str):
+        index = self.get_index(belief)
+        if index.isValid():
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.BackgroundRole])
+
+    def emit_group_changed(self, group: BeliefGroup):
+        if self.grouped:
+            index = self.createIndex(group.row, 0)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole])
+
+    def get_belief(self, index: QModelIndex) -> Optional[str]:
+        # None for the rows of the namespaces
+        if not index.isValid():
+            return None
+        group = index.internalPointer()
+        if group is None:
+            return None
+        return group.visible[index.row() if self.grouped else index.row() - self.offsets[group.row]]
+
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if self.grouped:
+            if not parent.isValid():
+                return self.createIndex(row, column)  # a namespace
+            return self.createIndex(row, column, self.groups[parent.row()])
+        # the group containing the row in the flat list: the last one starting at or before the row, empty groups
+        # start where the next one does, so this is never one of them
+        group_row = bisect_left(self.offsets, row + 1) - 1
+        return self.createIndex(row, column, self.groups[group_row])
+
+    def parent(self, index: QModelIndex = QModelIndex()) -> QModelIndex:
+        if not index.isValid() or not self.grouped:
+            return QModelIndex()
+        group = index.internalPointer()
+        return QModelIndex() if group is None else self.createIndex(group.row, 0)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if not parent.isValid():
+            return len(self.groups) if self.grouped else self.offsets[-1]
+        if not self.grouped or parent.internalPointer() is not None:
+            return 0
+        return len(self.groups[parent.row()].visible)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 1
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        belief = self.get_belief(index)
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.groups[index.row()].get_label() if belief is None else belief
+        if role == Qt.ItemDataRole.BackgroundRole and belief is not None:
+            return self.colors.get(belief)
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole and section == 0:
+            return "Belief"
+        return None
@@ -1,13 +1,23 @@
+import json
+import sys
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
 from typing import Optional, Callable
 
 from PyQt6.QtWidgets import QWidget, QPushButton, QVBoxLayout, QHBoxLayout, QLabel, QTreeWidgetItem, \
-    QTreeWidget, QAbstractItemView, QFormLayout, QSplitter, QComboBox
-from PyQt6.QtGui import QColor
-from PyQt6.QtCore import Qt
+    QTreeWidget, QTreeView, QAbstractItemView, QFormLayout, QSplitter, QComboBox, QSlider, QLineEdit, QCheckBox, \
+    QPlainTextEdit
+from PyQt6.QtGui import QColor, QBrush
+from PyQt6.QtCore import Qt, QTimer, QModelIndex
 
 from model.bdi import Intention, Instruction, IntendedMeans
 from model.agent import AgentData, AgentRepository
-from debug.navigation_strategy import JasonDebuggingTreeNode, SimpleJasonNavigationStrategy, Result
+from model.index import BeliefTimeline
+from debug.navigation_strategy import JasonDebuggingTree, Result, create_strategy
+from gui.belief_model import BeliefListModel
+from gui.loader import BackgroundLoader, LoadingWidget
+from gui.tree_model import DebuggingTreeModel, InstructionItem, TreeItem
+from profiler import profiler
 
 
 class DebuggingScreen(QWidget):
@@ -15,14 +25,32 @@ class DebuggingScreen(QWidget):
         super(DebuggingScreen, self).__init__()
         self.app = app
         self.agent_repo: AgentRepository = self.app.agent_repo
+        self.loader: BackgroundLoader = self.app.loader
         self.selected_agent: str = selected_agent
-        self.agent_data: AgentData = self.agent_repo.get_agent_data(selected_agent)
-        self.node: Optional[JasonDebuggingTreeNode] = None
+        self.agent_data: Optional[AgentData] = None
+        self.node: Optional[int] = None
         self.question_view: Optional[QWidget] = None
         self.bug: Optional[Bug] = None
-        self.instruction_views: dict[Instruction, QTreeWidgetItem] = {}
+        self.instruction_views: dict[Instruction, InstructionItem] = {}
 
         QHBoxLayout(self)
+        self.loading_widget = LoadingWidget(self.loader)
+        self.layout().addWidget(self.loading_widget)
+        self.loader.cancelled.connect(self.on_loading_cancelled)
+        self.loader.load_agent(selected_agent, lambda agent_data: self.on_agent_loaded(agent_data, selected_goal),
+                               owner=self)
+        self.loading_widget.start(self.loader.get_agent_key(selected_agent), f"Loading {selected_agent}")
+
+    def on_loading_cancelled(self, task):
+        if task.key == self.loader.get_agent_key(self.selected_agent) and self.agent_data is None:
+            self.back()
+
+    def on_agent_loaded(self, agent_data: AgentData, selected_goal: int):
+        with profiler.phase("gui.debugging_screen"):
+            self.show_debugging_tree(agent_data, selected_goal)
+
+    def show_debugging_tree(self, agent_data: AgentData, selected_goal: int):
+        self.agent_data = agent_data
         self.splitter = QSplitter()
         tree_pane = QWidget(self.splitter)
         QVBoxLayout(tree_pane)
@@ -30,8 +58,9 @@ class DebuggingScreen(QWidget):
         QHBoxLayout(self.question_view_container)
         self.layout().addWidget(self.splitter)
 
-        tree = DebuggingScreen.create_tree(self.agent_data, selected_goal)
-        self.strategy = SimpleJasonNavigationStrategy(tree, self.agent_repo, selected_agent)
+        self.tree = tree = DebuggingScreen.create_tree(self.agent_data, selected_goal)
+        self.strategy = create_strategy(self.app.config.get("navigation_strategy"), tree, self.agent_repo,
+                                        self.selected_agent, self.app.get_answer_store())
 
         self.tree_view = DebuggingTreeView(tree)
         tree_pane.layout().addWidget(self.tree_view)
@@ -46,8 +75,8 @@ class DebuggingScreen(QWidget):
         self.debug()
 
     @staticmethod
-    def create_tree(agent_data: AgentData, selected_im: int) -> JasonDebuggingTreeNode:
-        return JasonDebuggingTreeNode(agent_data, agent_data.intended_means.get(selected_im))
+    def create_tree(agent_data: AgentData, selected_im: int) -> JasonDebuggingTree:
+        return JasonDebuggingTree(agent_data.intended_means.get(selected_im))
 
     def buggy_goal_located(self):
         result_view = FormWidget()
@@ -58,20 +87,23 @@ class DebuggingScreen(QWidget):
             result_view.add_row(f"Code:\n{self.bug.code}")
             cont_button = QPushButton("Debug goal/plan")
             result_view.add_button(cont_button)
-            cont_button.clicked.connect(lambda: self.debug_plan(self.strategy.final_bug.im, 0))
+            cont_button.clicked.connect(lambda: self.debug_plan(self.tree.get_im(self.strategy.final_bug), 0))
         else:
             result_view.add_row("Sorry, no bug could be located.")
 
     def debug(self):
         next_node = self.strategy.get_next()
-        if next_node:
+        for node in self.strategy.recalled:  # answered in an earlier session or for an equal goal
+            self.tree_view.mark_validity(node, self.strategy.get_state(node) == Result.Valid)
+        self.strategy.recalled.clear()
+        if next_node is not None:
             self.node = next_node
             self.tree_view.highlight_node(next_node)
             self.validate_goal_addition(next_node)
         else:
             buggy_node = self.strategy.final_bug
-            if buggy_node:
-                im = buggy_node.im
+            if buggy_node is not None:
+                im = self.tree.get_im(buggy_node)
                 self.bug = Bug(im.event.name if im.event else "", im.file, str(im.line), code=im.plan.readable())
                 self.instruction_views = self.tree_view.expand_node_with_plan_instructions(buggy_node)
             else:
@@ -100,7 +132,8 @@ class DebuggingScreen(QWidget):
                 instruction_widget.add_row("Beliefs deleted:")
                 instruction_widget.layout().addRow(BeliefView(diff.beliefs_deleted))
             elif instruction.type == "action":
-                agent_view = AgentStateView(self.agent_repo, self.selected_agent, instruction.cycle, "Action started")
+                agent_view = AgentStateView(self.agent_repo, self.agent_data, self.selected_agent, instruction.cycle,
+                                            "Action started", loader=self.loader)
                 agent_view.add_bookmark(instruction.end, "Action finished executing")
                 instruction_widget.add_row("Agent state")
                 instruction_widget.layout().addRow(agent_view)
@@ -108,7 +141,8 @@ class DebuggingScreen(QWidget):
                 if instruction_index > 0:
                     instruction_widget.add_row("Unifier before", im.instructions[instruction_index - 1].unifier)
                 instruction_widget.add_row("Unifier after", instruction.unifier)
-                agent_view = AgentStateView(self.agent_repo, self.selected_agent, instruction.cycle, "Internal action")
+                agent_view = AgentStateView(self.agent_repo, self.agent_data, self.selected_agent, instruction.cycle,
+                                            "Internal action", loader=self.loader)
                 instruction_widget.add_row("Agent state")
                 instruction_widget.layout().addRow(agent_view)
             elif instruction.type == "test":
@@ -127,8 +161,8 @@ class DebuggingScreen(QWidget):
             instruction_widget.add_yes_no_buttons(lambda: self.debug_plan(im, instruction_index + 1),
                                                   lambda: self.buggy_instruction_found(im, instruction_index))
 
-    def validate_goal_addition(self, node: JasonDebuggingTreeNode):
-        im = node.im
+    def validate_goal_addition(self, node: int):
+        im = self.tree.get_im(node)
         validation_widget = FormWidget()
         self.set_question_view(validation_widget)
 
@@ -149,16 +183,17 @@ class DebuggingScreen(QWidget):
         validation_widget.add_row("Agent state")
 
         # TODO: mark changes from the current cycle
-        state_view = AgentStateView(self.agent_repo, self.selected_agent, cycle, "Goal added")
+        state_view = AgentStateView(self.agent_repo, self.agent_data, self.selected_agent, cycle, "Goal added",
+                                    loader=self.loader)
         validation_widget.layout().addRow(state_view)
 
         self.set_question_view(validation_widget)
 
-    def goal_addition_validated(self, node: JasonDebuggingTreeNode):
+    def goal_addition_validated(self, node: int):
         self.validate_goal_result(node)
 
-    def validate_goal_result(self, node: JasonDebuggingTreeNode):
-        im = node.im
+    def validate_goal_result(self, node: int):
+        im = self.tree.get_im(node)
         validation_widget = FormWidget()
 
         validation_widget.add_row("Goal", im.trigger)
@@ -178,7 +213,8 @@ class DebuggingScreen(QWidget):
         validation_widget.add_yes_no_buttons(self.goal_result_validated, self.goal_result_invalidated)
         validation_widget.layout().addRow(QLabel(f"State"))
 
-        state_view = AgentStateView(self.agent_repo, self.selected_agent, im.end, "Goal finished")
+        state_view = AgentStateView(self.agent_repo, self.agent_data, self.selected_agent, im.end, "Goal finished",
+                                    loader=self.loader)
         validation_widget.layout().addRow(state_view)
 
         self.set_question_view(validation_widget)
@@ -256,89 +292,101 @@ class YesNoButtonBar(QWidget):
         self.layout().addStretch()
 
 
-class DebuggingTreeView(QTreeWidget):
+class DebuggingTreeView(QTreeView):
 
     color_std = QColor(0, 0, 0)
     color_highlight = QColor(0, 10, 100)
     color_valid = QColor(0, 150, 0)
     color_invalid = QColor(150, 0, 0)
 
-    def __init__(self, tree: JasonDebuggingTreeNode):
+    def __init__(self, tree: JasonDebuggingTree):
         super(DebuggingTreeView, self).__init__()
         self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
         self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
-        self.views = {}
-        self.highlighted_view: Optional[QTreeWidgetItem] = None
-        self.setHeaderLabels(["Debugging Tree"])
+        self.tree_model = DebuggingTreeModel(tree)
+        self.setModel(self.tree_model)
+        self.setUniformRowHeights(True)
+        self.expand(self.tree_model.get_index(0))
 
-        for node in tree.traverse():
-            node_view = DebuggingTreeView.create_node(node.label)
-            self.views[node] = node_view
-            parent_view = self.views[node.parent] if node.parent else self.invisibleRootItem()
-            parent_view.addChild(node_view)
-        self.expandAll()
+    def color_node(self, node: int, color: QColor):
+        self.tree_model.set_color(node, color)
 
-    @staticmethod
-    def create_node(label, color=None) -> QTreeWidgetItem:
-        item = QTreeWidgetItem()
-        item.setText(0, label)
-        if color:
-            item.setBackground(0, QColor(*color))
-        return item
-
-    def color_node(self, node: JasonDebuggingTreeNode, color: QColor):
-        view = self.views[node]
-        if view:
-            DebuggingTreeView.color_node_view(view, color)
+    def color_node_view(self, view: InstructionItem, color: QColor):
+        self.tree_model.set_color(view, color)
 
-    @staticmethod
-    def color_node_view(view: QTreeWidgetItem, color: QColor):
-        view.setBackground(0, color)
-
-    @staticmethod
-    def highlight_view(view: QTreeWidgetItem):
-        view.setBackground(0, DebuggingTreeView.color_highlight)
+    def highlight_view(self, view: InstructionItem):
+        self.color_node_view(view, DebuggingTreeView.color_highlight)
+        self.reveal(view)
 
-    def highlight_node(self, node: JasonDebuggingTreeNode):
+    def highlight_node(self, node: int):
         self.color_node(node, DebuggingTreeView.color_highlight)
-
-    def mark_validity(self, node: JasonDebuggingTreeNode, valid: bool):
+        self.reveal(node)
+
+    def reveal(self, item: TreeItem):
+        # expands only the path to the item
+        index = self.tree_model.get_index(item)
+        parent = index.parent()
+        while parent.isValid():
+            self.expand(parent)
+            parent = parent.parent()
+        self.scrollTo(index)
+
+    def mark_validity(self, node: int, valid: bool):
         self.color_node(node, DebuggingTreeView.color_valid if valid else self.color_invalid)
 
-    def mark_view(self, view: QTreeWidgetItem, valid: bool):
+    def mark_view(self, view: InstructionItem, valid: bool):
         self.color_node_view(view, DebuggingTreeView.color_valid if valid else self.color_invalid)
 
-    def expand_node_with_plan_instructions(self, origin: JasonDebuggingTreeNode) -> dict[Instruction, QTreeWidgetItem]:
-        parent_view = self.views[origin]
-        parent_view.takeChildren()
-        instructions = origin.im.instructions
-        result: dict[Instruction, QTreeWidgetItem] = {}
-        for instruction in instructions:
-            node_view = DebuggingTreeView.create_node(str(instruction))
-            result[instruction] = node_view
-            if instruction.text.startswith("!"):
-                self.color_node_view(node_view, DebuggingTreeView.color_valid)
-            parent_view.addChild(node_view)
-        self.expandAll()
+    def expand_node_with_plan_instructions(self, origin: int) -> dict[Instruction, InstructionItem]:
+        items = self.tree_model.set_instructions(origin, self.tree_model.tree.get_im(origin).instructions)
+        result: dict[Instruction, InstructionItem] = {}
+        for item in items:
+            result[item.instruction] = item
+            if item.instruction.text.startswith("!"):
+                self.color_node_view(item, DebuggingTreeView.color_valid)
+        self.reveal(origin)
+        self.expand(self.tree_model.get_index(origin))
         return result
 
 
 class AgentStateView(QWidget):
-    def __init__(self, agent_repo: AgentRepository, agent_name: str, start_cycle=0, start_label="Start", navigable=True):
+    # the state is loaded in full once, stepping and scrubbing to nearby cycles only applies the changes in between
+    max_step = 500  # cycles, farther jumps load the full state
+    play_interval_ms = 50
+
+    def __init__(self, agent_repo: AgentRepository, agent_data: AgentData, agent_name: str, start_cycle=0,
+                 start_label="Start", navigable=True, loader: Optional[BackgroundLoader] = None):
+        # agent_data: as loaded by the caller, not loaded again here in the GUI thread
         super(AgentStateView, self).__init__()
         self.agent_repo = agent_repo
+        self.loader = loader
         self.agent_name = agent_name
-        self.agent_data = self.agent_repo.get_agent_data(self.agent_name)
+        self.agent_data = agent_data
         self.navigable = navigable
         self.start_cycle = start_cycle
         self.current_cycle = start_cycle
+        self.state_cycle: Optional[int] = None  # cycle the views show, None until the first state arrived
+        self.state_requested = False  # a full state is being loaded in the background
 
         self.setLayout(QVBoxLayout())
 
         self.belief_view = BeliefView()
+        self.belief_history_view = BeliefHistoryView()
         self.intention_view = IntentionView(self.agent_data)
-        self.layout().addWidget(self.belief_view)
-        self.layout().addWidget(self.intention_view)
+        self.raw_cycle_view = RawCycleView()
+        self.selected_belief: Optional[str] = None
+        belief_splitter = QSplitter()
+        belief_splitter.addWidget(self.belief_view)
+        belief_splitter.addWidget(self.belief_history_view)
+        belief_splitter.setSizes([700, 300])
+        self.layout().addWidget(belief_splitter)
+        intention_splitter = QSplitter()
+        intention_splitter.addWidget(self.intention_view)
+        intention_splitter.addWidget(self.raw_cycle_view)
+        intention_splitter.setSizes([700, 300])
+        self.layout().addWidget(intention_splitter)
+        self.belief_view.tree.selectionModel().currentChanged.connect(self.on_belief_selected)
+        self.belief_history_view.tree.itemDoubleClicked.connect(self.on_interval_double_clicked)
 
         self.cycle_label = QLabel(str(start_cycle))
         self.bookmark_combo = QComboBox()
@@ -347,11 +395,25 @@ class AgentStateView(QWidget):
         btn_prev = QPushButton("Prev")
         btn_next = QPushButton("Next")
         btn_go = QPushButton("Go")
+        self.btn_play = QPushButton("Play")
+        self.btn_play.setCheckable(True)
+        self.btn_play.toggled.connect(self.set_playing)
+        self.play_timer = QTimer(self)
+        self.play_timer.timeout.connect(self.play_step)
+        self.slider = QSlider(Qt.Orientation.Horizontal)
+        self.slider.setRange(0, max(start_cycle, self.agent_data.changes.last_cycle()))
+        self.slider.setValue(start_cycle)
+        self.slider.valueChanged.connect(self.on_slider_moved)
+        self.scrub_timer = QTimer(self)  # the slider moves faster than states can be shown, only the last value counts
+        self.scrub_timer.setSingleShot(True)
+        self.scrub_timer.timeout.connect(lambda: self.show_cycle(self.slider.value()))
         cycle_bar = QWidget()
         QHBoxLayout(cycle_bar)
         cycle_bar.layout().addWidget(btn_prev)
         cycle_bar.layout().addWidget(self.cycle_label)
         cycle_bar.layout().addWidget(btn_next)
+        cycle_bar.layout().addWidget(self.btn_play)
+        cycle_bar.layout().addWidget(self.slider, 1)
         bookmarks_widget = QWidget()
         QVBoxLayout(bookmarks_widget)
         bookmarks_widget.layout().addWidget(QLabel("Bookmarks"))
@@ -377,9 +439,102 @@ class AgentStateView(QWidget):
     def show_cycle(self, cycle):
         self.current_cycle = cycle
         self.cycle_label.setText(str(cycle))
-        state = self.agent_repo.get_agent_state(self.agent_name, self.current_cycle)
-        self.belief_view.set_beliefs(state["beliefs"])
-        self.intention_view.set_intentions(state["intentions"], cycle)
+        self.slider.blockSignals(True)
+        self.slider.setMaximum(max(self.slider.maximum(), cycle))
+        self.slider.setValue(cycle)
+        self.slider.blockSignals(False)
+        self.show_belief_history()
+        self.show_raw_cycle(cycle)
+        if self.state_cycle is not None and abs(cycle - self.state_cycle) <= AgentStateView.max_step:
+            self.step_to(cycle)
+        elif not self.state_requested:
+            self.request_state(cycle)
+
+    def request_state(self, cycle: int):
+        if self.loader is None:
+            self.set_state(cycle, self.agent_repo.get_agent_state(self.agent_name, cycle))
+            return
+        self.state_requested = True
+        agent_repo, agent_name = self.agent_repo, self.agent_name
+        self.loader.submit(("state", agent_repo.get_cache_key(agent_name), cycle),
+                           lambda progress, cancelled: agent_repo.get_agent_state(agent_name, cycle),
+                           lambda state: self.set_state(cycle, state), owner=self)
+
+    def show_raw_cycle(self, cycle: int):
+        # decoded from the log through its cycle index, so a far jump shows the cycle before its state arrived
+        if self.loader is None:
+            self.raw_cycle_view.set_entries(self.agent_repo.get_raw_cycle(self.agent_name, cycle))
+            return
+        agent_repo, agent_name = self.agent_repo, self.agent_name
+        self.loader.submit(("raw_cycle", agent_repo.get_cache_key(agent_name), cycle),
+                           lambda progress, cancelled: agent_repo.get_raw_cycle(agent_name, cycle),
+                           lambda entries: self.set_raw_cycle(cycle, entries), owner=self)
+
+    def set_raw_cycle(self, cycle: int, entries: list[dict]):
+        if cycle == self.current_cycle:  # dropped if the user moved on while it was read
+            self.raw_cycle_view.set_entries(entries)
+
+    def set_state(self, cycle: int, state: dict):
+        # shown even if another cycle was requested in the meantime, from here it is only a step or another request
+        self.state_requested = False
+        with profiler.phase("gui.agent_state_view"):
+            self.belief_view.set_beliefs(state["beliefs"])
+            self.intention_view.set_intentions(state["intentions"], cycle)
+        self.state_cycle = cycle
+        if cycle != self.current_cycle:
+            self.show_cycle(self.current_cycle)
+
+    def step_to(self, cycle: int):
+        # applies the changes between the shown cycle and the new one, forward or backward
+        if cycle == self.state_cycle:
+            return
+        with profiler.phase("gui.agent_state_step"):
+            diff = self.agent_repo.get_diff(self.agent_name, self.state_cycle, cycle)
+            self.belief_view.apply_diff(diff.beliefs_added, diff.beliefs_deleted)
+            intentions, ims = self.agent_repo.get_intention_changes(self.agent_name, self.state_cycle, cycle)
+            self.intention_view.step_to(intentions, ims, cycle)
+        self.state_cycle = cycle
+
+    def set_playing(self, playing: bool):
+        if playing:
+            self.play_timer.start(AgentStateView.play_interval_ms)
+        else:
+            self.play_timer.stop()
+
+    def play_step(self):
+        if self.current_cycle >= self.slider.maximum():
+            self.btn_play.setChecked(False)
+        elif not self.state_requested:  # waits for a full state instead of queueing steps
+            self.next_cycle()
+
+    def on_slider_moved(self, value: int):
+        if value != self.current_cycle and not self.scrub_timer.isActive():
+            self.scrub_timer.start(0)
+
+    def on_belief_selected(self, index: QModelIndex):
+        belief = self.belief_view.model.get_belief(index)
+        if belief is not None:
+            self.selected_belief = belief
+            self.show_belief_history()
+
+    def on_interval_double_clicked(self, item: QTreeWidgetItem):
+        self.show_cycle(int(item.text(0)))
+
+    def show_belief_history(self):
+        # the timeline is built once per agent, in the background the first time
+        if self.selected_belief is None:
+            return
+        if self.loader is None or self.agent_data.belief_timeline is not None:
+            self.set_belief_history(self.agent_repo.get_belief_timeline(self.agent_name))
+            return
+        agent_repo, agent_name = self.agent_repo, self.agent_name
+        self.loader.submit(("belief_timeline", agent_repo.get_cache_key(agent_name)),
+                           lambda progress, cancelled: agent_repo.get_belief_timeline(agent_name),
+                           self.set_belief_history, owner=self)
+
+    def set_belief_history(self, timeline: BeliefTimeline):
+        self.belief_history_view.set_intervals(self.selected_belief, timeline.get_intervals(self.selected_belief),
+                                               self.current_cycle)
 
     def prev_cycle(self):
         if self.current_cycle > 0:
@@ -398,48 +553,169 @@ class TreeView(QWidget):
         self.layout().addWidget(self.tree)
 
 
-class BeliefView(TreeView):
+class BeliefView(QWidget):
+    # the beliefs are kept in a BeliefListModel, the view only creates the rows it shows
     def __init__(self, beliefs: Optional[list[str]] = None):
-        super(BeliefView, self).__init__("Beliefs")
-        self.tree.setColumnWidth(0, 1000)
-        self.tree.setHeaderLabels(["Belief"])
+        super(BeliefView, self).__init__()
+        self.setLayout(QVBoxLayout())
+        self.model = BeliefListModel()
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter by prefix (e.g. on(b) or functor/arity (e.g. on/2)")
+        self.filter_edit.textChanged.connect(self.model.set_filter)
+        group_box = QCheckBox("Group by namespace")
+        group_box.toggled.connect(self.set_grouped)
+        self.tree = QTreeView()
+        self.tree.setUniformRowHeights(True)
+        self.tree.setRootIsDecorated(False)
+        self.tree.setModel(self.model)
+        self.model.modelReset.connect(self.expand_groups)
+        filter_bar = QWidget()
+        QHBoxLayout(filter_bar)
+        filter_bar.layout().setContentsMargins(0, 0, 0, 0)
+        filter_bar.layout().addWidget(QLabel("Beliefs"))
+        filter_bar.layout().addWidget(self.filter_edit, 1)
+        filter_bar.layout().addWidget(group_box)
+        self.layout().addWidget(filter_bar)
+        self.layout().addWidget(self.tree)
         self.set_beliefs(beliefs)
 
-    def set_beliefs(self, beliefs: list[str]):
-        if beliefs:
-            self.tree.clear()
-            for belief in beliefs:
-                self.tree.addTopLevelItem(QTreeWidgetItem([belief]))
+    def set_beliefs(self, beliefs: Optional[list[str]]):
+        if beliefs is not None:
+            self.model.set_beliefs(beliefs)
+
+    def apply_diff(self, added: list[str], removed: list[str]):
+        self.model.apply_diff(added, removed)
+
+    def set_grouped(self, grouped: bool):
+        self.tree.setRootIsDecorated(grouped)
+        self.model.set_grouped(grouped)
+
+    def expand_groups(self):
+        if self.model.grouped:
+            self.tree.expandAll()
+
+
+class RawCycleView(QWidget):
+    # the log entries of the shown cycle as written by the agent
+    def __init__(self):
+        super(RawCycleView, self).__init__()
+        self.setLayout(QVBoxLayout())
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.layout().addWidget(QLabel("Log"))
+        self.layout().addWidget(self.text)
+
+    def set_entries(self, entries: list[dict]):
+        self.text.setPlainText("\n".join(json.dumps(entry, indent=1) for entry in entries))
+
+
+class BeliefHistoryView(TreeView):
+    # the cycles in which the selected belief was true, around the shown cycle if there are many
+    color_current = QColor(100, 100, 0)
+    max_shown = 500
+
+    def __init__(self):
+        super(BeliefHistoryView, self).__init__("Belief history")
+        self.tree.setHeaderLabels(["From", "To", "Cycles"])
+        self.tree.setRootIsDecorated(False)
+
+    def set_intervals(self, belief: str, intervals: list[tuple[int, int]], cycle: int):
+        self.tree.clear()
+        self.tree.setToolTip(belief)
+        current = bisect_right(intervals, (cycle, sys.maxsize)) - 1
+        start = max(0, min(current - BeliefHistoryView.max_shown // 2, len(intervals) - BeliefHistoryView.max_shown))
+        for first, last in intervals[start:start + BeliefHistoryView.max_shown]:
+            still_true = last == sys.maxsize
+            item = QTreeWidgetItem([str(first), "" if still_true else str(last),
+                                    "" if still_true else str(last - first + 1)])
+            if first <= cycle <= last:
+                for column in range(3):
+                    item.setBackground(column, BeliefHistoryView.color_current)
+            self.tree.addTopLevelItem(item)
 
 
 class IntentionView(TreeView):
+    # keeps the rows of the shown intentions, a step to another cycle only updates the intentions and IMs that started
+    # or ended in between
+    # the tree of an intention can contain IMs of other intentions (new focus goals), so an IM can have several rows
+    color_ended = QColor(50, 50, 50)
+
     def __init__(self, agent_data: AgentData):
         super(IntentionView, self).__init__("Intentions")
         self.cycle = -1
         self.tree.setColumnWidth(0, 250)
         self.agent_data = agent_data
         self.tree.setHeaderLabels(["Event", "Trigger", "Context", "Result"])
+        self.rows: dict[int, dict[int, QTreeWidgetItem]] = {}  # intention id -> IM id -> row in its tree
+        self.intention_ids: list[int] = []  # of the top level rows, in order
 
     def set_intentions(self, intentions: list[Intention], cycle: int):
         self.tree.clear()
+        self.rows = {}
+        self.intention_ids = []
         self.cycle = cycle
         for intention in intentions:
-            if not intention.means:
-                continue
-            root_im = intention.means[0]
-            self.add_im_recursive(root_im, self.tree.invisibleRootItem())
-        self.tree.expandAll()
-
-    def add_im_recursive(self, im, parent_node: QTreeWidgetItem):
-        if im.start > self.cycle:
-            return
-        res = im.res if im.end < self.cycle else ""
-        node = QTreeWidgetItem([im.event.name if im.event else "", im.plan.trigger, im.plan.context, res])
-        if im.end < self.cycle:
-            node.setBackground(0, QColor(50, 50, 50))
-        parent_node.addChild(node)
+            root_im = intention.get_root_im()
+            if root_im is not None and root_im.start <= cycle:
+                self.add_intention(intention, root_im)
+
+    def step_to(self, intentions: list[Intention], ims: list[IntendedMeans], cycle: int):
+        self.cycle = cycle
+        for intention in intentions:
+            shown = intention.id in self.rows
+            root_im = intention.get_root_im() if intention.start <= cycle <= intention.end else None
+            if root_im is not None and root_im.start <= cycle:
+                if not shown:
+                    self.add_intention(intention, root_im)
+            elif shown:
+                self.remove_intention(intention)
+        for im in sorted(ims, key=attrgetter("start", "id")):  # parents before their children
+            ancestor = im
+            while ancestor is not None:  # the intentions whose tree contains the IM start at one of its ancestors
+                if ancestor.intention.id in self.rows and ancestor.intention.get_root_im().id == ancestor.id:
+                    self.update_im(im, self.rows[ancestor.intention.id])
+                ancestor = ancestor.parent
+
+    def update_im(self, im: IntendedMeans, rows: dict[int, QTreeWidgetItem]):
+        row = rows.get(im.id)
+        if row is None:
+            if im.start <= self.cycle:
+                self.add_im_recursive(im, rows[im.parent.id], rows)
+        elif im.start > self.cycle:  # its children are removed as well, they started after it
+            row.parent().removeChild(row)
+            del rows[im.id]
+        else:
+            self.set_ended(im, row)
+
+    def add_intention(self, intention: Intention, root_im: IntendedMeans):
+        position = bisect_left(self.intention_ids, intention.id)
+        self.intention_ids.insert(position, intention.id)
+        self.rows[intention.id] = {}
+        self.add_im_recursive(root_im, self.tree.invisibleRootItem(), self.rows[intention.id], position)
+
+    def remove_intention(self, intention: Intention):
+        position = bisect_left(self.intention_ids, intention.id)
+        del self.intention_ids[position]
+        del self.rows[intention.id]
+        self.tree.takeTopLevelItem(position)
+
+    def add_im_recursive(self, im, parent_node: QTreeWidgetItem, rows: dict[int, QTreeWidgetItem], position=-1):
+        node = rows[im.id] = QTreeWidgetItem([im.event.name if im.event else "", im.plan.trigger, im.plan.context, ""])
+        self.set_ended(im, node)
+        if position < 0:
+            parent_node.addChild(node)
+        else:
+            parent_node.insertChild(position, node)
+        node.setExpanded(True)
         for child_im in im.children:
-            self.add_im_recursive(child_im, node)
+            if child_im.start > self.cycle:  # the children are in the order they started
+                break
+            self.add_im_recursive(child_im, node, rows)
+
+    def set_ended(self, im: IntendedMeans, node: QTreeWidgetItem):
+        ended = im.end < self.cycle
+        node.setText(3, im.res if ended else "")
+        node.setBackground(0, IntentionView.color_ended if ended else QBrush())
 
 
 class Bug:
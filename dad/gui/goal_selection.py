@@ -1,32 +1,56 @@
 import json
 import os
+from itertools import takewhile
 from typing import Callable
 
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QStandardItem, QStandardItemModel
 from PyQt6.QtWidgets import QLabel, QDialog, QTableView, QWidget, QHBoxLayout, QVBoxLayout, \
-    QDialogButtonBox, QSplitter, QTabWidget
+    QDialogButtonBox, QSplitter, QTabWidget, QCheckBox, QLineEdit
 
 from config import Config
-from gui.util import setup_table, clear_model
-from model.agent import AgentRepository, AgentData
+from gui.loader import BackgroundLoader, LoadingWidget
+from gui.table_model import LazyTableModel, PagedRows, create_goal_model, create_plan_model, create_event_model, \
+    create_cycle_model, GOAL_END_COLUMNS
+from gui.util import setup_table
+from model.agent import AgentRepository, AgentData, StoredAgentData
+from model.log_file import is_log_file, open_log
+from model.search import SearchResult
+from profiler import profiler
 
 
 class GoalSelectionScreen(QWidget):
+    follow_interval_ms = 1000
 
-    def __init__(self, config: Config, agent_repo: AgentRepository, callback_goal_selected: Callable[[int, str], None]):
+    def __init__(self, config: Config, agent_repo: AgentRepository, loader: BackgroundLoader,
+                 callback_goal_selected: Callable[[int, str], None]):
         super(GoalSelectionScreen, self).__init__()
 
         self.config = config
         self.agent_repo = agent_repo
+        self.loader = loader
+        self.loading_widget = LoadingWidget(loader)
         self.callback_goal_selected = callback_goal_selected
         self.agent_table = QTableView()
         self.plan_table = QTableView()
-        self.plan_model = QStandardItemModel()
+        self.plan_model = create_plan_model()
         self.goal_table = QTableView()
-        self.goal_model = QStandardItemModel()
+        self.goal_model = create_goal_model()
         self.intention_table = QTableView()
-        self.intention_model = QStandardItemModel()
+        self.intention_model = create_goal_model()
+        self.search_edit = QLineEdit()
+        self.search_status = QLabel()
+        self.search_goal_table = QTableView()
+        self.search_goal_model = create_goal_model()
+        self.search_event_model = create_event_model()
+        self.search_cycle_model = create_cycle_model()
         self.selected_agent = None
+        self.last_intention_id = -1  # of the intentions looked at, shown unless they are waiting
+        self.intentions_waiting: list[int] = []  # no IM yet, shown once it started
+        self.last_goal_id = -1  # of the IMs shown, a followed log only adds higher ids
+        self.cycle_shown = -1  # the tables are up to date up to this cycle, -1 before the first fill
+        self.follow_timer = QTimer(self)
+        self.follow_timer.timeout.connect(self.follow_log)
         QHBoxLayout(self)
         self.tab_widget = QTabWidget()
 
@@ -40,13 +64,16 @@ class GoalSelectionScreen(QWidget):
                     column_widths=[150, 100, 250])
         self.agent_table.clicked.connect(self.update_agent_selected)
         agent_pane.layout().addWidget(self.agent_table)
+        follow_checkbox = QCheckBox("Follow log")
+        follow_checkbox.toggled.connect(self.set_follow_log)
+        agent_pane.layout().addWidget(follow_checkbox)
 
         folder = self.config.get("current_folder")
         agent_info = []
         for filename in os.listdir(folder):
-            if filename.endswith(".log"):
+            if is_log_file(filename):
                 log_file_path = os.path.join(folder, filename)
-                with open(log_file_path, "r") as log_file:
+                with open_log(log_file_path) as log_file:
                     log_info = json.loads(log_file.readline())
                     if log_info["entity"] == "agent":
                         agent_info.append(log_info)
@@ -58,26 +85,28 @@ class GoalSelectionScreen(QWidget):
             self.update_agent_selected()
 
         self.tab_widget.addTab(self.intention_table, "Intentions")
-        setup_table(table=self.intention_table, model=self.intention_model,
-                    labels=["#", "Trigger", "Context", "Posted", "Selected"],
-                    column_widths=[50, 300, 250, 70, 70])
+        setup_lazy_table(self.intention_table, self.intention_model, [50, 300, 250, 70, 70, 70, 70])
         self.intention_table.doubleClicked.connect(self.on_intention_double_clicked)
 
         self.tab_widget.addTab(self.goal_table, "Goals")
-        setup_table(table=self.goal_table, model=self.goal_model,
-                    labels=["#", "Trigger", "Context", "Posted", "Selected"],
-                    column_widths=[50, 300, 250, 70, 70])
+        setup_lazy_table(self.goal_table, self.goal_model, [50, 300, 250, 70, 70, 70, 70])
         self.goal_table.doubleClicked.connect(self.on_goal_double_clicked)
 
         self.tab_widget.addTab(self.plan_table, "Plans")
-        setup_table(table=self.plan_table, model=self.plan_model,
-                    labels=["Label", "Trigger", "Context", "Body", "Times used"],
-                    column_widths=[300, 250, 250])
+        setup_lazy_table(self.plan_table, self.plan_model, [300, 250, 250])
         self.plan_table.doubleClicked.connect(self.on_plan_double_clicked)
 
+        self.tab_widget.addTab(self.create_search_pane(), "Search")
+
+        filter_edit = QLineEdit()
+        filter_edit.setPlaceholderText("Filter")
+        filter_edit.textChanged.connect(self.set_filter)
+
         goal_selection_pane = QWidget()
         QVBoxLayout(goal_selection_pane)
         goal_selection_pane.layout().addWidget(QLabel("Select goal to debug:"))
+        goal_selection_pane.layout().addWidget(filter_edit)
+        goal_selection_pane.layout().addWidget(self.loading_widget)
         goal_selection_pane.layout().addWidget(self.tab_widget)
 
         splitter = QSplitter()
@@ -86,6 +115,26 @@ class GoalSelectionScreen(QWidget):
         splitter.addWidget(goal_selection_pane)
         splitter.setSizes([200, 500])
 
+    def create_search_pane(self) -> QWidget:
+        search_pane = QWidget()
+        QVBoxLayout(search_pane)
+        self.search_edit.setPlaceholderText("Search, e.g. trigger:found(red) belief:+holding(b3) cycle:100-200")
+        self.search_edit.returnPressed.connect(self.search)
+        search_pane.layout().addWidget(self.search_edit)
+        search_pane.layout().addWidget(self.search_status)
+        results = QTabWidget()
+        setup_lazy_table(self.search_goal_table, self.search_goal_model, [50, 300, 250, 70, 70, 70, 70])
+        self.search_goal_table.doubleClicked.connect(self.on_search_goal_double_clicked)
+        results.addTab(self.search_goal_table, "Goals")
+        event_table = QTableView()
+        setup_lazy_table(event_table, self.search_event_model, [50, 400, 70, 70, 70])
+        results.addTab(event_table, "Events")
+        cycle_table = QTableView()
+        setup_lazy_table(cycle_table, self.search_cycle_model, [100])
+        results.addTab(cycle_table, "Cycles")
+        search_pane.layout().addWidget(results)
+        return search_pane
+
     def on_intention_double_clicked(self):
         selected_goal = int(self.intention_table.currentIndex().siblingAtColumn(0).data())
         self.callback_goal_selected(selected_goal, self.selected_agent)
@@ -94,33 +143,153 @@ class GoalSelectionScreen(QWidget):
         selected_goal = int(self.goal_table.currentIndex().siblingAtColumn(0).data())
         self.callback_goal_selected(selected_goal, self.selected_agent)
 
+    def on_search_goal_double_clicked(self):
+        selected_goal = int(self.search_goal_table.currentIndex().siblingAtColumn(0).data())
+        self.callback_goal_selected(selected_goal, self.selected_agent)
+
     def on_plan_double_clicked(self):
+        agent_data = self.agent_repo.get_loaded_agent_data(self.selected_agent)
+        if agent_data is None:
+            return
         selected_plan_label = self.plan_table.currentIndex().siblingAtColumn(0).data()
-        dialog = GoalSelectionDialog(self.agent_repo.get_agent_data(self.selected_agent), selected_plan_label)
+        dialog = GoalSelectionDialog(agent_data, selected_plan_label)
         dialog.exec()
         if dialog.selected_goal != -1:
             self.callback_goal_selected(dialog.selected_goal, self.selected_agent)
 
+    def set_follow_log(self, follow: bool):
+        if follow:
+            self.follow_timer.start(GoalSelectionScreen.follow_interval_ms)
+        else:
+            self.follow_timer.stop()
+
+    def follow_log(self):
+        # skipped while a worker thread uses the agent's data, the next poll catches up
+        if not self.selected_agent or not self.agent_repo.is_agent_loaded(self.selected_agent):
+            return
+        agent_lock = self.agent_repo.get_agent_lock(self.agent_repo.get_cache_key(self.selected_agent))
+        if not agent_lock.acquire(blocking=False):
+            return
+        try:
+            if self.agent_repo.update_agent_data(self.selected_agent):
+                self.add_new_rows()
+        finally:
+            agent_lock.release()
+
     def update_agent_selected(self):
+        previous_agent = self.selected_agent
         self.selected_agent = self.agent_table.currentIndex().siblingAtColumn(0).data()
-        agent_data: AgentData = self.agent_repo.get_agent_data(self.selected_agent)
-        clear_model(self.intention_model)
-        clear_model(self.goal_model)
-        clear_model(self.plan_model)
-        for _, intention in agent_data.intentions.items():
-            if not intention.means:
-                continue
-            im = intention.means[0]
-            self.intention_model.appendRow(
-                QStandardItem(x) for x in [str(im.id), im.trigger, im.context, im.get_event_added(), str(im.start)])
-        for _, im in agent_data.intended_means.items():
-            self.goal_model.appendRow(
-                QStandardItem(x) for x in [str(im.id), im.trigger, im.context, im.get_event_added(), str(im.start)])
-        for label, plan in agent_data.plans.items():
-            if plan.used == 0:
-                continue
-            self.plan_model.appendRow(
-                QStandardItem(x) for x in [label, plan.trigger, plan.context, plan.body, str(plan.used)])
+        if previous_agent and previous_agent != self.selected_agent:
+            self.loader.cancel(self.loader.get_agent_key(previous_agent))
+        self.intention_model.clear()
+        self.goal_model.clear()
+        self.plan_model.clear()
+        self.show_search_result(SearchResult())
+        self.last_intention_id = -1
+        self.intentions_waiting = []
+        self.last_goal_id = -1
+        self.cycle_shown = -1
+        agent_name = self.selected_agent
+        self.loader.load_agent(agent_name, lambda _: self.on_agent_loaded(agent_name), owner=self)
+        self.loading_widget.start(self.loader.get_agent_key(agent_name), f"Loading {agent_name}")
+
+    def on_agent_loaded(self, agent_name: str):
+        if agent_name == self.selected_agent:
+            self.add_new_rows()
+
+    def add_new_rows(self):
+        with profiler.phase("gui.goal_tables"):
+            self.fill_tables()
+
+    def fill_tables(self):
+        # adds the intentions and IMs with ids above the last ones shown
+        agent_data = self.agent_repo.get_loaded_agent_data(self.selected_agent)
+        if agent_data is None:  # dropped from the cache meanwhile, it is loaded again when selected
+            return
+        if isinstance(agent_data, StoredAgentData):
+            self.add_stored_rows(agent_data)
+        else:
+            self.add_loaded_rows(agent_data)
+        last_cycle = agent_data.changes.last_cycle()
+        if self.cycle_shown >= 0 and any(bucket.ims_ended for bucket in
+                                         agent_data.changes.between(self.cycle_shown, last_cycle)):
+            for model in (self.intention_model, self.goal_model):
+                model.columns_changed(*GOAL_END_COLUMNS)
+        self.cycle_shown = last_cycle
+        self.plan_model.set_rows(plan for plan in agent_data.plans.values() if plan.used > 0)  # usage counts change
+
+    def add_loaded_rows(self, agent_data: AgentData):
+        intentions = [agent_data.intentions[intention_id] for intention_id in self.intentions_waiting]
+        intentions.extend(values_after(agent_data.intentions, self.last_intention_id))
+        root_ims = [(intention, intention.get_root_im()) for intention in intentions]
+        self.intentions_waiting = [intention.id for intention, root_im in root_ims if root_im is None]
+        self.last_intention_id = max([self.last_intention_id] + [intention.id for intention in intentions])
+        self.intention_model.append_rows(root_im for _, root_im in root_ims if root_im is not None)
+        ims = values_after(agent_data.intended_means, self.last_goal_id)
+        self.goal_model.append_rows(ims)
+        self.last_goal_id = ims[-1].id if ims else self.last_goal_id
+
+    def add_stored_rows(self, agent_data: StoredAgentData):
+        # the models keep ids and fetch pages of IMs when the view shows them
+        store = agent_data.store
+        for model in (self.intention_model, self.goal_model):
+            if not isinstance(model.rows, PagedRows):
+                model.set_rows(PagedRows(store.get_ims))
+        intentions = [(intention_id, store.get_intention(intention_id).get_root_im())
+                      for intention_id in self.intentions_waiting]
+        intentions = [(intention_id, root_im.id if root_im else None) for intention_id, root_im in intentions]
+        intentions.extend(store.load_root_im_ids(self.last_intention_id))
+        self.intentions_waiting = [intention_id for intention_id, root_im_id in intentions if root_im_id is None]
+        self.last_intention_id = max([self.last_intention_id] + [intention_id for intention_id, _ in intentions])
+        self.intention_model.append_rows(root_im_id for _, root_im_id in intentions if root_im_id is not None)
+        im_ids = store.load_ids("intended_means", self.last_goal_id)
+        self.goal_model.append_rows(im_ids)
+        self.last_goal_id = im_ids[-1] if im_ids else self.last_goal_id
+
+    def search(self):
+        # runs in the background, the result of an older query or another agent is dropped
+        query = self.search_edit.text().strip()
+        agent_name = self.selected_agent
+        if not query or not agent_name or not self.agent_repo.is_agent_loaded(agent_name):
+            return
+        agent_repo = self.agent_repo
+
+        def run_search(progress, cancelled):
+            try:
+                return agent_repo.search(agent_name, query)
+            except ValueError as e:
+                return str(e)
+
+        self.search_status.setText("Searching...")
+        self.loader.submit(("search", agent_repo.get_cache_key(agent_name), query), run_search,
+                           lambda result: self.on_search_done(agent_name, query, result), owner=self)
+
+    def on_search_done(self, agent_name: str, query: str, result):
+        if agent_name != self.selected_agent or query != self.search_edit.text().strip():
+            return
+        if isinstance(result, str):  # malformed query
+            self.search_status.setText(result)
+            return
+        self.show_search_result(result)
+
+    def show_search_result(self, result: SearchResult):
+        self.search_goal_model.set_rows(result.intended_means)
+        self.search_event_model.set_rows(result.events)
+        self.search_cycle_model.set_rows(result.cycles)
+        self.search_status.setText(f"{len(result.intended_means)} goals, {len(result.events)} events, "
+                                   f"{len(result.cycles)} cycles" if self.search_edit.text().strip() else "")
+
+    def set_filter(self, text: str):
+        with profiler.phase("gui.filter"):
+            for model in (self.intention_model, self.goal_model, self.plan_model):
+                model.set_filter(text)
+
+
+def values_after(table: dict, last_id: int) -> list:
+    # the values with ids above last_id, looked for from the end since ids grow in the order of the log
+    values = list(takewhile(lambda value: value.id > last_id, reversed(table.values())))
+    values.reverse()
+    return values
 
 
 class GoalSelectionDialog(QDialog):
@@ -140,19 +309,22 @@ class GoalSelectionDialog(QDialog):
         self.layout().addWidget(button_box)
 
         self.table = QTableView()
-        model = QStandardItemModel()
-        setup_table(self.table, model, ["#", "Trigger", "Context", "Posted", "Selected"], False, [50, 300, 250, 70, 70])
+        self.model = create_goal_model()
+        self.model.set_rows(agent_data.get_plan_ims(plan_label))
+        setup_lazy_table(self.table, self.model, [50, 300, 250, 70, 70, 70, 70])
         self.layout().addWidget(self.table)
         self.table.doubleClicked.connect(self.on_goal_selected)
 
-        for im in agent_data.intended_means.values():
-            if im.plan.label == plan_label:
-                model.appendRow(
-                    QStandardItem(x) for x in [str(im.id), im.trigger, im.context, str(im.event.cycle_added), str(im.start)])
-
     def on_goal_selected(self):
         self.selected_goal = int(self.table.currentIndex().siblingAtColumn(0).data())
         self.close()
 
     def cancel(self):
         self.close()
+
+
+def setup_lazy_table(table: QTableView, model: LazyTableModel, column_widths: list[int]):
+    table.setModel(model)
+    setup_table(table=table, column_widths=column_widths)
+    table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)  # keep the log order until clicked
+    table.setSortingEnabled(True)
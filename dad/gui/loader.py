@@ -0,0 +1,160 @@
+import threading
+import traceback
+from typing import Callable, Hashable, Optional
+
+from PyQt6 import sip
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtWidgets import QWidget, QHBoxLayout, QLabel, QProgressBar, QPushButton
+
+from model.agent import AgentRepository, AgentData
+from model.util import LoadCancelled, LoadProgress
+
+# a task gets a progress callback (done, total) and a function telling whether it was cancelled
+TaskFunction = Callable[[Callable[[int, int], None], Callable[[], bool]], object]
+
+
+class LoaderTask(QRunnable):
+    def __init__(self, loader: "BackgroundLoader", key: Hashable, function: TaskFunction):
+        super(LoaderTask, self).__init__()
+        self.loader = loader
+        self.key = key
+        self.function = function
+        self.cancel_event = threading.Event()
+
+    def run(self):
+        try:
+            result = self.function(lambda done, total: self.loader.progress.emit(self, done, total),
+                                   self.cancel_event.is_set)
+        except LoadCancelled:
+            self.loader.cancelled.emit(self)
+            return
+        except Exception as e:
+            traceback.print_exc()
+            self.loader.failed.emit(self, str(e))
+            return
+        if self.cancel_event.is_set():
+            self.loader.cancelled.emit(self)
+        else:
+            self.loader.finished.emit(self, result)
+
+
+class BackgroundLoader(QObject):
+    # runs tasks in worker threads, the signals are queued, so results reach the callbacks on the GUI thread
+    # while a task is running, requests with the same key are coalesced into it
+    # the signals carry the LoaderTask, a cancelled task may still be running when its key is requested again
+    finished = pyqtSignal(object, object)
+    failed = pyqtSignal(object, str)
+    cancelled = pyqtSignal(object)
+    progress = pyqtSignal(object, int, int)
+
+    def __init__(self, agent_repo: AgentRepository):
+        super(BackgroundLoader, self).__init__()
+        self.agent_repo = agent_repo
+        self.pool = QThreadPool()
+        self.tasks: dict[Hashable, LoaderTask] = {}
+        self.callbacks: dict[Hashable, list[tuple[Optional[QObject], Callable[[object], None]]]] = {}
+        self.finished.connect(self.on_finished)
+        self.failed.connect(self.on_done)
+        self.cancelled.connect(self.on_done)
+
+    def submit(self, key: Hashable, function: TaskFunction, callback: Callable[[object], None],
+               owner: Optional[QObject] = None):
+        # the callback is dropped if its owner widget is gone by the time the result arrives
+        if key in self.tasks:
+            self.callbacks[key].append((owner, callback))
+            return
+        self.callbacks[key] = [(owner, callback)]
+        task = self.tasks[key] = LoaderTask(self, key, function)
+        self.pool.start(task)
+
+    def get_agent_key(self, agent_name: str) -> tuple:
+        return "agent", self.agent_repo.get_cache_key(agent_name)
+
+    def load_agent(self, agent_name: str, callback: Callable[[AgentData], None], owner: Optional[QObject] = None):
+        # parsed in the worker thread (a process pool only pays off for several agents), the progress is in KB read
+        # of the log since Qt signals carry 32 bit ints
+        repo = self.agent_repo
+        agent_data = repo.get_loaded_agent_data(agent_name)
+        if agent_data is not None:
+            callback(agent_data)
+            return
+        self.submit(self.get_agent_key(agent_name),
+                    lambda progress, cancelled: repo.get_agent_data(agent_name, LoadProgress(
+                        lambda done, total: progress(done >> 10, total >> 10), cancelled)),
+                    callback, owner)
+
+    def cancel(self, key: Optional[Hashable] = None):
+        # without key, all running tasks are cancelled
+        for task_key in [key] if key is not None else list(self.tasks):
+            task = self.tasks.pop(task_key, None)
+            if task:
+                task.cancel_event.set()
+                self.callbacks.pop(task_key, None)
+
+    def get_task(self, key: Hashable) -> Optional[LoaderTask]:
+        return self.tasks.get(key)
+
+    def on_finished(self, task: LoaderTask, result: object):
+        if self.tasks.get(task.key) is not task:
+            return
+        del self.tasks[task.key]
+        for owner, callback in self.callbacks.pop(task.key, []):
+            if owner is None or not sip.isdeleted(owner):
+                callback(result)
+
+    def on_done(self, task: LoaderTask, *_):
+        if self.tasks.get(task.key) is task:
+            del self.tasks[task.key]
+            self.callbacks.pop(task.key, None)
+
+
+class LoadingWidget(QWidget):
+    # progress of a single task, hidden while nothing is loading
+    def __init__(self, loader: BackgroundLoader):
+        super(LoadingWidget, self).__init__()
+        self.loader = loader
+        self.task: Optional[LoaderTask] = None
+        QHBoxLayout(self)
+        self.label = QLabel()
+        self.progress_bar = QProgressBar()
+        cancel_button = QPushButton("Cancel")
+        cancel_button.clicked.connect(self.cancel)
+        self.layout().addWidget(self.label)
+        self.layout().addWidget(self.progress_bar)
+        self.layout().addWidget(cancel_button)
+        self.loader.progress.connect(self.on_progress)
+        self.loader.finished.connect(self.on_done)
+        self.loader.failed.connect(self.on_failed)
+        self.loader.cancelled.connect(self.on_done)
+        self.hide()
+
+    def start(self, key: Hashable, text: str):
+        # nothing to show if the result was already available
+        self.task = self.loader.get_task(key)
+        if self.task is None:
+            return
+        self.label.setText(text)
+        self.progress_bar.setRange(0, 0)  # busy indicator until progress is reported
+        self.show()
+
+    def cancel(self):
+        if self.task is not None:
+            self.loader.cancel(self.task.key)
+
+    def on_progress(self, task: LoaderTask, done: int, total: int):
+        if task is self.task:
+            self.progress_bar.setRange(0, total)
+            self.progress_bar.setValue(done)
+
+    def on_failed(self, task: LoaderTask, message: str):
+        if task is self.task:
+            self.task = None
+            self.label.setText(f"Loading failed: {message}")
+            self.progress_bar.setRange(0, 1)
+            self.progress_bar.setValue(0)
+
+    def on_done(self, task: LoaderTask, *_):
+        if task is self.task:
+            self.task = None
+            self.hide()
+
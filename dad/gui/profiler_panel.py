@@ -0,0 +1,50 @@
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QWidget, QHBoxLayout, QLabel, QPushButton, QFileDialog
+
+from profiler import Profiler
+
+
+class ProfilerPanel(QWidget):
+    # status bar summary of the profiler: the slowest phases, counters and peak memory
+    refresh_interval_ms = 1000
+    shown_phases = 3
+
+    def __init__(self, profiler: Profiler):
+        super(ProfilerPanel, self).__init__()
+        self.profiler = profiler
+        QHBoxLayout(self)
+        self.layout().setContentsMargins(0, 0, 0, 0)
+        self.label = QLabel()
+        export_button = QPushButton("Export profile")
+        export_button.clicked.connect(self.export)
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        self.layout().addWidget(self.label)
+        self.layout().addWidget(export_button)
+        self.layout().addWidget(reset_button)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(ProfilerPanel.refresh_interval_ms)
+        self.refresh()
+
+    def refresh(self):
+        snapshot = self.profiler.snapshot()
+        phases = sorted(snapshot["phases"].items(), key=lambda item: item[1]["seconds"], reverse=True)
+        counters = snapshot["counters"]
+        parts = [f"{name} {phase['seconds']:.2f}s" for name, phase in phases[:ProfilerPanel.shown_phases]]
+        parts.append(f"cycles {counters.get('cycles_parsed', 0)}")
+        parts.append(f"cache {counters.get('cache.hits', 0)}/{counters.get('cache.misses', 0)} hit/miss")
+        parts.append(f"peak {max(snapshot['peak_rss_mb'], snapshot['peak_rss_children_mb']):.0f} MB")
+        self.label.setText(" | ".join(parts))
+        self.label.setToolTip("\n".join(f"{name}: {phase['calls']} calls, {phase['seconds']:.3f}s"
+                                        for name, phase in phases)
+                              + "\n\n" + "\n".join(f"{name}: {n}" for name, n in sorted(counters.items())))
+
+    def export(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export profile", "profile.json", "JSON (*.json)")
+        if path:
+            self.profiler.export(path)
+
+    def reset(self):
+        self.profiler.reset()
+        self.refresh()
@@ -0,0 +1,210 @@
+import sys
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any, Callable, Iterable, Optional
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+from model.bdi import BDIEvent, IntendedMeans
+from profiler import profiler
+
+
+class Column:
+    __slots__ = ("header", "value", "sort_key")
+
+    def __init__(self, header: str, value: Callable[[Any], Any], sort_key: Optional[Callable[[Any], Any]] = None):
+        self.header = header
+        self.value = value
+        self.sort_key = sort_key or value
+
+
+class PagedRows(Sequence):
+    # rows of a table that is not kept loaded (the SQLite storage): only their ids are kept, the objects of a page of
+    # rows are fetched when one of them is asked for and the last pages stay loaded
+    page_size = 256
+    cached_pages = 8
+
+    def __init__(self, fetch: Callable[[array], list]):
+        self.fetch = fetch  # the objects of the ids, in the same order
+        self.ids = array("q")
+        self.pages: OrderedDict[int, list] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, row: int):
+        page_number, position = divmod(row, PagedRows.page_size)
+        page = self.pages.get(page_number)
+        if page is None:
+            first = page_number * PagedRows.page_size
+            page = self.pages[page_number] = self.fetch(self.ids[first:first + PagedRows.page_size])
+            if len(self.pages) > PagedRows.cached_pages:
+                self.pages.popitem(last=False)
+        else:
+            self.pages.move_to_end(page_number)
+        return page[position]
+
+    def extend(self, ids: Iterable[int]):
+        if self.pages and len(self.ids) % PagedRows.page_size:  # the last page gets more rows
+            self.pages.pop(len(self.ids) // PagedRows.page_size, None)
+        self.ids.extend(ids)
+
+
+class LazyTableModel(QAbstractTableModel):
+    # cells are computed from the row objects when the view asks for them, no item per cell
+    # sorting and filtering only permute an array of row positions, the rows themselves are not copied
+    # the rows are a list of objects or PagedRows, which are given ids instead of objects
+    def __init__(self, columns: list[Column]):
+        super(LazyTableModel, self).__init__()
+        self.columns = columns
+        self.rows: list = []
+        self.order: Optional[array] = None  # visible row positions, None while unsorted and unfiltered
+        self.sort_column = -1
+        self.sort_order = Qt.SortOrder.AscendingOrder
+        self.filter_text = ""
+
+    def set_rows(self, rows: Iterable):
+        self.beginResetModel()
+        self.rows = rows if isinstance(rows, PagedRows) else list(rows)
+        self.order = self.compute_order()
+        self.endResetModel()
+
+    def append_rows(self, rows: Iterable):
+        # objects, or ids for PagedRows
+        new_rows = list(rows)
+        if not new_rows:
+            return
+        if self.order is not None:  # new rows may land anywhere
+            self.layoutAboutToBeChanged.emit()
+            self.rows.extend(new_rows)
+            self.order = self.compute_order()
+            self.layoutChanged.emit()
+            return
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(new_rows) - 1)
+        self.rows.extend(new_rows)
+        self.endInsertRows()
+
+    def clear(self):
+        self.set_rows([])
+
+    def columns_changed(self, first: int, last: int):
+        # values of these columns changed in any of the rows, the view only asks again for the cells it shows
+        if self.rowCount() > 0:
+            self.dataChanged.emit(self.index(0, first), self.index(self.rowCount() - 1, last),
+                                  [Qt.ItemDataRole.DisplayRole])
+
+    def row_object(self, row: int):
+        return self.rows[row if self.order is None else self.order[row]]
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.rows) if self.order is None else len(self.order)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        return LazyTableModel.display(self.columns[index.column()].value(self.row_object(index.row())))
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.columns[section].header if section < len(self.columns) else None
+        return str(section + 1)
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder):
+        self.sort_column = column
+        self.sort_order = order
+        self.layoutAboutToBeChanged.emit()
+        self.order = self.compute_order()
+        self.layoutChanged.emit()
+
+    def set_filter(self, text: str):
+        # keeps rows containing the text in any column (case insensitive)
+        self.beginResetModel()
+        self.filter_text = text.lower()
+        self.order = self.compute_order()
+        self.endResetModel()
+
+    def compute_order(self) -> Optional[array]:
+        if self.sort_column < 0 and not self.filter_text:
+            return None
+        with profiler.phase("gui.table_order"):
+            return self.sort_and_filter()
+
+    def sort_and_filter(self) -> array:
+        positions = range(len(self.rows)) if not self.filter_text else \
+            [i for i, row in enumerate(self.rows) if self.matches(row)]
+        if 0 <= self.sort_column < len(self.columns):
+            sort_key = self.columns[self.sort_column].sort_key
+            rows = self.rows
+            positions = sorted(positions, key=lambda i: sort_key(rows[i]),
+                               reverse=self.sort_order == Qt.SortOrder.DescendingOrder)
+        return array("q", positions)
+
+    def matches(self, row) -> bool:
+        return any(self.filter_text in LazyTableModel.display(column.value(row)).lower() for column in self.columns)
+
+    @staticmethod
+    def display(value) -> str:
+        return "" if value is None else str(value)
+
+
+def event_added(im: IntendedMeans) -> int:
+    return im.event.cycle_added if im.event else -1
+
+
+def im_ended(im: IntendedMeans) -> Optional[int]:
+    return None if im.end == sys.maxsize else im.end
+
+
+def create_goal_model() -> LazyTableModel:
+    # rows are intended means, the last columns change when a followed log closes them (see GOAL_END_COLUMNS)
+    return LazyTableModel([
+        Column("#", lambda im: im.id),
+        Column("Trigger", lambda im: im.trigger),
+        Column("Context", lambda im: im.context),
+        Column("Posted", lambda im: im.get_event_added(), event_added),
+        Column("Selected", lambda im: im.start),
+        Column("Ended", im_ended, lambda im: im.end),
+        Column("Result", lambda im: im.res)
+    ])
+
+
+GOAL_END_COLUMNS = (5, 6)
+
+
+def create_plan_model() -> LazyTableModel:
+    # rows are plans
+    return LazyTableModel([
+        Column("Label", lambda plan: plan.label),
+        Column("Trigger", lambda plan: plan.trigger),
+        Column("Context", lambda plan: plan.context),
+        Column("Body", lambda plan: plan.body),
+        Column("Times used", lambda plan: plan.used)
+    ])
+
+
+def create_event_model() -> LazyTableModel:
+    # rows are events
+    return LazyTableModel([
+        Column("#", lambda event: event.id),
+        Column("Trigger", lambda event: event.name),
+        Column("Posted", lambda event: event.cycle_added),
+        Column("Selected", lambda event: event.cycle_selected),
+        Column("Posted by", lambda event: event.parent.id if event.parent else None, event_parent)
+    ])
+
+
+def event_parent(event: BDIEvent) -> int:
+    return event.parent.id if event.parent else -1
+
+
+def create_cycle_model() -> LazyTableModel:
+    # rows are cycle numbers
+    return LazyTableModel([Column("Cycle", lambda cycle: cycle)])
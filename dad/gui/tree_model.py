@@ -0,0 +1,167 @@
+from array import array
+from typing import Union
+
+from PyQt6.QtCore import Qt, QAbstractItemModel, QModelIndex
+from PyQt6.QtGui import QColor
+
+from debug.navigation_strategy import JasonDebuggingTree
+from model.bdi import Instruction
+from profiler import profiler
+
+
+class InstructionItem:
+    # an instruction of a plan shown below its debugging tree node
+    __slots__ = ("node", "instruction", "row")
+
+    def __init__(self, node: int, instruction: Instruction, row: int):
+        self.node = node
+        self.instruction = instruction
+        self.row = row
+
+
+TreeItem = Union[int, InstructionItem]
+
+
+class DebuggingTreeModel(QAbstractItemModel):
+    # children are handed to the view in batches, only when a node is expanded (canFetchMore/fetchMore)
+    batch_size = 200
+
+    def __init__(self, tree: JasonDebuggingTree):
+        super(DebuggingTreeModel, self).__init__()
+        self.tree = tree
+        self.fetched: dict[int, array] = {}  # children known to the view
+        self.refs: dict[int, int] = {}  # QModelIndex does not own its pointer, the node ints are kept alive here
+        self.instructions: dict[int, list[InstructionItem]] = {}
+        self.colors: dict[TreeItem, QColor] = {}
+
+    def ref(self, node: int) -> int:
+        return self.refs.setdefault(node, node)
+
+    def get_child_count(self, node: int) -> int:
+        items = self.instructions.get(node)
+        return len(items) if items is not None else self.tree.child_count[node]
+
+    def get_fetched_count(self, node: int) -> int:
+        items = self.instructions.get(node)
+        if items is not None:
+            return len(items)
+        fetched = self.fetched.get(node)
+        return len(fetched) if fetched is not None else 0
+
+    def get_row(self, item: TreeItem) -> int:
+        return item.row if isinstance(item, InstructionItem) else self.tree.row[item]
+
+    def get_parent(self, item: TreeItem):
+        return item.node if isinstance(item, InstructionItem) else self.tree.get_parent(item)
+
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, self.ref(0))
+        node = parent.internalPointer()
+        items = self.instructions.get(node)
+        if items is not None:
+            return self.createIndex(row, column, items[row])
+        return self.createIndex(row, column, self.ref(self.fetched[node][row]))
+
+    def parent(self, index: QModelIndex = QModelIndex()) -> QModelIndex:
+        if not index.isValid():
+            return QModelIndex()
+        parent = self.get_parent(index.internalPointer())
+        if parent is None:
+            return QModelIndex()
+        return self.createIndex(self.get_row(parent), 0, self.ref(parent))
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if not parent.isValid():
+            return 1
+        item = parent.internalPointer()
+        if isinstance(item, InstructionItem):
+            return 0
+        return self.get_fetched_count(item)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 1
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        if not parent.isValid():
+            return True
+        item = parent.internalPointer()
+        return not isinstance(item, InstructionItem) and self.get_child_count(item) > 0
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        if not parent.isValid():
+            return False
+        item = parent.internalPointer()
+        return not isinstance(item, InstructionItem) and self.get_fetched_count(item) < self.get_child_count(item)
+
+    def fetchMore(self, parent: QModelIndex):
+        node = parent.internalPointer()
+        self.fetch(node, parent, self.get_fetched_count(node) + DebuggingTreeModel.batch_size)
+
+    def fetch(self, node: int, parent: QModelIndex, count: int):
+        # makes the first count children of the node known to the view
+        start = self.get_fetched_count(node)
+        end = min(count, self.get_child_count(node))
+        if end <= start or node in self.instructions:
+            return
+        fetched = self.fetched.setdefault(node, array("q"))
+        child = self.tree.first_child[node] if not fetched else self.tree.next_sibling[fetched[-1]]
+        self.beginInsertRows(parent, start, end - 1)
+        for _ in range(start, end):
+            fetched.append(child)
+            child = self.tree.next_sibling[child]
+        self.endInsertRows()
+        profiler.count("gui.tree_rows_fetched", end - start)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        item = index.internalPointer()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return str(item.instruction) if isinstance(item, InstructionItem) else self.tree.get_label(item)
+        if role == Qt.ItemDataRole.BackgroundRole:
+            return self.colors.get(item)
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole and section == 0:
+            return "Debugging Tree"
+        return None
+
+    def get_index(self, item: TreeItem) -> QModelIndex:
+        # fetches the path from the root to the item, so that the view can show it
+        path = []
+        while item is not None:
+            path.append(item)
+            item = self.get_parent(item)
+        index = self.index(0, 0)
+        for parent, child in zip(reversed(path), reversed(path[:-1])):
+            row = self.get_row(child)
+            if self.get_fetched_count(parent) <= row:
+                self.fetch(parent, index, row + 1)
+            index = self.index(row, 0, index)
+        return index
+
+    def set_color(self, item: TreeItem, color: QColor):
+        self.colors[item] = color
+        index = self.get_index(item)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.BackgroundRole])
+
+    def set_instructions(self, node: int, instructions: list[Instruction]) -> list[InstructionItem]:
+        # replaces the children of the node with the instructions of its plan
+        parent = self.get_index(node)
+        fetched = self.get_fetched_count(node)
+        if fetched:
+            self.beginRemoveRows(parent, 0, fetched - 1)
+            self.fetched.pop(node, None)
+            self.instructions.pop(node, None)
+            self.endRemoveRows()
+        if instructions:
+            self.beginInsertRows(parent, 0, len(instructions) - 1)
+        items = self.instructions[node] = [InstructionItem(node, instruction, row)
+                                           for row, instruction in enumerate(instructions)]
+        if instructions:
+            self.endInsertRows()
+        return items
@@ -1,10 +1,25 @@
 from dataclasses import dataclass
+from typing import Optional, Callable
 
+import os
 import sys
-import json
-from functools import cache
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
 
 from model.bdi import BeliefChange, Plan, Intention, BDIEvent, IntendedMeans, Instruction, EventType, FailureReason
+from model.index import BeliefIndex, BeliefTimeline, IntervalIndex, ChangeLog
+from model.cache import load_agent_data, save_agent_data, is_cache_valid, dumps, loads
+from model.cache import get_cache_key as get_parse_cache_key
+from model.log_file import find_log_path, is_compressed
+from model.log_index import LogIndex
+from model.log_parser import LogHandler, parse_log
+from model.search import SearchIndex, SearchResult
+from model.storage import SqliteStore, StoredTable, StoredBeliefs, StoredBeliefIndex, StoredIntervalIndex, \
+    StoredBeliefTimeline, StoredChangeLog, ingest_agent_log
+from model.data_cache import DataCache
+from model.util import paused_gc, LoadProgress
+from profiler import profiler
 
 
 class AgentData:
@@ -14,9 +29,170 @@ class AgentData:
         self.plans: dict[str, Plan] = {}
         self.events: dict[int, BDIEvent] = {}
         self.beliefs: list[BeliefChange] = []
+        # the indexes are built when first asked for (see AgentRepository.get_indexed_data)
+        self.belief_index: Optional[BeliefIndex] = None
+        self.intention_index: Optional[IntervalIndex] = None
+        self.im_index: Optional[IntervalIndex] = None
+        self.search_index: Optional[SearchIndex] = None
+        self.belief_timeline: Optional[BeliefTimeline] = None  # built when first asked for
+        self.changes = ChangeLog()
+        # parse state, needed to continue reading a log that is still being written
+        self.log_offset = 0
+        self.active_actions: dict[int, Instruction] = {}  # intention ID to Instruction
+        self.instruction_count = 0
+
+    def estimate_size(self) -> int:
+        # rough number of bytes, based on object counts (strings are mostly interned and shared)
+        return 600 * len(self.intended_means) + 300 * len(self.intentions) + 250 * len(self.events) \
+            + 200 * len(self.beliefs) + 250 * self.instruction_count
+
+    def get_counts(self) -> dict[str, int]:
+        return {"intentions": len(self.intentions), "intended_means": len(self.intended_means),
+                "events": len(self.events), "belief_changes": len(self.beliefs),
+                "instructions": self.instruction_count}
+
+    def get_failed_intentions(self) -> list[Intention]:
+        # the intentions in which a goal failed or found no applicable plan
+        return [intention for intention in self.intentions.values()
+                if any(im.res in ("failed", "np") for im in intention.means)]
+
+    def get_plan_ims(self, plan_label: str) -> list[IntendedMeans]:
+        return [im for im in self.intended_means.values() if im.plan.label == plan_label]
+
+
+class StoredAgentData(AgentData):
+    # AgentData kept in a SqliteStore ("storage": "sqlite"): the tables, indexes and change log query the database
+    # and objects are loaded when used, so memory stays bounded for long logs, there is no search index
+    def __init__(self, store: SqliteStore):
+        super(StoredAgentData, self).__init__()
+        self.store = store
+        self.plans = store.plans
+        self.intentions = StoredTable(store, "intention", "intentions")
+        self.intended_means = StoredTable(store, "im", "intended_means")
+        self.events = StoredTable(store, "event", "events")
+        self.beliefs = StoredBeliefs(store)
+        self.belief_index = StoredBeliefIndex(store)
+        self.intention_index = StoredIntervalIndex(store, "intention")
+        self.im_index = StoredIntervalIndex(store, "im")
+        self.belief_timeline = StoredBeliefTimeline(store)
+        self.changes = StoredChangeLog(store)
+        self.log_offset = store.log_offset
+
+    def ingest(self, load_progress: Optional[LoadProgress] = None) -> int:
+        cycles_read = self.store.ingest(load_progress)
+        self.log_offset = self.store.log_offset
+        return cycles_read
+
+    def estimate_size(self) -> int:
+        # the objects the store keeps loaded, not the database
+        return 600 * self.store.objects.budget + 1000 * len(self.plans)
+
+    def get_counts(self) -> dict[str, int]:
+        counts = self.store.counts
+        return {"intentions": counts["intentions"], "intended_means": counts["intended_means"],
+                "events": counts["events"], "belief_changes": counts["beliefs"],
+                "instructions": counts["instructions"]}
+
+    def get_failed_intentions(self) -> list[Intention]:
+        return self.store.load_failed_intentions()
+
+    def get_plan_ims(self, plan_label: str) -> list[IntendedMeans]:
+        return self.store.load_ims("plan = ?", (plan_label,))
 
 
 @dataclass
+class AgentDataBuilder(LogHandler):
+    # links what parse_log reads into the objects of AgentData
+    def __init__(self, data: AgentData):
+        self.data = data
+        self.intern = sys.intern  # file names, triggers, plan bodies and beliefs repeat a lot, keep one object per value
+
+    def add_plans(self, plans: dict[str, dict]):
+        intern = self.intern
+        for label, pd in plans.items():
+            label = intern(label)
+            self.data.plans[label] = Plan(label, intern(pd["trigger"]), intern(pd.get("ctx", "T")), pd["body"],
+                                          intern(pd["file"]), pd["line"])
+
+    def add_intention(self, intention_id: int, nr: int):
+        intention = Intention(intention_id, nr, sys.maxsize, [], [])
+        self.data.intentions[intention_id] = intention
+        self.data.changes.intention_changed(intention, nr)
+
+    def add_im(self, im_data: dict, nr: int):
+        data, intern = self.data, self.intern
+        intention = data.intentions[im_data["i"]]
+        im = IntendedMeans(im_data["id"], intention, nr, sys.maxsize, "?", None, intern(im_data["file"]),
+                           im_data["line"], [], data.plans[im_data["plan"]], intern(im_data["trigger"]),
+                           intern(im_data.get("ctx", "T")), [], None, None)
+        intention.means.append(im)
+        im.plan.used += 1
+        data.intended_means[im_data["id"]] = im
+        data.changes.im_started(im)
+
+    def get_event_parent(self, event_id: int) -> Optional[int]:
+        return self.data.events[event_id].parent.id
+
+    def add_event(self, event_data: dict, event_type: EventType, parent_im_id: Optional[int], nr: int):
+        data = self.data
+        event = BDIEvent(event_data["id"], None, self.intern(event_data["t"]), event_type, nr, -1)
+        if parent_im_id is not None:
+            event.parent = data.intended_means[parent_im_id]
+            event.parent.intention.events.append(event)
+        data.events[event.id] = event
+
+    def end_action(self, intention_id: int, nr: int):
+        self.data.active_actions.pop(intention_id).end = nr
+
+    def add_instruction(self, instr_data: dict, unifier: Optional[str], action: bool, nr: int):
+        data, intern = self.data, self.intern
+        im = data.intended_means[instr_data["im"]]
+        instruction = Instruction(intern(instr_data["file"]), instr_data["line"], intern(instr_data["instr"]), nr,
+                                  intern(instr_data["type"]))
+        if "res" in instr_data:
+            instruction.result = intern(instr_data["res"])
+        if unifier is not None:
+            instruction.unifier = intern(unifier)
+        im.instructions.append(instruction)
+        data.instruction_count += 1
+        if action:
+            data.active_actions[im.intention.id] = instruction
+
+    def end_im(self, im_data: dict, nr: int):
+        im = self.data.intended_means[im_data["id"]]
+        im.end = nr
+        im.res = self.intern(im_data["res"])
+        self.data.changes.im_ended(im)
+        if "reason" in im_data:
+            im.failure_reason = FailureReason.from_jason_dict(im_data["reason"])
+
+    def end_intention(self, intention_id: int, nr: int):
+        intention = self.data.intentions[intention_id]
+        intention.end = nr
+        self.data.changes.intention_changed(intention, nr)
+
+    def select_event(self, event_id: int, intention_id: Optional[int], im_ids: list[int], nr: int):
+        data = self.data
+        event = data.events[event_id]
+        event.cycle_selected = nr
+        if event.type != EventType.SUB_GOAL and intention_id is not None:  # new intention if applicable plan for event
+            data.intentions[intention_id].events.append(event)
+        for im_id in im_ids:
+            im = data.intended_means[im_id]
+            im.event = event
+            if event.parent:
+                im.parent = event.parent
+                event.parent.children.append(im)
+
+    def change_belief(self, nr: int, added: bool, belief: str):
+        change = BeliefChange(nr, added, self.intern(belief))
+        self.data.beliefs.append(change)
+        self.data.changes.belief_changed(change)
+
+    def line_read(self, log_offset: int, nr: Optional[int]):
+        self.data.log_offset = log_offset
+
+
 class AgentState:  # TODO: use in function
     cycle: int
     beliefs: list[str]
@@ -34,29 +210,21 @@ class AgentStateDiff:
 class AgentRepository:
     def __init__(self, config):
         self.config = config
+        self.cache: DataCache[AgentData] = DataCache(self.get_cache_budget())
+        self.log_indexes: dict[tuple, LogIndex] = {}
+        # the cache, the log indexes and the agent locks are only locked briefly, so that the GUI thread does not wait
+        # for loads in the worker threads, the data of an agent has a lock of its own (see get_agent_lock)
+        self.lock = threading.RLock()
+        self.agent_locks: dict[tuple, threading.RLock] = {}
 
-    # TODO later: improve with caching
     def get_agent_state(self, agent_name, cycle) -> dict:
-        agent_data = self.get_agent_data(agent_name)
-
-        beliefs = set()
-        for belief_change in agent_data.beliefs:
-            if belief_change.cycle > cycle:
-                break
-            if belief_change.added:
-                beliefs.add(belief_change.belief)
-            else:
-                beliefs.remove(belief_change.belief)
+        with self.get_agent_lock(self.get_cache_key(agent_name)), profiler.phase("agent_state"):
+            agent_data = self.get_indexed_data(agent_name)
 
-        imeans_active = []
-        for im_id, im in agent_data.intended_means.items():
-            if im.start <= cycle <= im.end:
-                imeans_active.append(im_id)
+            beliefs = agent_data.belief_index.beliefs_at(cycle)
 
-        intentions_active = []
-        for intention in agent_data.intentions.values():
-            if intention.start <= cycle <= intention.end:
-                intentions_active.append(intention)
+            imeans_active = [im.id for im in agent_data.im_index.active_at(cycle)]
+            intentions_active = agent_data.intention_index.active_at(cycle)
 
         state = {  # TODO use agentState object
             "beliefs": list(beliefs),
@@ -67,125 +235,328 @@ class AgentRepository:
 
     def get_diff(self, agent_name: str, cycle1: int, cycle2: int) -> AgentStateDiff:
         agent_data = self.get_agent_data(agent_name)
-        state1 = self.get_agent_state(agent_name, cycle1)
-        state2 = self.get_agent_state(agent_name, cycle2)
-        beliefs_added = set(state2["beliefs"]) - set(state1["beliefs"])
-        beliefs_removed = set(state1["beliefs"]) - set(state2["beliefs"])
+        backwards = cycle1 > cycle2
+        if backwards:
+            cycle1, cycle2 = cycle2, cycle1
 
+        belief_delta = {}  # belief -> (added in first change, added in last change)
         goals_started = []
         goals_finished = []
-        for im_id, im in agent_data.intended_means.items():
-            if im.start >= cycle1:
-                goals_started.append(im)
-            if im.end <= cycle2:
-                goals_finished.append(im)
+        with self.get_agent_lock(self.get_cache_key(agent_name)), profiler.phase("diff"):
+            for bucket in agent_data.changes.between(cycle1, cycle2):
+                for change in bucket.beliefs:
+                    first = belief_delta[change.belief][0] if change.belief in belief_delta else change.added
+                    belief_delta[change.belief] = (first, change.added)
+                goals_started.extend(bucket.ims_started)
+                goals_finished.extend(bucket.ims_ended)
+        beliefs_added = [b for b, (first, last) in belief_delta.items() if first and last]
+        beliefs_removed = [b for b, (first, last) in belief_delta.items() if not first and not last]
+
+        if backwards:
+            return AgentStateDiff(beliefs_removed, beliefs_added, goals_finished, goals_started)
+        return AgentStateDiff(beliefs_added, beliefs_removed, goals_started, goals_finished)
+
+    def get_intention_changes(self, agent_name: str, cycle1: int, cycle2: int) \
+            -> tuple[list[Intention], list[IntendedMeans]]:
+        # the intentions and IMs that started or ended in the cycles from cycle1 to cycle2 (both included, in
+        # either order)
+        agent_data = self.get_agent_data(agent_name)
+        with self.get_agent_lock(self.get_cache_key(agent_name)), profiler.phase("diff"):
+            buckets = agent_data.changes.between(min(cycle1, cycle2) - 1, max(cycle1, cycle2))
+            intentions = [intention for bucket in buckets for intention in bucket.intentions]
+            ims = [im for bucket in buckets for changed in (bucket.ims_started, bucket.ims_ended) for im in changed]
+        return intentions, ims
 
-        return AgentStateDiff(list(beliefs_added), list(beliefs_removed), goals_started, goals_finished)
+    def search(self, agent_name: str, query: str) -> SearchResult:
+        # see SearchIndex.search for the query syntax, raises ValueError for malformed queries
+        agent_data = self.get_agent_data(agent_name)
+        if isinstance(agent_data, StoredAgentData):
+            raise ValueError("search is not available with the sqlite storage")
+        with self.get_agent_lock(self.get_cache_key(agent_name)), paused_gc():
+            if agent_data.search_index is None:
+                with profiler.phase("search_index"):
+                    agent_data.search_index = SearchIndex(agent_data.intended_means, agent_data.events,
+                                                          agent_data.beliefs)
+            with profiler.phase("search"):
+                return agent_data.search_index.search(query)
+
+    def get_belief_timeline(self, agent_name: str) -> BeliefTimeline:
+        # when each belief was true, see BeliefTimeline for point and range queries
+        agent_data = self.get_agent_data(agent_name)
+        with self.get_agent_lock(self.get_cache_key(agent_name)):
+            if agent_data.belief_timeline is None:
+                with paused_gc(), profiler.phase("belief_timeline"):
+                    agent_data.belief_timeline = BeliefTimeline(agent_data.beliefs)
+            return agent_data.belief_timeline
 
     def get_cycle_diff(self, agent: str, cycle: int):
         return self.get_diff(agent, cycle - 1, cycle)
 
-    @cache
-    def get_agent_data(self, agent_name: str) -> AgentData:  # TODO: lists of SI, SE, to display in agent state view
+    def get_agent_data(self, agent_name: str, load_progress: Optional[LoadProgress] = None) -> AgentData:
+        # load_progress: of parsing the log if it is not loaded yet, a cancelled load raises LoadCancelled
+        # TODO: lists of SI, SE, to display in agent state view
+        key = self.get_cache_key(agent_name)
+        log_path = self.get_log_path(agent_name)
+        with self.lock:
+            entry = self.cache.get(key)
+        if entry is not None and entry.identity == AgentRepository.get_file_identity(log_path):
+            profiler.count("cache.hits")
+            return entry.value
+        with self.get_agent_lock(key):  # checked again, another thread may have loaded it meanwhile
+            identity = AgentRepository.get_file_identity(log_path)
+            with self.lock:
+                entry = self.cache.get(key)
+            if entry is not None:
+                if entry.identity == identity:
+                    profiler.count("cache.hits")
+                    return entry.value
+                if AgentRepository.is_appended(log_path, entry.identity, identity):
+                    profiler.count("cache.appended")
+                    self.read_appended(log_path, entry.value)
+                    with self.lock:
+                        self.cache.resize(key, identity, entry.value.estimate_size())
+                    return entry.value
+                with self.lock:
+                    self.cache.invalidate(key)
+            profiler.count("cache.misses")
+            data = self.read_agent_data(agent_name, log_path=log_path, load_progress=load_progress)
+            with self.lock:
+                self.cache.put(key, identity, data, data.estimate_size())
+            return data
+
+    def get_loaded_agent_data(self, agent_name: str) -> Optional[AgentData]:
+        # the data as loaded, without looking at the log, for the GUI thread
+        with self.lock:
+            entry = self.cache.get(self.get_cache_key(agent_name))
+        return None if entry is None else entry.value
+
+    def get_agent_lock(self, key: tuple) -> threading.RLock:
+        # held while the data of the agent is loaded, appended to, indexed or read, a second caller waits for a load
+        # in flight instead of loading the agent again
+        with self.lock:
+            lock = self.agent_locks.get(key)
+            if lock is None:
+                lock = self.agent_locks[key] = threading.RLock()
+            return lock
+
+    def is_agent_loaded(self, agent_name: str) -> bool:
+        with self.lock:
+            return self.get_cache_key(agent_name) in self.cache
+
+    def get_cache_key(self, agent_name: str) -> tuple:
+        return self.config.get("current_folder"), agent_name
+
+    def get_cache_budget(self) -> int:
+        return int(self.config.get("agent_cache_mb") or 2048) * 1024 * 1024
+
+    def get_cache_stats(self) -> dict:
+        return self.cache.stats()
+
+    def invalidate(self, agent_name: Optional[str] = None):
+        # drops cached data of the agent in the current folder, or of all agents
+        key = self.get_cache_key(agent_name) if agent_name else None
+        with self.lock:
+            self.cache.invalidate(key)
+            for index_key in [key] if key else list(self.log_indexes):
+                index = self.log_indexes.pop(index_key, None)
+                if index:
+                    index.close()
+
+    @staticmethod
+    def get_file_identity(log_path: str) -> tuple:
+        stat = os.stat(log_path)
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    @staticmethod
+    def is_appended(log_path: str, old_identity: tuple, new_identity: tuple) -> bool:
+        # same file, grown: data can be read incrementally instead of reloading everything
+        return not is_compressed(log_path) and old_identity[0] == new_identity[0] and old_identity[1] <= new_identity[1]
+
+    def read_agent_data(self, agent_name: str, payload: Optional[bytes] = None, log_path: Optional[str] = None,
+                        load_progress: Optional[LoadProgress] = None) -> AgentData:
+        log_path = log_path or self.get_log_path(agent_name)
+        if self.use_sqlite():
+            # a worker of load_agents may have ingested the log already, then there is nothing left to read
+            with paused_gc(), profiler.phase("sqlite.ingest"):
+                data = StoredAgentData(SqliteStore(log_path, self.get_snapshot_interval(), self.get_cached_objects()))
+                profiler.count("cycles_parsed", data.ingest(load_progress))
+            profiler.count_all(data.get_counts(), "objects.")
+            return data
         data = AgentData()
-        log_path = self.config.get("current_folder") + "/" + agent_name + ".log"
-
-        active_actions = {}  # imID to Instruction
-        with open(log_path, "r") as log_file:
-            info = json.loads(log_file.readline())
-            details = info["details"]
-            for label, pd in details["plans"].items():
-                data.plans[label] = Plan(label, pd["trigger"], pd.get("ctx", "T"), pd["body"], pd["file"], pd["line"])
-
-            for line in log_file.readlines():
-                cycle = json.loads(line)
-                ims_added_this_cycle = []
-                if "I+" in cycle:
-                    intention = Intention(cycle["I+"], cycle["nr"], sys.maxsize, [], [])
-                    data.intentions[cycle["I+"]] = intention
-                if "IM+" in cycle:
-                    for im_data in cycle["IM+"]:
-                        intention = data.intentions[im_data["i"]]
-                        im = IntendedMeans(im_data["id"], intention, cycle["nr"], sys.maxsize, "?", None,
-                                           im_data["file"], im_data["line"], [], data.plans[im_data["plan"]],
-                                           im_data["trigger"], im_data.get("ctx", "T"), [], None, None)
-                        intention.means.append(im)
-                        ims_added_this_cycle.append(im)
-                        im.plan.used += 1
-                        data.intended_means[im_data["id"]] = im
-
-                if "E+" in cycle:
-                    for event_data in cycle["E+"]:
-                        ev_id = event_data["id"]
-                        trigger = event_data["t"]
-                        event = BDIEvent(ev_id, None, trigger, EventType.BELIEF_UPDATE, cycle["nr"], -1)
-                        if event_data["src"] == "B":  # event is belief update
-                            pass
-                        else:
-                            if "nf" in event_data:  # new focus (!!...)
-                                event.type = EventType.GOAL_NEW_FOCUS
-                            else:
-                                event.type = EventType.SUB_GOAL
-                            if "I" in cycle:
-                                parent_im_id = int(cycle["I"]["im"])
-                            else:  # parent is SE because no applicable plan
-                                parent_event_id = cycle["SE"]
-                                parent_event = data.events[parent_event_id]
-                                parent_im_id = parent_event.parent.id
-                            event.parent = data.intended_means[parent_im_id]
-                            event.parent.intention.events.append(event)
-                        data.events[ev_id] = event
-                if "A-" in cycle:  # needs to be handled before A+
-                    for action_intention_id in cycle["A-"]:
-                        instruction = active_actions[action_intention_id]
-                        del active_actions[action_intention_id]
-                        instruction.end = cycle["nr"]
-                if "I" in cycle:
-                    instr_data = cycle["I"]
-                    im = data.intended_means[instr_data["im"]]
-                    instruction = Instruction(instr_data["file"], instr_data["line"], instr_data["instr"], cycle["nr"],
-                                              instr_data["type"])
-                    if "res" in instr_data:
-                        instruction.result = instr_data["res"]
-                    im.instructions.append(instruction)
-                    if "U" in cycle:
-                        instruction.unifier = cycle["U"]
-                    if "A+" in cycle:
-                        active_actions[im.intention.id] = instruction
-                if "IM-" in cycle:
-                    for im_data in cycle["IM-"]:
-                        im_id = im_data["id"]
-                        if im_id == -1:  # IM did not really exist -> no applicable/relevant plan
-                            pass  # TODO selected event SE could not be handled
-                        else:
-                            im = data.intended_means[im_data["id"]]
-                            im.end = cycle["nr"]
-                            im.res = im_data["res"]
-                            if "reason" in im_data:
-                                reason = im_data["reason"]
-                                im.failure_reason = FailureReason.from_jason_dict(reason)
-
-                if "I-" in cycle:
-                    for intention_id in cycle["I-"]:
-                        data.intentions[intention_id].end = cycle["nr"]
-                if "SE" in cycle:  # E+ and IM+ need to be processed before SE
-                    ev_id = cycle["SE"]
-                    event = data.events[ev_id]
-                    event.cycle_selected = cycle["nr"]
-                    if not event.type == EventType.SUB_GOAL:  # i.e. new intention if applicable plan for event
-                        if "I+" in cycle:
-                            intention_id = cycle["I+"]
-                            intention = data.intentions[intention_id]
-                            intention.events.append(event)
-                    for im in ims_added_this_cycle:
-                        im.event = event
-                        if event.parent:
-                            im.parent = event.parent
-                            event.parent.children.append(im)
-                if "B+" in cycle:
-                    for belief in cycle["B+"]:
-                        data.beliefs.append(BeliefChange(cycle["nr"], True, belief))
-                if "B-" in cycle:
-                    for belief in cycle["B-"]:
-                        data.beliefs.append(BeliefChange(cycle["nr"], False, belief))
+        with paused_gc():
+            if payload is not None:
+                with profiler.phase("payload.loads"):
+                    loads(payload, data)
+            else:
+                with profiler.phase("parse_cache.load"):
+                    cached = self.use_parse_cache() and load_agent_data(log_path, data)
+                if not cached:
+                    data = AgentData()
+                    cache_key = get_parse_cache_key(log_path)  # before parsing, the log may grow meanwhile
+                    with profiler.phase("parse"):
+                        profiler.count("cycles_parsed", AgentRepository.parse_log(log_path, data, load_progress))
+                    if self.use_parse_cache():
+                        with profiler.phase("parse_cache.save"):
+                            save_agent_data(log_path, data, cache_key)
+        profiler.count_all(data.get_counts(), "objects.")
         return data
+
+    def use_parse_cache(self) -> bool:
+        return self.config.get("parse_cache") is not False
+
+    def use_sqlite(self) -> bool:
+        return self.config.get("storage") == "sqlite"
+
+    def get_cached_objects(self) -> int:
+        # objects a SqliteStore keeps loaded
+        return int(self.config.get("sqlite_cached_objects") or 200000)
+
+    def load_agents(self, agent_names: list[str], progress: Optional[Callable[[str, int, int], None]] = None,
+                    cancelled: Optional[Callable[[], bool]] = None, workers: Optional[int] = None) \
+            -> dict[str, AgentData]:
+        # parses the logs in a process pool, the linked objects are rebuilt here from the workers' cache payload and
+        # the indexes are left to the first use (see get_indexed_data)
+        with profiler.phase("load_agents"):
+            return self.run_load_agents(agent_names, progress, cancelled, workers)
+
+    def run_load_agents(self, agent_names: list[str], progress: Optional[Callable[[str, int, int], None]],
+                        cancelled: Optional[Callable[[], bool]], workers: Optional[int]) -> dict[str, AgentData]:
+        result = {name: self.get_agent_data(name) for name in agent_names if self.is_agent_loaded(name)}
+        todo = [name for name in agent_names if name not in result]
+        if not todo:
+            return result
+        executor = ProcessPoolExecutor(max_workers=workers)
+        # paths and keys are fixed up front, the current folder may change while loading in the background
+        paths = {name: self.get_log_path(name) for name in todo}
+        keys = {name: self.get_cache_key(name) for name in todo}
+        if self.use_sqlite():
+            pending = {executor.submit(ingest_agent_log, paths[name], self.get_snapshot_interval(), profiler.enabled):
+                       name for name in todo}
+        else:
+            pending = {executor.submit(parse_agent_log, paths[name], self.use_parse_cache(), profiler.enabled): name
+                       for name in todo}
+        identities = {name: AgentRepository.get_file_identity(paths[name]) for name in todo}
+        try:
+            while pending:
+                if cancelled and cancelled():
+                    break
+                done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    payload, snapshot = future.result()
+                    profiler.merge(snapshot)
+                    with self.get_agent_lock(keys[name]):
+                        data = result[name] = self.read_agent_data(name, payload, paths[name])
+                        with self.lock:
+                            self.cache.put(keys[name], identities[name], data, data.estimate_size())
+                    if progress:
+                        progress(name, len(result), len(agent_names))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return result
+
+    def get_log_path(self, agent_name: str) -> str:
+        return find_log_path(self.config.get("current_folder"), agent_name)
+
+    def get_log_index(self, agent_name: str) -> LogIndex:
+        key = self.get_cache_key(agent_name)
+        with self.get_agent_lock(key + ("log_index",)):  # does not wait for the agent's data to load
+            with self.lock:
+                index = self.log_indexes.get(key)
+            if index is None:
+                index = LogIndex.open(self.get_log_path(agent_name))
+                with self.lock:
+                    self.log_indexes[key] = index
+            elif os.path.getsize(index.log_path) > index.end and index.update():
+                index.save()
+            return index
+
+    def get_raw_cycle(self, agent_name: str, cycle: int) -> list[dict]:
+        # decodes only the log lines of the cycle, without parsing the whole log
+        with self.get_agent_lock(self.get_cache_key(agent_name) + ("log_index",)):  # it keeps its gzip reader
+            return self.get_log_index(agent_name).get_cycle(cycle)
+
+    def update_agent_data(self, agent_name: str) -> bool:
+        # reads cycles appended to the log since the last call, returns whether anything was added
+        with self.lock:
+            entry = self.cache.get(self.get_cache_key(agent_name))
+        if entry is None:
+            self.get_agent_data(agent_name)
+            return True
+        log_offset = entry.value.log_offset
+        data = self.get_agent_data(agent_name)
+        return data is not entry.value or data.log_offset != log_offset
+
+    def read_appended(self, log_path: str, data: AgentData):
+        if isinstance(data, StoredAgentData):
+            with paused_gc(), profiler.phase("sqlite.ingest_appended"):
+                profiler.count("cycles_parsed", data.ingest())
+            return
+        with paused_gc(), profiler.phase("parse_appended"):
+            counts_before = data.get_counts() if profiler.enabled else None
+            ims_before = len(data.intended_means)
+            intentions_before = len(data.intentions)
+            cycles_read = AgentRepository.parse_log(log_path, data)
+            profiler.count("cycles_parsed", cycles_read)
+            if cycles_read == 0:
+                return
+            if counts_before is not None:
+                profiler.count_all({name: n - counts_before[name] for name, n in data.get_counts().items()}, "objects.")
+            if data.belief_index is not None:
+                index_before = data.belief_index.stats() if counts_before is not None else None
+                data.belief_index.update()
+                if index_before is not None:
+                    profiler.count_all({name: n - index_before[name] for name, n in data.belief_index.stats().items()},
+                                       "belief_index.")
+                data.intention_index.extend(islice(data.intentions.values(), intentions_before, None))
+                data.im_index.extend(islice(data.intended_means.values(), ims_before, None))
+            if data.search_index is not None:
+                data.search_index.update()
+            if data.belief_timeline is not None:
+                data.belief_timeline.update()
+
+    @staticmethod
+    def parse_log(log_path: str, data: AgentData, load_progress: Optional[LoadProgress] = None) -> int:
+        # parses all complete lines after data.log_offset, returns the number of cycles read
+        return parse_log(log_path, data.log_offset, AgentDataBuilder(data), load_progress)
+
+    def get_indexed_data(self, agent_name: str) -> AgentData:
+        # the agent's data with the indexes of the agent state, built on first use instead of while loading: after
+        # load_agents they would be built here one agent after the other, once the worker processes are done
+        agent_data = self.get_agent_data(agent_name)
+        with self.get_agent_lock(self.get_cache_key(agent_name)):
+            if agent_data.belief_index is None:
+                with paused_gc(), profiler.phase("build_indexes"):
+                    self.build_indexes(agent_data)
+                if profiler.enabled:  # memory of the snapshots, see benchmarks.belief_index for the time it saves
+                    profiler.count_all(agent_data.belief_index.stats(), "belief_index.")
+        return agent_data
+
+    def build_indexes(self, data: AgentData):
+        data.belief_index = BeliefIndex(data.beliefs, self.get_snapshot_interval())
+        data.intention_index = IntervalIndex(data.intentions.values())
+        data.im_index = IntervalIndex(data.intended_means.values())
+
+    def get_snapshot_interval(self) -> int:
+        return int(self.config.get("belief_snapshot_interval") or 0)
+
+
+def parse_agent_log(log_path: str, use_cache: bool, profiling: bool = False) -> tuple[Optional[bytes], Optional[dict]]:
+    # runs in a worker process of AgentRepository.load_agents, the payload is None if a valid cache file can be used
+    # instead, the profiler snapshot of the worker is returned if profiling
+    if use_cache and is_cache_valid(log_path):
+        return None, None
+    profiler.reset()  # a forked worker starts with a copy of the parent's numbers
+    profiler.enabled = profiling
+    profiler.profiled_phases = set()
+    data = AgentData()
+    cache_key = get_parse_cache_key(log_path)
+    with paused_gc():
+        with profiler.phase("parse"):
+            profiler.count("cycles_parsed", AgentRepository.parse_log(log_path, data))
+        if use_cache:
+            with profiler.phase("parse_cache.save"):
+                save_agent_data(log_path, data, cache_key)
+        with profiler.phase("payload.dumps"):
+            payload = dumps(data)
+    return payload, profiler.snapshot() if profiling else None
@@ -9,7 +9,7 @@ class EventType(Enum):
     GOAL_NEW_FOCUS = 3
 
 
-@dataclass
+@dataclass(slots=True)
 class BDIEvent:
     id:             int
     parent:         Optional["IntendedMeans"]
@@ -22,7 +22,7 @@ class BDIEvent:
         return self.type != EventType.BELIEF_UPDATE
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class FailureReason:
     msg: str
     type: str
@@ -34,7 +34,7 @@ class FailureReason:
         return FailureReason(d["error_msg"], f'{d["error"]} / {d["type"]}', d["code_src"], d["code_line"])
 
 
-@dataclass
+@dataclass(slots=True, eq=False)
 class IntendedMeans:
     id:             int
     intention:      "Intention"
@@ -59,7 +59,7 @@ class IntendedMeans:
         return str(self.event.cycle_added) if self.event else ""
 
 
-@dataclass
+@dataclass(slots=True, eq=False)
 class Intention:
     id:     int
     start:  int
@@ -67,15 +67,19 @@ class Intention:
     means:  list[IntendedMeans]
     events: list[BDIEvent]
 
+    def get_root_im(self) -> Optional[IntendedMeans]:
+        # the IM of the goal the intention was created for, None until it has one
+        return self.means[0] if self.means else None
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class BeliefChange:
     cycle:  int
     added:  bool
     belief: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Plan:
     label:      str
     trigger:    str
@@ -90,7 +94,7 @@ class Plan:
         return f"{self.trigger} : {self.context} <-\n{f_body}."
 
 
-@dataclass
+@dataclass(slots=True)
 class Instruction:
     file: str
     line: int
@@ -0,0 +1,155 @@
+import marshal
+import os
+import struct
+import sys
+from typing import Optional
+
+from model.bdi import BeliefChange, Plan, Intention, BDIEvent, IntendedMeans, Instruction, EventType, FailureReason
+
+# objects are flattened to tuples of primitives with ids instead of references (marshal is fast, but
+# version specific, and deep goal chains would exceed the recursion limit of pickle)
+CACHE_VERSION = 2
+CACHE_SUFFIX = ".cache"
+
+
+def get_cache_path(log_path: str) -> str:
+    return log_path + CACHE_SUFFIX
+
+
+def get_cache_key(log_path: str) -> tuple:
+    stat = os.stat(log_path)
+    return CACHE_VERSION, sys.version_info[:2], os.path.abspath(log_path), stat.st_size, stat.st_mtime_ns
+
+
+def save_agent_data(log_path: str, data, key: Optional[tuple] = None) -> bool:
+    # key: get_cache_key of the log taken before parsing it, lines appended while parsing are then read again when
+    # the cache is used instead of being taken as contained in it
+    cache_path = get_cache_path(log_path)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        key = marshal.dumps(key or get_cache_key(log_path))
+        with open(tmp_path, "wb") as cache_file:
+            cache_file.write(struct.pack("<I", len(key)))
+            cache_file.write(key)
+            cache_file.write(dumps(data))
+        os.replace(tmp_path, cache_path)
+        return True
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+
+def load_agent_data(log_path: str, data) -> bool:
+    try:
+        with open(get_cache_path(log_path), "rb") as cache_file:
+            if not read_key_matches(cache_file, log_path):
+                return False
+            payload = marshal.loads(cache_file.read())  # marshal.load on the file object reads in tiny chunks
+    except (OSError, EOFError, ValueError, TypeError, struct.error):
+        return False
+    decode(payload, data)
+    return True
+
+
+def is_cache_valid(log_path: str) -> bool:
+    try:
+        with open(get_cache_path(log_path), "rb") as cache_file:
+            return read_key_matches(cache_file, log_path)
+    except (OSError, EOFError, ValueError, TypeError, struct.error):
+        return False
+
+
+def read_key_matches(cache_file, log_path: str) -> bool:
+    key_length, = struct.unpack("<I", cache_file.read(4))
+    return marshal.loads(cache_file.read(key_length)) == get_cache_key(log_path)
+
+
+def dumps(data) -> bytes:
+    return marshal.dumps(encode(data))
+
+
+def loads(payload: bytes, data):
+    decode(marshal.loads(payload), data)
+
+
+def invalidate(log_path: str):
+    cache_path = get_cache_path(log_path)
+    if os.path.exists(cache_path):
+        os.remove(cache_path)
+
+
+def encode(data) -> tuple:
+    plans = [(p.label, p.trigger, p.context, p.body, p.file, p.line, p.used) for p in data.plans.values()]
+    intentions = [(i.id, i.start, i.end, [e.id for e in i.events]) for i in data.intentions.values()]
+    events = [(e.id, e.parent.id if e.parent else None, e.name, e.type.value, e.cycle_added, e.cycle_selected)
+              for e in data.events.values()]
+    ims = []
+    for im in data.intended_means.values():
+        reason = im.failure_reason
+        ims.append((im.id, im.intention.id, im.start, im.end, im.res,
+                    (reason.msg, reason.type, reason.src, reason.line) if reason else None,
+                    im.file, im.line,
+                    [(x.file, x.line, x.text, x.cycle, x.type, x.end, x.result, x.unifier) for x in im.instructions],
+                    im.plan.label, im.trigger, im.context,
+                    im.parent.id if im.parent else None, im.event.id if im.event else None))
+    beliefs = ([b.cycle for b in data.beliefs], [b.added for b in data.beliefs], [b.belief for b in data.beliefs])
+    active_actions = [(intention_id, *find_instruction(data.intentions[intention_id], instruction))
+                      for intention_id, instruction in data.active_actions.items()]
+    return plans, intentions, events, ims, beliefs, data.log_offset, active_actions
+
+
+def find_instruction(intention, instruction) -> tuple[int, int]:
+    for im in reversed(intention.means):
+        for i, x in enumerate(im.instructions):
+            if x is instruction:
+                return im.id, i
+    raise ValueError(f"Instruction {instruction} not part of intention {intention.id}")
+
+
+def decode(payload: tuple, data):
+    plans, intentions, events, ims, beliefs, log_offset, active_actions = payload
+    for label, trigger, context, body, file, line, used in plans:
+        data.plans[label] = Plan(label, trigger, context, body, file, line, used)
+    for intention_id, start, end, _ in intentions:
+        intention = data.intentions[intention_id] = Intention(intention_id, start, end, [], [])
+        data.changes.intention_changed(intention, start)
+        if end != sys.maxsize:
+            data.changes.intention_changed(intention, end)
+    event_types = {t.value: t for t in EventType}
+    for ev_id, _, name, ev_type, cycle_added, cycle_selected in events:
+        data.events[ev_id] = BDIEvent(ev_id, None, name, event_types[ev_type], cycle_added, cycle_selected)
+
+    for im_id, intention_id, start, end, res, reason, file, line, instructions, plan_label, trigger, context, _, \
+            ev_id in ims:
+        intention = data.intentions[intention_id]
+        im = IntendedMeans(im_id, intention, start, end, res, FailureReason(*reason) if reason else None,
+                           file, line, [Instruction(*x) for x in instructions], data.plans[plan_label],
+                           trigger, context, [], None, data.events[ev_id] if ev_id is not None else None)
+        intention.means.append(im)
+        data.intended_means[im_id] = im
+        data.instruction_count += len(instructions)
+        data.changes.im_started(im)
+        if end != sys.maxsize:
+            data.changes.im_ended(im)
+    for im_data in ims:
+        parent_id = im_data[12]
+        if parent_id is not None:
+            im = data.intended_means[im_data[0]]
+            im.parent = data.intended_means[parent_id]
+            im.parent.children.append(im)
+
+    for ev_id, parent_id, *_ in events:
+        if parent_id is not None:
+            data.events[ev_id].parent = data.intended_means[parent_id]
+    for intention_id, _, _, event_ids in intentions:
+        data.intentions[intention_id].events.extend(data.events[ev_id] for ev_id in event_ids)
+
+    for cycle, added, belief in zip(*beliefs):
+        change = BeliefChange(cycle, added, belief)
+        data.beliefs.append(change)
+        data.changes.belief_changed(change)
+
+    data.log_offset = log_offset
+    for intention_id, im_id, instruction_index in active_actions:
+        data.active_actions[intention_id] = data.intended_means[im_id].instructions[instruction_index]
@@ -0,0 +1,81 @@
+from collections import OrderedDict
+from typing import Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class CacheEntry(Generic[T]):
+    __slots__ = ("identity", "value", "size")
+
+    def __init__(self, identity: tuple, value: T, size: int):
+        self.identity = identity
+        self.value = value
+        self.size = size
+
+
+class DataCache(Generic[T]):
+    # LRU cache bounded by the (estimated) size of its values, the most recently added value is never evicted
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.entries: OrderedDict[tuple, CacheEntry[T]] = OrderedDict()
+        self.total_size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: tuple) -> Optional[CacheEntry[T]]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: tuple, identity: tuple, value: T, size: int):
+        self.remove(key)
+        self.entries[key] = CacheEntry(identity, value, size)
+        self.total_size += size
+        self.evict()
+
+    def resize(self, key: tuple, identity: tuple, size: int):
+        entry = self.entries[key]
+        self.total_size += size - entry.size
+        entry.identity = identity
+        entry.size = size
+        self.evict()
+
+    def evict(self):
+        while self.total_size > self.budget and len(self.entries) > 1:
+            _, entry = self.entries.popitem(last=False)
+            self.total_size -= entry.size
+            self.evictions += 1
+
+    def remove(self, key: tuple) -> bool:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return False
+        self.total_size -= entry.size
+        return True
+
+    def invalidate(self, key: Optional[tuple] = None):
+        # without key, everything is dropped
+        keys = list(self.entries) if key is None else [key]
+        for k in keys:
+            if self.remove(k):
+                self.invalidations += 1
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self.entries
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "size_bytes": self.total_size,
+            "budget_bytes": self.budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
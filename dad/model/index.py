@@ -0,0 +1,345 @@
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from typing import Iterable, Protocol, Union
+
+from model.bdi import BeliefChange, IntendedMeans, Intention
+
+
+class BeliefIndex:
+    min_interval = 64
+
+    def __init__(self, changes: list[BeliefChange], interval: int = 0):
+        # interval: number of belief changes between two snapshots, 0 = adaptive (~ size of the belief base)
+        self.changes = changes
+        self.interval = interval
+        self.snapshot_cycles: list[int] = [-1]
+        self.snapshot_offsets: list[int] = [0]  # index of the first change not contained in the snapshot
+        self.snapshots: list[frozenset[str]] = [frozenset()]
+        self._live: set[str] = set()
+        self._indexed = 0
+        self._since_snapshot = 0
+        self.update()
+
+    def update(self):
+        changes = self.changes
+        live = self._live
+        prev_cycle = changes[self._indexed - 1].cycle if self._indexed else -1
+        for i in range(self._indexed, len(changes)):
+            change = changes[i]
+            if change.cycle != prev_cycle and self._since_snapshot >= self._current_interval():
+                self.snapshot_cycles.append(prev_cycle)
+                self.snapshot_offsets.append(i)
+                self.snapshots.append(frozenset(live))
+                self._since_snapshot = 0
+            if change.added:
+                live.add(change.belief)
+            else:
+                live.discard(change.belief)
+            self._since_snapshot += 1
+            prev_cycle = change.cycle
+        self._indexed = len(changes)
+
+    def _current_interval(self) -> int:
+        if self.interval > 0:
+            return self.interval
+        return max(BeliefIndex.min_interval, len(self._live))
+
+    def beliefs_at(self, cycle: int) -> set[str]:
+        i = bisect_right(self.snapshot_cycles, cycle) - 1
+        beliefs = set(self.snapshots[i])
+        changes = self.changes
+        for j in range(self.snapshot_offsets[i], self._indexed):
+            change = changes[j]
+            if change.cycle > cycle:
+                break
+            if change.added:
+                beliefs.add(change.belief)
+            else:
+                beliefs.discard(change.belief)
+        return beliefs
+
+    def memory_usage(self) -> int:
+        # belief strings are shared with the change list, only count the containers
+        return sum(sys.getsizeof(s) for s in self.snapshots) + sys.getsizeof(self._live) \
+            + sys.getsizeof(self.snapshot_cycles) + sys.getsizeof(self.snapshot_offsets)
+
+    def stats(self) -> dict:
+        return {
+            "changes": self._indexed,
+            "snapshots": len(self.snapshots),
+            "snapshot_entries": sum(len(s) for s in self.snapshots),
+            "memory_bytes": self.memory_usage()
+        }
+
+
+class BeliefTimeline:
+    # validity intervals of every distinct belief, in one pass over the changes (update continues where it stopped)
+    # a belief is true from the cycle it was added in until the cycle before its removal, like in beliefs_at
+    # intervals are kept as two sorted arrays per belief, first and last cycle, last is sys.maxsize while still true
+    def __init__(self, changes: list[BeliefChange]):
+        self.changes = changes
+        self.intervals: dict[str, tuple[array, array]] = {}
+        self._indexed = 0
+        self.update()
+
+    def update(self):
+        intervals = self.intervals
+        still_true = sys.maxsize
+        for change in islice(self.changes, self._indexed, None):
+            cycle = change.cycle
+            entry = intervals.get(change.belief)
+            if change.added:
+                if entry is None:
+                    entry = intervals[change.belief] = (array("q"), array("q"))
+                firsts, lasts = entry
+                if lasts and lasts[-1] == still_true:
+                    continue
+                if lasts and lasts[-1] == cycle - 1:  # removed and added again in the same cycle
+                    lasts[-1] = still_true
+                else:
+                    firsts.append(cycle)
+                    lasts.append(still_true)
+            elif entry is not None and entry[1] and entry[1][-1] == still_true:
+                firsts, lasts = entry
+                if firsts[-1] < cycle:
+                    lasts[-1] = cycle - 1
+                else:  # added and removed in the same cycle, never true at the end of a cycle
+                    firsts.pop()
+                    lasts.pop()
+        self._indexed = len(self.changes)
+
+    def get_intervals(self, belief: str) -> list[tuple[int, int]]:
+        firsts, lasts = self.intervals.get(belief, ((), ()))
+        return list(zip(firsts, lasts))
+
+    def holds_at(self, belief: str, cycle: int) -> bool:
+        entry = self.intervals.get(belief)
+        if entry is None:
+            return False
+        i = bisect_right(entry[0], cycle) - 1
+        return i >= 0 and entry[1][i] >= cycle
+
+    def overlapping(self, belief: str, first: int, last: int) -> list[tuple[int, int]]:
+        # the intervals in which the belief was true at some point of the cycles first..last
+        entry = self.intervals.get(belief)
+        if entry is None:
+            return []
+        firsts, lasts = entry
+        start = bisect_left(lasts, first)
+        end = bisect_right(firsts, last)
+        return list(zip(firsts[start:end], lasts[start:end]))
+
+    def holds_throughout(self, belief: str, first: int, last: int) -> bool:
+        entry = self.intervals.get(belief)
+        if entry is None:
+            return False
+        i = bisect_right(entry[0], first) - 1
+        return i >= 0 and entry[1][i] >= last
+
+    def memory_usage(self) -> int:
+        return sum(sys.getsizeof(firsts) + sys.getsizeof(lasts) for firsts, lasts in self.intervals.values()) \
+            + sys.getsizeof(self.intervals)
+
+
+class Interval(Protocol):
+    id: int
+    start: int
+    end: int
+
+
+class IntervalTree:
+    # static centered interval tree, nodes stored in parallel lists
+    def __init__(self, items: list[Interval]):
+        self.size = len(items)
+        self.centers: list[int] = []
+        self.by_start: list[list[Interval]] = []
+        self.by_end: list[list[Interval]] = []
+        self.left: list[int] = []
+        self.right: list[int] = []
+        if items:
+            self._build(sorted(items, key=lambda x: x.start))
+
+    def _build(self, items: list[Interval]):
+        stack = [(items, -1, False)]
+        while stack:
+            items, parent, is_right = stack.pop()
+            node = len(self.centers)
+            if parent >= 0:
+                (self.right if is_right else self.left)[parent] = node
+            center = items[len(items) // 2].start
+            here, left, right = [], [], []
+            for item in items:  # stays sorted by start
+                if item.end < center:
+                    left.append(item)
+                elif item.start > center:
+                    right.append(item)
+                else:
+                    here.append(item)
+            self.centers.append(center)
+            self.by_start.append(here)
+            self.by_end.append(sorted(here, key=lambda x: x.end, reverse=True))
+            self.left.append(-1)
+            self.right.append(-1)
+            if left:
+                stack.append((left, node, False))
+            if right:
+                stack.append((right, node, True))
+
+    def items(self) -> list[Interval]:
+        return [item for items in self.by_start for item in items]
+
+    def active_at(self, cycle: int, result: list[Interval]):
+        node = 0 if self.centers else -1
+        while node >= 0:
+            center = self.centers[node]
+            if cycle < center:
+                for item in self.by_start[node]:
+                    if item.start > cycle:
+                        break
+                    result.append(item)
+                node = self.left[node]
+            elif cycle > center:
+                for item in self.by_end[node]:
+                    if item.end < cycle:
+                        break
+                    result.append(item)
+                node = self.right[node]
+            else:
+                result.extend(self.by_start[node])
+                break
+
+    def overlapping(self, start: int, end: int, result: list[Interval]):
+        stack = [0] if self.centers else []
+        while stack:
+            node = stack.pop()
+            center = self.centers[node]
+            if end < center:
+                for item in self.by_start[node]:
+                    if item.start > end:
+                        break
+                    result.append(item)
+                if self.left[node] >= 0:
+                    stack.append(self.left[node])
+            elif start > center:
+                for item in self.by_end[node]:
+                    if item.end < start:
+                        break
+                    result.append(item)
+                if self.right[node] >= 0:
+                    stack.append(self.right[node])
+            else:
+                result.extend(self.by_start[node])
+                if self.left[node] >= 0:
+                    stack.append(self.left[node])
+                if self.right[node] >= 0:
+                    stack.append(self.right[node])
+
+
+class IntervalIndex:
+    # closed intervals live in static trees of decreasing size (logarithmic method, so growing logs can be
+    # extended cheaply), open intervals (end == sys.maxsize) are kept apart until they are closed
+    buffer_size = 64
+
+    def __init__(self, items: Iterable[Interval]):
+        self.trees: list[IntervalTree] = []
+        self.buffer: list[Interval] = []
+        self.open: list[Interval] = []
+        self.extend(items)
+
+    def extend(self, items: Iterable[Interval]):
+        still_open = []
+        for item in self.open:
+            (still_open if item.end == sys.maxsize else self.buffer).append(item)
+        self.open = still_open
+        for item in items:
+            (self.open if item.end == sys.maxsize else self.buffer).append(item)
+        self.open.sort(key=lambda x: x.start)
+        if len(self.buffer) >= IntervalIndex.buffer_size:
+            items = self.buffer
+            self.buffer = []
+            while self.trees and self.trees[-1].size <= len(items):
+                items = self.trees.pop().items() + items
+            self.trees.append(IntervalTree(items))
+
+    def active_at(self, cycle: int) -> list[Interval]:
+        result = [item for item in self.buffer if item.start <= cycle <= item.end]
+        for tree in self.trees:
+            tree.active_at(cycle, result)
+        for item in self.open:
+            if item.start > cycle:
+                break
+            result.append(item)
+        result.sort(key=lambda x: x.id)
+        return result
+
+    def overlapping(self, start: int, end: int) -> list[Interval]:
+        result = [item for item in self.buffer if item.start <= end and item.end >= start]
+        for tree in self.trees:
+            tree.overlapping(start, end, result)
+        for item in self.open:
+            if item.start > end:
+                break
+            result.append(item)
+        result.sort(key=lambda x: x.id)
+        return result
+
+
+class CycleChanges:
+    __slots__ = ("cycle", "beliefs", "ims_started", "ims_ended", "intentions")  # one per cycle, keep them small
+
+    def __init__(self, cycle: int):
+        self.cycle = cycle
+        self.beliefs: list[BeliefChange] = []
+        self.ims_started: list[IntendedMeans] = []
+        self.ims_ended: list[IntendedMeans] = []
+        self.intentions: Union[tuple, list[Intention]] = ()  # started or ended, a list only in the few cycles with any
+
+
+class ChangeLog:
+    # one bucket per cycle that changed something
+    def __init__(self):
+        self.cycles: list[int] = []
+        self.by_cycle: dict[int, CycleChanges] = {}
+        self._sorted = True
+
+    def bucket(self, cycle: int) -> CycleChanges:
+        bucket = self.by_cycle.get(cycle)
+        if bucket is None:
+            bucket = self.by_cycle[cycle] = CycleChanges(cycle)
+            if self.cycles and self.cycles[-1] > cycle:
+                self._sorted = False
+            self.cycles.append(cycle)
+        return bucket
+
+    def belief_changed(self, change: BeliefChange):
+        self.bucket(change.cycle).beliefs.append(change)
+
+    def im_started(self, im: IntendedMeans):
+        self.bucket(im.start).ims_started.append(im)
+
+    def im_ended(self, im: IntendedMeans):
+        self.bucket(im.end).ims_ended.append(im)
+
+    def intention_changed(self, intention: Intention, cycle: int):
+        bucket = self.bucket(cycle)
+        if not bucket.intentions:
+            bucket.intentions = []
+        bucket.intentions.append(intention)
+
+    def last_cycle(self) -> int:
+        if not self.cycles:
+            return 0
+        if not self._sorted:
+            self.cycles.sort()
+            self._sorted = True
+        return self.cycles[-1]
+
+    def between(self, cycle1: int, cycle2: int) -> list[CycleChanges]:
+        # changes in (cycle1, cycle2]
+        if not self._sorted:
+            self.cycles.sort()
+            self._sorted = True
+        cycles = self.cycles[bisect_right(self.cycles, cycle1):bisect_right(self.cycles, cycle2)]
+        return [self.by_cycle[cycle] for cycle in cycles]
@@ -0,0 +1,139 @@
+import bz2
+import gzip
+import lzma
+import os
+import sys
+import zlib
+from typing import BinaryIO, Optional
+
+LOG_SUFFIX = ".log"
+COMPRESSED_OPENERS = {".gz": gzip.open, ".xz": lzma.open, ".bz2": bz2.open}
+LOG_SUFFIXES = [LOG_SUFFIX] + [LOG_SUFFIX + suffix for suffix in COMPRESSED_OPENERS]
+BLOCK_SIZE = 1 << 20
+READ_SIZE = 1 << 16
+
+
+def open_log(log_path: str) -> BinaryIO:
+    # decompresses while reading, no temporary files
+    for suffix, opener in COMPRESSED_OPENERS.items():
+        if log_path.endswith(suffix):
+            return opener(log_path, "rb")
+    return open(log_path, "rb")
+
+
+def open_log_tracked(log_path: str) -> tuple[BinaryIO, BinaryIO]:
+    # the log and the file on disk below it, whose position tells how far a compressed log was read
+    raw_file = open(log_path, "rb")
+    for suffix, opener in COMPRESSED_OPENERS.items():
+        if log_path.endswith(suffix):
+            return opener(raw_file, "rb"), raw_file
+    return raw_file, raw_file
+
+
+def is_compressed(log_path: str) -> bool:
+    return not log_path.endswith(LOG_SUFFIX)
+
+
+def is_log_file(filename: str) -> bool:
+    return any(filename.endswith(suffix) for suffix in LOG_SUFFIXES)
+
+
+def get_agent_name(filename: str) -> Optional[str]:
+    for suffix in LOG_SUFFIXES:
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)]
+    return None
+
+
+def find_log_path(folder: str, agent_name: str) -> str:
+    base_path = folder + "/" + agent_name
+    for suffix in LOG_SUFFIXES:
+        if os.path.exists(base_path + suffix):
+            return base_path + suffix
+    return base_path + LOG_SUFFIX
+
+
+class GzipReader:
+    # decompresses a (possibly multi-member) gzip file in chunks of at most BLOCK_SIZE bytes, so memory stays bounded
+    # whatever the size of the members; it starts at the beginning or at a checkpoint of another reader of the file
+    def __init__(self, log_path: str, checkpoint: Optional[tuple] = None):
+        self.log_path = log_path
+        self.file = open(log_path, "rb")
+        self.position = 0  # decompressed offset of the next chunk
+        self.raw_offset = 0  # compressed offset of the input not given to the decompressor yet
+        self.input = b""
+        self.decompressor = None  # None between members
+        self.member_offset = -1  # compressed and decompressed offsets of the member of the last chunk
+        self.member_position = -1
+        if checkpoint:
+            self.position, self.raw_offset, decompressor = checkpoint
+            self.decompressor = decompressor.copy() if decompressor else None  # the checkpoint stays reusable
+            self.file.seek(self.raw_offset)
+
+    def read(self) -> bytes:
+        # the next chunk, b"" at the end of the file
+        while True:
+            if self.decompressor is None or self.decompressor.eof:
+                if not self.input and not self.fill():
+                    return b""
+                self.decompressor = zlib.decompressobj(wbits=31)
+                self.member_offset, self.member_position = self.raw_offset, self.position
+            elif not self.input and not self.fill():
+                raise EOFError(f"Truncated gzip member at {self.member_offset} in {self.log_path}")
+            data = self.decompressor.decompress(self.input, BLOCK_SIZE)
+            rest = self.decompressor.unused_data if self.decompressor.eof else self.decompressor.unconsumed_tail
+            self.raw_offset += len(self.input) - len(rest)
+            self.input = rest
+            if data:
+                self.position += len(data)
+                return data
+
+    def fill(self) -> bool:
+        self.input = self.file.read(READ_SIZE)
+        return bool(self.input)
+
+    def checkpoint(self) -> tuple:
+        # (decompressed offset, compressed offset, decompressor state or None at a member boundary), for resuming at
+        # the current position (zlib cannot serialize its state, so checkpoints inside members only live in memory)
+        at_boundary = self.decompressor is None or self.decompressor.eof
+        return self.position, self.raw_offset, None if at_boundary else self.decompressor.copy()
+
+    def close(self):
+        self.file.close()
+
+
+def write_block_gzip(log_path: str, target_path: str, block_size: int = BLOCK_SIZE):
+    # every block of whole lines becomes its own gzip member: still a valid gzip file for any reader,
+    # but single blocks can be decompressed on their own (see LogIndex)
+    with open_log(log_path) as log_file, open(target_path, "wb") as target:
+        block = []
+        size = 0
+        for line in log_file:
+            block.append(line)
+            size += len(line)
+            if size >= block_size:
+                target.write(gzip.compress(b"".join(block)))
+                block = []
+                size = 0
+        if block:
+            target.write(gzip.compress(b"".join(block)))
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("usage: python -m model.log_file <agent.log> [block size]")
+        sys.exit(1)
+    log_path = sys.argv[1]
+    agent_name = get_agent_name(os.path.basename(log_path))
+    if agent_name is None:
+        print(f"Expected an agent log, but got: {log_path}")
+        sys.exit(1)
+    target_path = os.path.join(os.path.dirname(log_path), f"{agent_name}{LOG_SUFFIX}.gz")
+    if target_path == log_path:
+        print(f"Expected an uncompressed, xz or bz2 compressed log, but got: {log_path}")
+        sys.exit(1)
+    write_block_gzip(log_path, target_path, int(sys.argv[2]) if len(sys.argv) > 2 else BLOCK_SIZE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import json
+import marshal
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterator, Optional
+
+from model.log_file import open_log, is_compressed, GzipReader
+
+INDEX_VERSION = 2
+INDEX_SUFFIX = ".idx"
+INDEX_HEADER = "<IqqII"
+CYCLE_NR = re.compile(rb'(?<!\\)"nr":\s*(\d+)')
+CHECKPOINT_INTERVAL = 4 << 20  # decompressed bytes between checkpoints inside a gzip member
+
+
+class LogIndex:
+    # maps cycle numbers to byte offsets of the lines in a JSON lines log, the log is read through mmap
+    # for gzip compressed logs, offsets refer to the decompressed data: reads resume decompressing at the last gzip
+    # member (logs written by write_block_gzip have many small ones) or checkpoint before the offset, checkpoints
+    # inside members are taken every CHECKPOINT_INTERVAL while indexing or reading
+    def __init__(self, log_path: str):
+        self.log_path = log_path
+        self.cycles = array("q")
+        self.offsets = array("q")  # start of the line of each entry in cycles
+        self.end = 0  # end of the last complete line
+        self.header_end = 0
+        self.block_offsets = array("q")  # compressed offset of each gzip member
+        self.block_starts = array("q")  # decompressed offset of each gzip member
+        self._map: Optional[mmap.mmap] = None
+        self._map_size = 0
+        self._checkpoints: list[tuple] = []  # see GzipReader.checkpoint, sorted by decompressed offset
+        self._reader: Optional[GzipReader] = None  # left where the last read of a gzip log ended
+        self._chunk: tuple[int, bytes] = (0, b"")  # last chunk of the reader and its decompressed offset
+
+    @staticmethod
+    def open(log_path: str) -> "LogIndex":
+        index = LogIndex(log_path)
+        if not index.load():
+            index.update()
+            index.save()
+        return index
+
+    def update(self) -> int:
+        # indexes lines appended since the last call, returns the number of new lines
+        if self.log_path.endswith(".gz"):
+            return self._update_gzip()
+        added = 0
+        with open_log(self.log_path) as log_file:
+            log_file.seek(self.end)
+            if self.end == 0:
+                line = log_file.readline()
+                if not line.endswith(b"\n"):
+                    return 0
+                self.end = self.header_end = len(line)
+            for line in log_file:
+                if not line.endswith(b"\n"):
+                    break
+                match = CYCLE_NR.search(line)
+                if match:
+                    self.cycles.append(int(match.group(1)))
+                    self.offsets.append(self.end)
+                    added += 1
+                self.end += len(line)
+        return added
+
+    def _update_gzip(self) -> int:
+        if self.block_offsets:  # compressed logs are not appended to
+            return 0
+        added = 0
+        position = 0  # decompressed offset of pending
+        pending = b""  # the last line, until its end was read
+        reader = GzipReader(self.log_path)
+        try:
+            data = reader.read()
+            while data:
+                if not self.block_offsets or reader.member_offset != self.block_offsets[-1]:
+                    self.block_offsets.append(reader.member_offset)
+                    self.block_starts.append(reader.member_position)
+                    self._checkpoints.append((reader.member_position, reader.member_offset, None))
+                pending += data
+                start = 0
+                newline = pending.find(b"\n")
+                while newline >= 0:
+                    if position + start == 0:
+                        self.header_end = newline + 1
+                    else:
+                        match = CYCLE_NR.search(pending, start, newline)
+                        if match:
+                            self.cycles.append(int(match.group(1)))
+                            self.offsets.append(position + start)
+                            added += 1
+                    start = newline + 1
+                    newline = pending.find(b"\n", start)
+                position += start
+                pending = pending[start:]
+                self._add_checkpoint(reader)
+                data = reader.read()
+        finally:
+            reader.close()
+        self.end = position
+        return added
+
+    def get_index_path(self) -> str:
+        return self.log_path + INDEX_SUFFIX
+
+    def get_key(self) -> tuple:
+        stat = os.stat(self.log_path)
+        return INDEX_VERSION, os.path.abspath(self.log_path), stat.st_size, stat.st_mtime_ns
+
+    def save(self) -> bool:
+        index_path = self.get_index_path()
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        try:
+            key = marshal.dumps(self.get_key())
+            with open(tmp_path, "wb") as index_file:
+                index_file.write(struct.pack(INDEX_HEADER, len(key), self.end, self.header_end, len(self.cycles),
+                                             len(self.block_offsets)))
+                index_file.write(key)
+                for values in (self.cycles, self.offsets, self.block_offsets, self.block_starts):
+                    values.tofile(index_file)
+            os.replace(tmp_path, index_path)
+            return True
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+    def load(self) -> bool:
+        header_size = struct.calcsize(INDEX_HEADER)
+        try:
+            with open(self.get_index_path(), "rb") as index_file:
+                key_length, end, header_end, count, block_count = \
+                    struct.unpack(INDEX_HEADER, index_file.read(header_size))
+                if marshal.loads(index_file.read(key_length)) != self.get_key():
+                    return False
+                cycles, offsets, block_offsets, block_starts = array("q"), array("q"), array("q"), array("q")
+                cycles.fromfile(index_file, count)
+                offsets.fromfile(index_file, count)
+                block_offsets.fromfile(index_file, block_count)
+                block_starts.fromfile(index_file, block_count)
+        except (OSError, EOFError, ValueError, TypeError, struct.error):
+            return False
+        self.cycles, self.offsets, self.end, self.header_end = cycles, offsets, end, header_end
+        self.block_offsets, self.block_starts = block_offsets, block_starts
+        return True
+
+    def _mapped(self) -> mmap.mmap:
+        if self._map is None or self._map_size < self.end:
+            self.close()
+            with open(self.log_path, "rb") as log_file:
+                self._map = mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._map_size = len(self._map)
+        return self._map
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def _read(self, start: int, end: int) -> bytes:
+        if self.block_offsets:
+            return self._read_blocks(start, end)
+        if is_compressed(self.log_path):  # no blocks known, the stream has to be decompressed up to start
+            with open_log(self.log_path) as log_file:
+                log_file.seek(start)
+                return log_file.read(end - start)
+        return self._mapped()[start:end]
+
+    def _read_blocks(self, start: int, end: int) -> bytes:
+        # holds only the bytes from start to end and one chunk of the decompressed log
+        if not self._checkpoints:  # after loading the index, the members are the only checkpoints
+            self._checkpoints = [(position, offset, None) for position, offset in zip(self.block_starts,
+                                                                                      self.block_offsets)]
+        checkpoint = self._checkpoints[bisect_right(self._checkpoints, (start, sys.maxsize)) - 1]
+        chunk_start, chunk = self._chunk
+        if self._reader is None or start < chunk_start or checkpoint[0] > self._reader.position:
+            if self._reader is not None:
+                self._reader.close()
+            self._reader = GzipReader(self.log_path, checkpoint)
+            chunk_start, chunk = checkpoint[0], b""
+        parts = []
+        while True:
+            chunk_end = chunk_start + len(chunk)
+            if chunk_end > start:
+                parts.append(chunk[max(start - chunk_start, 0):end - chunk_start])
+            if chunk_end >= end:
+                break
+            self._add_checkpoint(self._reader)
+            data = self._reader.read()
+            if not data:
+                break
+            chunk_start, chunk = chunk_end, data
+        self._chunk = (chunk_start, chunk)
+        return parts[0] if len(parts) == 1 else b"".join(parts)
+
+    def _add_checkpoint(self, reader: GzipReader):
+        i = bisect_right(self._checkpoints, (reader.position, sys.maxsize))
+        if i == 0 or reader.position - self._checkpoints[i - 1][0] >= CHECKPOINT_INTERVAL:
+            self._checkpoints.insert(i, reader.checkpoint())
+
+    def _line_end(self, i: int) -> int:
+        return self.offsets[i + 1] if i + 1 < len(self.offsets) else self.end
+
+    def _decode(self, i: int) -> dict:
+        return json.loads(self._read(self.offsets[i], self._line_end(i)))
+
+    def header(self) -> dict:
+        return json.loads(self._read(0, self.header_end))
+
+    def first_cycle(self) -> int:
+        return self.cycles[0] if self.cycles else -1
+
+    def last_cycle(self) -> int:
+        return self.cycles[-1] if self.cycles else -1
+
+    def get_cycle(self, nr: int) -> list[dict]:
+        # a cycle usually is a single line, but nothing prevents the log from splitting it
+        return [self._decode(i) for i in range(bisect_left(self.cycles, nr), bisect_right(self.cycles, nr))]
+
+    def get_cycles(self, start: int, end: int) -> Iterator[dict]:
+        # all lines of cycles start..end (inclusive), decoded one at a time
+        for i in range(bisect_left(self.cycles, start), bisect_right(self.cycles, end)):
+            yield self._decode(i)
+
+    def get_offset(self, nr: int) -> int:
+        i = bisect_left(self.cycles, nr)
+        return self.offsets[i] if i < len(self.offsets) else self.end
@@ -0,0 +1,122 @@
+import json
+import os
+from typing import Optional
+
+from model.bdi import EventType
+from model.log_file import open_log_tracked
+from model.util import LoadProgress
+from profiler import profiler
+
+
+class LogHandler:
+    # receives what parse_log reads from an agent log: the plans of the first line, then the changes of each cycle in
+    # the order they need to be linked in, IDs and the dicts of the log are passed on as they are
+    # AgentDataBuilder (model.agent) links them into objects, StoreWriter (model.storage) writes them into a database
+    def add_plans(self, plans: dict[str, dict]):
+        raise NotImplementedError
+
+    def add_intention(self, intention_id: int, nr: int):
+        raise NotImplementedError
+
+    def add_im(self, im_data: dict, nr: int):
+        raise NotImplementedError
+
+    def get_event_parent(self, event_id: int) -> Optional[int]:
+        # the IM of an event added before
+        raise NotImplementedError
+
+    def add_event(self, event_data: dict, event_type: EventType, parent_im_id: Optional[int], nr: int):
+        raise NotImplementedError
+
+    def end_action(self, intention_id: int, nr: int):
+        raise NotImplementedError
+
+    def add_instruction(self, instr_data: dict, unifier: Optional[str], action: bool, nr: int):
+        raise NotImplementedError
+
+    def end_im(self, im_data: dict, nr: int):
+        raise NotImplementedError
+
+    def end_intention(self, intention_id: int, nr: int):
+        raise NotImplementedError
+
+    def select_event(self, event_id: int, intention_id: Optional[int], im_ids: list[int], nr: int):
+        # intention_id is the intention added in this cycle, im_ids the IMs added in this cycle
+        raise NotImplementedError
+
+    def change_belief(self, nr: int, added: bool, belief: str):
+        raise NotImplementedError
+
+    def line_read(self, log_offset: int, nr: Optional[int]):
+        # after the first line (nr is None) and after each cycle, log_offset is where the next line starts
+        raise NotImplementedError
+
+
+def parse_log(log_path: str, log_offset: int, handler: LogHandler, load_progress: Optional[LoadProgress] = None) \
+        -> int:
+    # parses all complete lines after log_offset, returns the number of cycles read
+    decode = profiler.timed("parse.json", json.loads)  # the rest of the parse phase is the handler
+    cycles_read = 0
+    log_size = os.path.getsize(log_path)
+    log_file, raw_file = open_log_tracked(log_path)
+    with raw_file, log_file:
+        log_file.seek(log_offset)
+        if log_offset == 0:
+            line = log_file.readline()
+            if not line.endswith(b"\n"):
+                return 0
+            log_offset += len(line)
+            handler.add_plans(decode(line)["details"]["plans"])
+            handler.line_read(log_offset, None)
+
+        add_intention, add_im, add_event = handler.add_intention, handler.add_im, handler.add_event
+        end_action, add_instruction, end_im = handler.end_action, handler.add_instruction, handler.end_im
+        end_intention, select_event = handler.end_intention, handler.select_event
+        change_belief, line_read = handler.change_belief, handler.line_read
+        for line in log_file:
+            if not line.endswith(b"\n"):  # line is still being written
+                break
+            log_offset += len(line)
+            cycles_read += 1
+            if load_progress and cycles_read % LoadProgress.interval == 0:
+                load_progress.update(raw_file.tell(), log_size)
+            cycle = decode(line)
+            nr = cycle["nr"]
+            ims_added_this_cycle = []
+            if "I+" in cycle:
+                add_intention(cycle["I+"], nr)
+            if "IM+" in cycle:
+                for im_data in cycle["IM+"]:
+                    add_im(im_data, nr)
+                    ims_added_this_cycle.append(im_data["id"])
+            if "E+" in cycle:
+                for event_data in cycle["E+"]:
+                    parent_im_id = None  # an event can be in two intentions, see SE
+                    event_type = EventType.BELIEF_UPDATE
+                    if event_data["src"] != "B":  # not a belief update
+                        event_type = EventType.GOAL_NEW_FOCUS if "nf" in event_data else EventType.SUB_GOAL
+                        if "I" in cycle:
+                            parent_im_id = int(cycle["I"]["im"])
+                        else:  # parent is SE because no applicable plan
+                            parent_im_id = handler.get_event_parent(cycle["SE"])
+                    add_event(event_data, event_type, parent_im_id, nr)
+            if "A-" in cycle:  # needs to be handled before A+
+                for action_intention_id in cycle["A-"]:
+                    end_action(action_intention_id, nr)
+            if "I" in cycle:
+                add_instruction(cycle["I"], cycle.get("U"), "A+" in cycle, nr)
+            if "IM-" in cycle:
+                for im_data in cycle["IM-"]:
+                    if im_data["id"] != -1:  # -1: IM did not really exist -> no applicable/relevant plan
+                        end_im(im_data, nr)  # TODO selected event SE could not be handled
+            if "I-" in cycle:
+                for intention_id in cycle["I-"]:
+                    end_intention(intention_id, nr)
+            if "SE" in cycle:  # E+ and IM+ need to be processed before SE
+                select_event(cycle["SE"], cycle.get("I+"), ims_added_this_cycle, nr)
+            for belief in cycle.get("B+", ()):
+                change_belief(nr, True, belief)
+            for belief in cycle.get("B-", ()):
+                change_belief(nr, False, belief)
+            line_read(log_offset, nr)
+    return cycles_read
@@ -0,0 +1,361 @@
+import re
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from itertools import compress, islice, repeat
+from operator import attrgetter
+from typing import Optional, Union
+
+from model.bdi import BDIEvent, BeliefChange, IntendedMeans
+
+# names (with internal action dot or namespace), variables, numbers, strings and the brackets that give structure
+# operators are skipped, arguments such as X+1 are only indexed by their names and numbers
+TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|(?:\.|\w+::)?[a-z]\w*(?:\.[a-z]\w*)*|[A-Z_]\w*|\d+(?:\.\d+)?|[()\[\],]')
+FUNCTOR_ARITY = re.compile(r"^((?:\.|\w+::)?[a-z]\w*(?:\.[a-z]\w*)*)/(\d+)$")
+CYCLE_RANGE = re.compile(r"^(\d+)(?:-(\d+))?$")
+OPERATOR_PREFIX = re.compile(r"^[-+!?]*")
+FIELDS = ("trigger", "belief", "instr", "cycle")
+
+# a parsed term: a name, variable, number or string, or (functor, arguments), None for an argument that is not a
+# single term (e.g. an expression)
+Term = Union[str, tuple]
+
+
+def is_variable(token: str) -> bool:
+    return token[0].isupper() or token[0] == "_"
+
+
+def is_name(token: str) -> bool:
+    return token[0] not in "()[],\"" and not is_variable(token) and not token[0].isdigit()
+
+
+def parse_terms(text: str) -> tuple[list[Term], list[tuple], set[str]]:
+    # returns the top-level terms, all compound terms and the index tokens: names, numbers and strings,
+    # and name/arity of the compounds, annotations are indexed but not part of the terms
+    tokens = TOKEN.findall(text)
+    index_tokens = set()
+    compounds = []
+    frames: list[tuple[str, list, list]] = []  # (name, finished arguments, current argument)
+    current: list = []
+    previous = ""
+    for token in tokens:
+        if token == "(":
+            if previous and is_name(previous) and current and current[-1] == previous:
+                name = current.pop()
+            else:  # parenthesised expression
+                name = ""
+            frames.append((name, [], current))
+            current = []
+        elif token == "[":
+            annotations = previous == ")" or (previous and is_name(previous))
+            frames.append(("@" if annotations else "[]", [], current))
+            current = []
+        elif token in ")]":
+            if not frames:
+                continue
+            name, arguments, parent = frames.pop()
+            if current or arguments:
+                arguments.append(current)
+            values = tuple(argument[0] if len(argument) == 1 else None for argument in arguments)
+            current = parent
+            if name == "@":
+                pass
+            elif name == "":
+                current.append(values[0] if len(values) == 1 else None)
+            else:
+                term = (name, values)
+                compounds.append(term)
+                if name != "[]":
+                    index_tokens.add(f"{name}/{len(values)}")
+                current.append(term)
+        elif token == ",":
+            if frames:
+                frames[-1][1].append(current)
+                current = []
+        else:
+            current.append(token)
+            if not is_variable(token):
+                index_tokens.add(token)
+        previous = token
+    while frames:  # unbalanced text, e.g. cut off
+        current = frames.pop()[2]
+    return current, compounds, index_tokens
+
+
+def matches(pattern: Term, term: Term) -> bool:
+    if isinstance(pattern, str) and is_variable(pattern):
+        return True
+    if isinstance(pattern, str) or pattern is None:
+        return pattern == term
+    if not isinstance(term, tuple) or term[0] != pattern[0] or len(term[1]) != len(pattern[1]):
+        return False
+    return all(matches(p, t) for p, t in zip(pattern[1], term[1]))
+
+
+class Pattern:
+    # found/1 (functor and arity), found(red) or found(_, X) (a term, variables match anything) or red (a name,
+    # number or string anywhere), optionally preceded by operators such as +, - or +! which the text has to start with
+    def __init__(self, text: str):
+        self.text = text
+        self.prefix = OPERATOR_PREFIX.match(text).group()
+        rest = text[len(self.prefix):]
+        self.term: Optional[tuple] = None
+        functor_arity = FUNCTOR_ARITY.match(rest)
+        if functor_arity:
+            self.tokens = {rest}
+            return
+        terms, _, self.tokens = parse_terms(rest)
+        if len(terms) != 1 or terms[0] is None:
+            raise ValueError(f"Not a single term: {rest}")
+        if not self.tokens:
+            raise ValueError(f"A pattern needs a name, number or string: {rest}")
+        if isinstance(terms[0], tuple):
+            self.term = terms[0]
+
+
+class TextIndex:
+    # the distinct texts of a field, token -> texts containing the token, and the text of every entry of the field
+    # texts repeat a lot (triggers, beliefs): each one is tokenised once and entries only store its id, so that
+    # adding entries and scanning them for matching texts runs in C (map, compress) instead of a loop per entry
+    # new texts are tokenised by the next search, loading an agent nobody searches does not pay for it
+    def __init__(self):
+        self.ids: dict[str, int] = {}
+        self.texts: list[str] = []
+        self.tokens: dict[str, array] = {}
+        self.compounds: dict[int, list[tuple]] = {}  # parsed again when a term pattern needs to check them
+        self.entries = array("q")  # text id of each entry
+        self.tokenised = 0  # number of texts in tokens
+
+    def add_all(self, texts: list[str]):
+        ids = self.ids
+        for text in dict.fromkeys(texts):
+            if text not in ids:
+                ids[text] = len(self.texts)
+                self.texts.append(text)
+        self.entries.extend(map(ids.__getitem__, texts))
+
+    def tokenise(self):
+        tokens = self.tokens
+        for text_id in range(self.tokenised, len(self.texts)):
+            for token in parse_terms(self.texts[text_id])[2]:
+                ids = tokens.get(token)
+                if ids is None:
+                    ids = tokens[token] = array("q")
+                ids.append(text_id)
+        self.tokenised = len(self.texts)
+
+    def find(self, pattern: Pattern, check_prefix: bool = True, start: int = 0, end: Optional[int] = None) \
+            -> list[int]:
+        # positions of the entries matching the pattern, only those in [start, end) are scanned
+        text_ids = self.find_texts(pattern, check_prefix)
+        if not text_ids:
+            return []
+        end = len(self.entries) if end is None else end
+        return list(compress(range(start, end), map(text_ids.__contains__, self.entries[start:end])))
+
+    def find_texts(self, pattern: Pattern, check_prefix: bool) -> set[int]:
+        # ids of the texts matching the pattern, starting from the rarest token
+        self.tokenise()
+        candidates = None
+        for token in sorted(pattern.tokens, key=lambda t: len(self.tokens.get(t, ()))):
+            ids = self.tokens.get(token)
+            if ids is None:
+                return set()
+            candidates = set(ids) if candidates is None else candidates.intersection(ids)
+            if not candidates:
+                return set()
+        return {text_id for text_id in candidates if self.matches(text_id, pattern, check_prefix)}
+
+    def matches(self, text_id: int, pattern: Pattern, check_prefix: bool) -> bool:
+        if check_prefix and not self.texts[text_id].startswith(pattern.prefix):
+            return False
+        if pattern.term is None:
+            return True
+        compounds = self.compounds.get(text_id)
+        if compounds is None:
+            compounds = self.compounds[text_id] = parse_terms(self.texts[text_id])[1]
+        return any(matches(pattern.term, compound) for compound in compounds)
+
+    def memory_usage(self) -> int:
+        return self.entries.itemsize * len(self.entries) + sum(ids.itemsize * len(ids) for ids in self.tokens.values())
+
+
+@dataclass
+class SearchResult:
+    intended_means: list[IntendedMeans] = field(default_factory=list)
+    events: list[BDIEvent] = field(default_factory=list)
+    cycles: list[int] = field(default_factory=list)
+
+
+class SearchIndex:
+    # inverted index over IM and event triggers, belief changes and instruction texts, see search for the query syntax
+    # like BeliefIndex, update indexes what was appended to the agent data since the last call
+    def __init__(self, intended_means: dict[int, IntendedMeans], events: dict[int, BDIEvent],
+                 beliefs: list[BeliefChange]):
+        self.intended_means = intended_means
+        self.events = events
+        self.beliefs = beliefs
+        # entries are in the order of the agent data, the arrays give what an entry position stands for
+        self.im_triggers = TextIndex()
+        self.im_ids = array("q")
+        self.event_triggers = TextIndex()
+        self.event_ids = array("q")
+        self.belief_changes = TextIndex()  # positions in beliefs
+        self.instructions = TextIndex()
+        self.instruction_ims = array("q")
+        self.instruction_cycles = array("q")
+        self._ims_indexed = 0
+        self._events_indexed = 0
+        self._beliefs_indexed = 0
+        self._open_ims: list[IntendedMeans] = []  # IMs that may still get instructions
+        self._instructions_indexed: dict[int, int] = {}  # IM id -> instructions indexed
+        self.update()
+
+    def update(self):
+        new_ims = list(islice(self.intended_means.values(), self._ims_indexed, None))
+        self.im_triggers.add_all(list(map(attrgetter("trigger"), new_ims)))
+        self.im_ids.extend(map(attrgetter("id"), new_ims))
+        self._open_ims.extend(new_ims)
+        self._ims_indexed = len(self.intended_means)
+        new_events = list(islice(self.events.values(), self._events_indexed, None))
+        self.event_triggers.add_all(list(map(attrgetter("name"), new_events)))
+        self.event_ids.extend(map(attrgetter("id"), new_events))
+        self._events_indexed = len(self.events)
+        self.belief_changes.add_all(list(map(attrgetter("belief"), islice(self.beliefs, self._beliefs_indexed, None))))
+        self._beliefs_indexed = len(self.beliefs)
+        self.update_instructions()
+
+    def update_instructions(self):
+        still_open = []
+        for im in self._open_ims:
+            start = self._instructions_indexed.pop(im.id, 0)
+            if start < len(im.instructions):
+                instructions = im.instructions[start:]
+                self.instructions.add_all(list(map(attrgetter("text"), instructions)))
+                self.instruction_ims.extend(repeat(im.id, len(instructions)))
+                self.instruction_cycles.extend(map(attrgetter("cycle"), instructions))
+            if im.end == sys.maxsize:
+                self._instructions_indexed[im.id] = len(im.instructions)
+                still_open.append(im)
+        self._open_ims = still_open
+
+    def search(self, query: str) -> SearchResult:
+        # terms separated by spaces, all of which have to match: [field:]pattern (see Pattern)
+        # fields: trigger (IMs and events), belief (cycles in which a matching belief was added (+) or removed (-)),
+        # instr (IMs and cycles of matching instructions), without a field all of them
+        # cycle:N or cycle:N-M restricts the results to these cycles
+        # a term only restricts the kinds of results its field gives, e.g. "trigger:found(_) instr:drop(_)"
+        # gives the IMs with both, the events of the trigger and the cycles of the instructions
+        ims: Optional[set[int]] = None
+        events: Optional[set[int]] = None
+        cycles: Optional[set[int]] = None
+        cycle_range = None
+        patterns = []
+        for term in split_query(query):
+            field_name, _, pattern_text = term.partition(":") if term.split(":", 1)[0] in FIELDS else ("", "", term)
+            if field_name == "cycle":
+                cycle_range = SearchIndex.parse_cycle_range(pattern_text)
+            else:
+                patterns.append((field_name, Pattern(pattern_text)))
+        for field_name, pattern in patterns:
+            term_ims, term_events, term_cycles = self.find(field_name, pattern, cycle_range)
+            ims = intersect(ims, term_ims)
+            events = intersect(events, term_events)
+            cycles = intersect(cycles, term_cycles)
+        result = SearchResult([self.intended_means[im_id] for im_id in sorted(ims or ())],
+                              [self.events[event_id] for event_id in sorted(events or ())],
+                              sorted(cycles or ()))
+        if cycle_range:
+            first, last = cycle_range
+            result.intended_means = [im for im in result.intended_means if im.start <= last and im.end >= first]
+            result.events = [event for event in result.events if first <= event.cycle_added <= last]
+            result.cycles = [cycle for cycle in result.cycles if first <= cycle <= last]
+        return result
+
+    def find(self, field_name: str, pattern: Pattern, cycle_range: Optional[tuple[int, int]] = None) \
+            -> tuple[Optional[set[int]], Optional[set[int]], Optional[set[int]]]:
+        # IM ids, event ids and cycles matching in the field, None for kinds the field does not give
+        ims = events = cycles = None
+        if field_name in ("", "trigger"):
+            ims = set(map(self.im_ids.__getitem__, self.im_triggers.find(pattern)))
+            events = set(map(self.event_ids.__getitem__, self.event_triggers.find(pattern)))
+        if field_name in ("", "belief"):
+            cycles = self.find_belief_cycles(pattern, cycle_range)
+        if field_name in ("", "instr"):
+            positions = self.instructions.find(pattern)
+            ims = union(ims, set(map(self.instruction_ims.__getitem__, positions)))
+            cycles = union(cycles, set(map(self.instruction_cycles.__getitem__, positions)))
+        return ims, events, cycles
+
+    def find_belief_cycles(self, pattern: Pattern, cycle_range: Optional[tuple[int, int]]) -> set[int]:
+        # belief texts have no operators, + and - select additions and removals
+        if pattern.prefix not in ("", "+", "-"):
+            return set()
+        start, end = 0, len(self.belief_changes.entries)
+        if cycle_range:  # changes are in the order of the cycles
+            start = bisect_left(self.beliefs, cycle_range[0], 0, end, key=attrgetter("cycle"))
+            end = bisect_right(self.beliefs, cycle_range[1], start, end, key=attrgetter("cycle"))
+        changes = map(self.beliefs.__getitem__, self.belief_changes.find(pattern, False, start, end))
+        if pattern.prefix:
+            added = pattern.prefix == "+"
+            return {change.cycle for change in changes if change.added == added}
+        return set(map(attrgetter("cycle"), changes))
+
+    @staticmethod
+    def parse_cycle_range(text: str) -> tuple[int, int]:
+        cycle_range = CYCLE_RANGE.match(text)
+        if not cycle_range:
+            raise ValueError(f"Expected cycle:N or cycle:N-M, got cycle:{text}")
+        first = int(cycle_range.group(1))
+        return first, int(cycle_range.group(2)) if cycle_range.group(2) else first
+
+    def memory_usage(self) -> int:
+        arrays = (self.im_ids, self.event_ids, self.instruction_ims, self.instruction_cycles)
+        return sum(values.itemsize * len(values) for values in arrays) + sum(
+            index.memory_usage() for index in (self.im_triggers, self.event_triggers, self.belief_changes,
+                                               self.instructions))
+
+
+def split_query(query: str) -> list[str]:
+    # splits at spaces outside of brackets and strings
+    terms = []
+    depth = 0
+    in_string = False
+    start = 0
+    for i, c in enumerate(query):
+        if in_string:
+            if c == '"' and query[i - 1] != "\\":
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in "([":
+            depth += 1
+        elif c in ")]":
+            depth = max(0, depth - 1)
+        elif c.isspace() and depth == 0:
+            if i > start:
+                terms.append(query[start:i])
+            start = i + 1
+    if start < len(query):
+        terms.append(query[start:])
+    if not terms:
+        raise ValueError("Empty query")
+    return terms
+
+
+def intersect(a: Optional[set], b: Optional[set]) -> Optional[set]:
+    # None means unrestricted
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a & b
+
+
+def union(a: Optional[set], b: Optional[set]) -> Optional[set]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a | b
@@ -0,0 +1,704 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import weakref
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Iterator, Optional
+
+from model.bdi import BeliefChange, Plan, Intention, BDIEvent, IntendedMeans, Instruction, EventType, FailureReason
+from model.data_cache import DataCache
+from model.index import BeliefTimeline, CycleChanges
+from model.util import LoadProgress
+from model.log_file import is_compressed
+from model.log_parser import LogHandler, parse_log
+from profiler import profiler
+
+# an agent log can be ingested into a SQLite database next to it (<agent.log>.sqlite) instead of being parsed into
+# objects, the objects are then loaded from the database when used, see SqliteStore
+STORE_VERSION = 1
+STORE_SUFFIX = ".sqlite"
+OPEN = sys.maxsize  # end of intentions, IMs and beliefs that did not end yet
+
+# column names avoid the SQL keywords end and trigger
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS plans (label TEXT PRIMARY KEY, trigger_term TEXT, context TEXT, body TEXT, file TEXT,
+    line INTEGER, used INTEGER);
+CREATE TABLE IF NOT EXISTS intentions (id INTEGER PRIMARY KEY, start_cycle INTEGER, end_cycle INTEGER);
+CREATE TABLE IF NOT EXISTS intended_means (id INTEGER PRIMARY KEY, intention INTEGER, start_cycle INTEGER,
+    end_cycle INTEGER, res TEXT, reason_msg TEXT, reason_type TEXT, reason_src TEXT, reason_line, file TEXT,
+    line INTEGER, plan TEXT, trigger_term TEXT, context TEXT, parent INTEGER, event INTEGER);
+CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY, parent INTEGER, name TEXT, type INTEGER,
+    cycle_added INTEGER, cycle_selected INTEGER);
+CREATE TABLE IF NOT EXISTS intention_events (id INTEGER PRIMARY KEY, intention INTEGER, event INTEGER);
+CREATE TABLE IF NOT EXISTS instructions (id INTEGER PRIMARY KEY, im INTEGER, file TEXT, line INTEGER, text TEXT,
+    cycle INTEGER, type TEXT, end_cycle INTEGER, result TEXT, unifier TEXT);
+CREATE TABLE IF NOT EXISTS beliefs (id INTEGER PRIMARY KEY, cycle INTEGER, added INTEGER, belief TEXT);
+CREATE TABLE IF NOT EXISTS snapshots (id INTEGER PRIMARY KEY, cycle INTEGER, first_change INTEGER);
+CREATE TABLE IF NOT EXISTS snapshot_beliefs (snapshot INTEGER, belief TEXT);
+"""
+# created after the first ingest, bulk inserts are faster without them
+INDEXES = """
+CREATE INDEX IF NOT EXISTS beliefs_cycle ON beliefs (cycle);
+CREATE INDEX IF NOT EXISTS beliefs_belief ON beliefs (belief);
+CREATE INDEX IF NOT EXISTS intended_means_start ON intended_means (start_cycle);
+CREATE INDEX IF NOT EXISTS intended_means_end ON intended_means (end_cycle);
+CREATE INDEX IF NOT EXISTS intended_means_intention ON intended_means (intention);
+CREATE INDEX IF NOT EXISTS intended_means_parent ON intended_means (parent);
+CREATE INDEX IF NOT EXISTS intended_means_plan ON intended_means (plan);
+CREATE INDEX IF NOT EXISTS intentions_start ON intentions (start_cycle);
+CREATE INDEX IF NOT EXISTS intentions_end ON intentions (end_cycle);
+CREATE INDEX IF NOT EXISTS intention_events_intention ON intention_events (intention);
+CREATE INDEX IF NOT EXISTS events_selected ON events (cycle_selected);
+CREATE INDEX IF NOT EXISTS instructions_im ON instructions (im);
+CREATE INDEX IF NOT EXISTS instructions_cycle ON instructions (cycle);
+CREATE INDEX IF NOT EXISTS snapshots_cycle ON snapshots (cycle);
+CREATE INDEX IF NOT EXISTS snapshot_beliefs_snapshot ON snapshot_beliefs (snapshot);
+"""
+TABLES = ("meta", "plans", "intentions", "intended_means", "events", "intention_events", "instructions", "beliefs",
+          "snapshots", "snapshot_beliefs")
+IM_COLUMNS = "id, intention, start_cycle, end_cycle, res, reason_msg, reason_type, reason_src, reason_line, file, " \
+             "line, plan, trigger_term, context, parent, event"
+EVENT_COLUMNS = "events.id, parent, name, type, cycle_added, cycle_selected"
+INTENTION_COLUMNS = "id, start_cycle, end_cycle"
+INSTRUCTION_COLUMNS = "file, line, text, cycle, type, end_cycle, result, unifier"
+
+
+def get_store_path(log_path: str) -> str:
+    return log_path + STORE_SUFFIX
+
+
+def get_log_identity(log_path: str) -> list:
+    stat = os.stat(log_path)
+    return [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+
+class StoredIntendedMeans(IntendedMeans):
+    # an IM of a SqliteStore, its intention, parent, event, children and instructions are loaded when used
+    __slots__ = ("store", "intention_id", "parent_id", "event_id", "__weakref__")
+
+    @property
+    def intention(self) -> Intention:
+        return self.store.get_intention(self.intention_id)
+
+    @property
+    def parent(self) -> Optional[IntendedMeans]:
+        return None if self.parent_id is None else self.store.get_im(self.parent_id)
+
+    @property
+    def event(self) -> Optional[BDIEvent]:
+        return None if self.event_id is None else self.store.get_event(self.event_id)
+
+    @property
+    def children(self) -> list[IntendedMeans]:
+        return self.store.load_ims("parent = ?", (self.id,))
+
+    @property
+    def instructions(self) -> list[Instruction]:
+        return self.store.load_instructions(self.id)
+
+
+class StoredIntention(Intention):
+    __slots__ = ("store", "root_im", "__weakref__")
+
+    @property
+    def means(self) -> list[IntendedMeans]:
+        return self.store.load_ims("intention = ?", (self.id,))
+
+    def get_root_im(self) -> Optional[IntendedMeans]:
+        # loads only the first IM, it is kept once there is one
+        if self.root_im is None:
+            ims = self.store.load_ims("intention = ?", (self.id,), 1)
+            self.root_im = ims[0] if ims else None
+        return self.root_im
+
+    @property
+    def events(self) -> list[BDIEvent]:
+        return self.store.load_intention_events(self.id)
+
+
+class StoredEvent(BDIEvent):
+    __slots__ = ("store", "parent_id", "__weakref__")
+
+    @property
+    def parent(self) -> Optional[IntendedMeans]:
+        return None if self.parent_id is None else self.store.get_im(self.parent_id)
+
+
+class SqliteStore:
+    # the parsed data of one agent log in a SQLite database, filled in batched transactions and continued where it
+    # stopped when the log grows (a replaced log is ingested again)
+    # objects are created from the rows when asked for and kept in a cache bounded by their number, objects evicted
+    # from it stay registered (weakly) while still referenced, so that a row gives the same object as long as one is
+    # in use and updates of ended IMs, intentions and selected events reach all of them
+    batch_cycles = 5000  # per transaction
+    min_snapshot_interval = 64
+
+    def __init__(self, log_path: str, snapshot_interval: int = 0, cached_objects: int = 200000):
+        self.log_path = log_path
+        self.snapshot_interval = snapshot_interval  # belief changes between snapshots, 0 = size of the belief base
+        self.objects: DataCache = DataCache(cached_objects)
+        self.live: weakref.WeakValueDictionary = weakref.WeakValueDictionary()  # (kind, id) -> object in use
+        self.lock = threading.RLock()  # the GUI thread loads linked objects while the loader queries
+        self.connection = sqlite3.connect(get_store_path(log_path), isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        if not self.is_continued_log():
+            self.clear()
+        self.plans: dict[str, Plan] = {}
+        self.load_plans()
+        self.counts: dict[str, int] = {}
+        self.count_rows()
+
+    def query(self, sql: str, parameters: tuple = ()) -> list[tuple]:
+        with self.lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def get_meta(self, name: str):
+        rows = self.query("SELECT value FROM meta WHERE name = ?", (name,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def set_meta(self, name: str, value):
+        self.connection.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (name, json.dumps(value)))
+
+    @property
+    def log_offset(self) -> int:
+        return self.get_meta("log_offset") or 0
+
+    def is_continued_log(self) -> bool:
+        # the stored data is the beginning of the current log
+        identity = self.get_meta("log_identity")
+        if self.get_meta("version") != STORE_VERSION or identity is None:
+            return False
+        current = get_log_identity(self.log_path)
+        if is_compressed(self.log_path):
+            return identity == current
+        return identity[0] == current[0] and identity[1] <= current[1]
+
+    def clear(self):
+        with self.lock:
+            self.connection.executescript("".join(f"DROP TABLE IF EXISTS {table};" for table in TABLES) + SCHEMA)
+            self.set_meta("version", STORE_VERSION)
+            self.objects = DataCache(self.objects.budget)
+            self.live = weakref.WeakValueDictionary()
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def ingest(self, load_progress: Optional[LoadProgress] = None) -> int:
+        # reads the complete lines after the stored offset, returns the number of cycles read
+        # a cancelled ingest keeps the batches committed before, the next one continues after them
+        with self.lock:
+            first_ingest = self.get_meta("log_identity") is None
+            identity = get_log_identity(self.log_path)
+            self.connection.execute("BEGIN")
+            try:
+                cycles_read, first_cycle = self.read_log(load_progress)
+                self.set_meta("log_identity", identity)
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            if first_ingest:
+                with profiler.phase("sqlite.indexes"):
+                    self.connection.executescript(INDEXES)
+            if cycles_read:
+                self.load_plans()
+                self.count_rows()
+                if not first_ingest:
+                    self.refresh_objects(first_cycle)
+            return cycles_read
+
+    def read_log(self, load_progress: Optional[LoadProgress]) -> tuple[int, int]:
+        # returns the number of cycles read and the first of them
+        writer = StoreWriter(self)
+        cycles_read = parse_log(self.log_path, writer.log_offset, writer, load_progress)
+        writer.save()
+        return cycles_read, writer.first_cycle
+
+    def load_plans(self):
+        # the plan objects stay the same, only their usage counts change
+        rows = self.query("SELECT label, trigger_term, context, body, file, line, "
+                          "(SELECT COUNT(*) FROM intended_means WHERE plan = label) FROM plans")
+        for label, trigger, context, body, file, line, used in rows:
+            plan = self.plans.get(label)
+            if plan is None:
+                self.plans[label] = Plan(label, trigger, context, body, file, line, used)
+            else:
+                plan.used = used
+
+    def count_rows(self):
+        for table in ("intentions", "intended_means", "events", "instructions", "beliefs"):
+            self.counts[table] = self.query(f"SELECT COUNT(*) FROM {table}")[0][0]
+        self.counts["last_cycle"] = max(self.query("SELECT MAX(cycle) FROM beliefs")[0][0] or 0,
+                                        self.query("SELECT MAX(start_cycle) FROM intended_means")[0][0] or 0,
+                                        self.query("SELECT MAX(end_cycle) FROM intended_means "
+                                                   "WHERE end_cycle < ?", (OPEN,))[0][0] or 0)
+
+    def refresh_objects(self, first_cycle: int):
+        # applies the ends and selections of the cycles read to the objects created before
+        for row in self.query(f"SELECT {IM_COLUMNS} FROM intended_means WHERE end_cycle >= ? AND end_cycle < ?",
+                              (first_cycle, OPEN)):
+            im = self.live.get(("im", row[0]))  # without touching the LRU order
+            if im is not None:
+                im.end, im.res = row[3], row[4]
+                im.failure_reason = SqliteStore.get_failure_reason(row)
+        for intention_id, _, end in self.query(f"SELECT {INTENTION_COLUMNS} FROM intentions "
+                                               f"WHERE end_cycle >= ? AND end_cycle < ?", (first_cycle, OPEN)):
+            intention = self.live.get(("intention", intention_id))
+            if intention is not None:
+                intention.end = end
+        for event_id, cycle in self.query("SELECT id, cycle_selected FROM events WHERE cycle_selected >= ?",
+                                          (first_cycle,)):
+            event = self.live.get(("event", event_id))
+            if event is not None:
+                event.cycle_selected = cycle
+
+    def cache(self, kind: str, item):
+        self.objects.put((kind, item.id), (), item, 1)
+        self.live[(kind, item.id)] = item
+        return item
+
+    def get_cached(self, kind: str, item_id: int):
+        entry = self.objects.get((kind, item_id))
+        if entry is not None:
+            return entry.value
+        item = self.live.get((kind, item_id))  # evicted, but still referenced
+        if item is not None:
+            self.objects.put((kind, item_id), (), item, 1)
+        return item
+
+    def get_im(self, im_id: int) -> Optional[IntendedMeans]:
+        cached = self.get_cached("im", im_id)
+        if cached is not None:
+            return cached
+        ims = self.load_ims("id = ?", (im_id,))
+        return ims[0] if ims else None
+
+    def get_intention(self, intention_id: int) -> Optional[Intention]:
+        cached = self.get_cached("intention", intention_id)
+        if cached is not None:
+            return cached
+        intentions = self.load_intentions("id = ?", (intention_id,))
+        return intentions[0] if intentions else None
+
+    def get_event(self, event_id: int) -> Optional[BDIEvent]:
+        cached = self.get_cached("event", event_id)
+        if cached is not None:
+            return cached
+        events = self.load_events("id = ?", (event_id,))
+        return events[0] if events else None
+
+    def get_ims(self, im_ids) -> list[IntendedMeans]:
+        # in the order of the ids
+        ims = {im.id: im for im in self.load_ims(f"id IN ({', '.join('?' * len(im_ids))})", tuple(im_ids))}
+        return [ims[im_id] for im_id in im_ids]
+
+    def load_ids(self, table: str, last_id: int) -> array:
+        # the ids above last_id, read in pages
+        ids = array("q")
+        while True:
+            page = self.query(f"SELECT id FROM {table} WHERE id > ? ORDER BY id LIMIT ?", (last_id,
+                                                                                           StoredTable.page_size))
+            ids.extend(item_id for item_id, in page)
+            if len(page) < StoredTable.page_size:
+                return ids
+            last_id = ids[-1]
+
+    def load_root_im_ids(self, last_id: int) -> list[tuple[int, Optional[int]]]:
+        # (intention id, id of its first IM or None) of the intentions above last_id
+        return self.query("SELECT id, (SELECT MIN(id) FROM intended_means WHERE intention = intentions.id) "
+                          "FROM intentions WHERE id > ? ORDER BY id", (last_id,))
+
+    def get(self, kind: str, item_id: int):
+        return {"im": self.get_im, "intention": self.get_intention, "event": self.get_event}[kind](item_id)
+
+    def load_ims(self, condition: str, parameters: tuple, limit: int = -1) -> list[IntendedMeans]:
+        rows = self.query(f"SELECT {IM_COLUMNS} FROM intended_means WHERE {condition} ORDER BY id LIMIT ?",
+                          (*parameters, limit))
+        return [self.get_cached("im", row[0]) or self.create_im(row) for row in rows]
+
+    def load_intentions(self, condition: str, parameters: tuple, limit: int = -1) -> list[Intention]:
+        rows = self.query(f"SELECT {INTENTION_COLUMNS} FROM intentions WHERE {condition} ORDER BY id LIMIT ?",
+                          (*parameters, limit))
+        return [self.get_cached("intention", row[0]) or self.create_intention(row) for row in rows]
+
+    def load_events(self, condition: str, parameters: tuple, limit: int = -1) -> list[BDIEvent]:
+        rows = self.query(f"SELECT {EVENT_COLUMNS} FROM events WHERE {condition} ORDER BY id LIMIT ?",
+                          (*parameters, limit))
+        return [self.get_cached("event", row[0]) or self.create_event(row) for row in rows]
+
+    def load_failed_intentions(self) -> list[Intention]:
+        return self.load_intentions("id IN (SELECT intention FROM intended_means WHERE res IN ('failed', 'np'))", ())
+
+    def load_intention_events(self, intention_id: int) -> list[BDIEvent]:
+        # in the order they were added to the intention
+        rows = self.query(f"SELECT {EVENT_COLUMNS} FROM events JOIN intention_events ON event = events.id "
+                          f"WHERE intention = ? ORDER BY intention_events.id", (intention_id,))
+        return [self.get_cached("event", row[0]) or self.create_event(row) for row in rows]
+
+    def load(self, kind: str, condition: str, parameters: tuple, limit: int = -1) -> list:
+        return {"im": self.load_ims, "intention": self.load_intentions, "event": self.load_events}[kind](
+            condition, parameters, limit)
+
+    def load_instructions(self, im_id: int) -> list[Instruction]:
+        return [Instruction(*row) for row in
+                self.query(f"SELECT {INSTRUCTION_COLUMNS} FROM instructions WHERE im = ? ORDER BY id", (im_id,))]
+
+    def create_im(self, row: tuple) -> IntendedMeans:
+        im = StoredIntendedMeans.__new__(StoredIntendedMeans)
+        im.store = self
+        im.id, im.intention_id, im.start, im.end, im.res = row[:5]
+        im.failure_reason = SqliteStore.get_failure_reason(row)
+        im.file, im.line, im.plan, im.trigger, im.context = row[9], row[10], self.plans[row[11]], row[12], row[13]
+        im.parent_id, im.event_id = row[14], row[15]
+        return self.cache("im", im)
+
+    @staticmethod
+    def get_failure_reason(row: tuple) -> Optional[FailureReason]:
+        return None if row[6] is None else FailureReason(*row[5:9])
+
+    def create_intention(self, row: tuple) -> Intention:
+        intention = StoredIntention.__new__(StoredIntention)
+        intention.store = self
+        intention.root_im = None
+        intention.id, intention.start, intention.end = row
+        return self.cache("intention", intention)
+
+    def create_event(self, row: tuple) -> BDIEvent:
+        event = StoredEvent.__new__(StoredEvent)
+        event.store = self
+        event.id, event.parent_id, event.name = row[:3]
+        event.type = EventType(row[3])
+        event.cycle_added, event.cycle_selected = row[4:]
+        return self.cache("event", event)
+
+    def beliefs_at(self, cycle: int) -> set[str]:
+        # the last snapshot up to the cycle and the changes after it, like BeliefIndex.beliefs_at
+        snapshot = self.query("SELECT id, first_change FROM snapshots WHERE cycle <= ? ORDER BY cycle DESC, id DESC "
+                              "LIMIT 1", (cycle,))
+        beliefs = set()
+        first_change = 0
+        if snapshot:
+            snapshot_id, first_change = snapshot[0]
+            beliefs.update(belief for belief, in
+                           self.query("SELECT belief FROM snapshot_beliefs WHERE snapshot = ?", (snapshot_id,)))
+        # the first change after the cycle, MIN(id) would scan the table instead of using the index on the cycles
+        end = self.query("SELECT id FROM beliefs WHERE cycle > ? ORDER BY cycle, id LIMIT 1", (cycle,))
+        for added, belief in self.query("SELECT added, belief FROM beliefs WHERE id >= ? AND id < ? ORDER BY id",
+                                        (first_change, end[0][0] if end else OPEN)):
+            if added:
+                beliefs.add(belief)
+            else:
+                beliefs.discard(belief)
+        return beliefs
+
+    def get_belief_changes(self, condition: str, parameters: tuple, limit: int = -1) -> list[BeliefChange]:
+        return [BeliefChange(cycle, bool(added), belief) for cycle, added, belief in
+                self.query(f"SELECT cycle, added, belief FROM beliefs WHERE {condition} ORDER BY id LIMIT ?",
+                           (*parameters, limit))]
+
+    def get_changes_between(self, cycle1: int, cycle2: int) -> list[CycleChanges]:
+        # the changes of the cycles after cycle1 up to cycle2, like ChangeLog.between
+        buckets: dict[int, CycleChanges] = {}
+
+        def bucket(cycle: int) -> CycleChanges:
+            if cycle not in buckets:
+                buckets[cycle] = CycleChanges(cycle)
+            return buckets[cycle]
+
+        for change in self.get_belief_changes("cycle > ? AND cycle <= ?", (cycle1, cycle2)):
+            bucket(change.cycle).beliefs.append(change)
+        for im in self.load_ims("start_cycle > ? AND start_cycle <= ?", (cycle1, cycle2)):
+            bucket(im.start).ims_started.append(im)
+        for im in self.load_ims("end_cycle > ? AND end_cycle <= ?", (cycle1, cycle2)):
+            bucket(im.end).ims_ended.append(im)
+        for condition, attribute in (("start_cycle", "start"), ("end_cycle", "end")):
+            for intention in self.load_intentions(f"{condition} > ? AND {condition} <= ?", (cycle1, cycle2)):
+                changes = bucket(getattr(intention, attribute))
+                if not changes.intentions:
+                    changes.intentions = []
+                changes.intentions.append(intention)
+        return [buckets[cycle] for cycle in sorted(buckets)]
+
+
+class BeliefSnapshots:
+    # collects the belief changes of an ingest and writes a snapshot of the belief base after about as many changes
+    # as it holds, the same rule as BeliefIndex
+    def __init__(self, store: SqliteStore):
+        self.store = store
+        self.rows: list[tuple] = []
+        query = store.connection.execute
+        self.next_id = query("SELECT COALESCE(MAX(id) + 1, 0) FROM beliefs").fetchone()[0]
+        self.next_snapshot = query("SELECT COALESCE(MAX(id) + 1, 0) FROM snapshots").fetchone()[0]
+        last = query("SELECT cycle FROM beliefs ORDER BY id DESC LIMIT 1").fetchone()
+        self.prev_cycle = last[0] if last else -1
+        self.live = store.beliefs_at(self.prev_cycle) if last else set()
+        last_snapshot = query("SELECT first_change FROM snapshots ORDER BY id DESC LIMIT 1").fetchone()
+        self.since_snapshot = self.next_id - (last_snapshot[0] if last_snapshot else 0)
+
+    def add(self, cycle: int, added: bool, belief: str):
+        if cycle != self.prev_cycle and self.since_snapshot >= self.get_interval():
+            self.flush()
+            self.store.connection.execute("INSERT INTO snapshots VALUES (?, ?, ?)",
+                                          (self.next_snapshot, self.prev_cycle, self.next_id))
+            self.store.connection.executemany("INSERT INTO snapshot_beliefs VALUES (?, ?)",
+                                              ((self.next_snapshot, live) for live in self.live))
+            self.next_snapshot += 1
+            self.since_snapshot = 0
+        if added:
+            self.live.add(belief)
+        else:
+            self.live.discard(belief)
+        self.rows.append((self.next_id, cycle, added, belief))
+        self.next_id += 1
+        self.since_snapshot += 1
+        self.prev_cycle = cycle
+
+    def get_interval(self) -> int:
+        if self.store.snapshot_interval > 0:
+            return self.store.snapshot_interval
+        return max(SqliteStore.min_snapshot_interval, len(self.live))
+
+    def flush(self):
+        self.store.connection.executemany("INSERT INTO beliefs VALUES (?, ?, ?, ?)", self.rows)
+        self.rows = []
+
+
+class StoreWriter(LogHandler):
+    # writes what parse_log reads into the tables of a SqliteStore, committing every batch_cycles cycles
+    def __init__(self, store: SqliteStore):
+        self.store = store
+        self.execute = store.connection.execute
+        self.log_offset = store.log_offset
+        self.active_actions = {int(intention_id): instruction_id for intention_id, instruction_id in
+                               (store.get_meta("active_actions") or {}).items()}
+        self.snapshots = BeliefSnapshots(store)
+        self.cycles_read = 0
+        self.first_cycle = -1
+
+    def add_plans(self, plans: dict[str, dict]):
+        self.execute("DELETE FROM plans")
+        self.store.connection.executemany(
+            "INSERT INTO plans VALUES (?, ?, ?, ?, ?, ?, 0)",
+            [(label, pd["trigger"], pd.get("ctx", "T"), pd["body"], pd["file"], pd["line"])
+             for label, pd in plans.items()])
+
+    def add_intention(self, intention_id: int, nr: int):
+        self.execute("INSERT INTO intentions VALUES (?, ?, ?)", (intention_id, nr, OPEN))
+
+    def add_im(self, im_data: dict, nr: int):
+        self.execute("INSERT INTO intended_means VALUES (?, ?, ?, ?, '?', NULL, NULL, NULL, NULL, ?, ?, ?, ?, ?, NULL, "
+                     "NULL)", (im_data["id"], im_data["i"], nr, OPEN, im_data["file"], im_data["line"],
+                               im_data["plan"], im_data["trigger"], im_data.get("ctx", "T")))
+
+    def get_event_parent(self, event_id: int) -> Optional[int]:
+        return self.execute("SELECT parent FROM events WHERE id = ?", (event_id,)).fetchone()[0]
+
+    def get_intention_id(self, im_id: int) -> int:
+        return self.execute("SELECT intention FROM intended_means WHERE id = ?", (im_id,)).fetchone()[0]
+
+    def add_event(self, event_data: dict, event_type: EventType, parent_im_id: Optional[int], nr: int):
+        self.execute("INSERT INTO events VALUES (?, ?, ?, ?, ?, -1)",
+                     (event_data["id"], parent_im_id, event_data["t"], event_type.value, nr))
+        if parent_im_id is not None:
+            self.execute("INSERT INTO intention_events (intention, event) VALUES (?, ?)",
+                         (self.get_intention_id(parent_im_id), event_data["id"]))
+
+    def end_action(self, intention_id: int, nr: int):
+        self.execute("UPDATE instructions SET end_cycle = ? WHERE id = ?", (nr, self.active_actions.pop(intention_id)))
+
+    def add_instruction(self, instr_data: dict, unifier: Optional[str], action: bool, nr: int):
+        instruction_id = self.execute(
+            "INSERT INTO instructions (im, file, line, text, cycle, type, end_cycle, result, unifier) "
+            "VALUES (?, ?, ?, ?, ?, ?, -1, ?, ?)",
+            (instr_data["im"], instr_data["file"], instr_data["line"], instr_data["instr"], nr, instr_data["type"],
+             instr_data.get("res", ""), unifier if unifier is not None else "{}")).lastrowid
+        if action:
+            self.active_actions[self.get_intention_id(instr_data["im"])] = instruction_id
+
+    def end_im(self, im_data: dict, nr: int):
+        reason = FailureReason.from_jason_dict(im_data["reason"]) if "reason" in im_data else None
+        self.execute("UPDATE intended_means SET end_cycle = ?, res = ?, reason_msg = ?, reason_type = ?, "
+                     "reason_src = ?, reason_line = ? WHERE id = ?",
+                     (nr, im_data["res"], *((reason.msg, reason.type, reason.src, reason.line) if reason
+                                            else (None, None, None, None)), im_data["id"]))
+
+    def end_intention(self, intention_id: int, nr: int):
+        self.execute("UPDATE intentions SET end_cycle = ? WHERE id = ?", (nr, intention_id))
+
+    def select_event(self, event_id: int, intention_id: Optional[int], im_ids: list[int], nr: int):
+        execute = self.execute
+        event_type, parent_im_id = execute("SELECT type, parent FROM events WHERE id = ?", (event_id,)).fetchone()
+        execute("UPDATE events SET cycle_selected = ? WHERE id = ?", (nr, event_id))
+        if event_type != EventType.SUB_GOAL.value and intention_id is not None:  # new intention
+            execute("INSERT INTO intention_events (intention, event) VALUES (?, ?)", (intention_id, event_id))
+        for im_id in im_ids:
+            execute("UPDATE intended_means SET event = ?, parent = ? WHERE id = ?", (event_id, parent_im_id, im_id))
+
+    def change_belief(self, nr: int, added: bool, belief: str):
+        self.snapshots.add(nr, added, belief)
+
+    def line_read(self, log_offset: int, nr: Optional[int]):
+        self.log_offset = log_offset
+        if nr is None:
+            return
+        if self.first_cycle < 0:
+            self.first_cycle = nr
+        self.cycles_read += 1
+        if self.cycles_read % SqliteStore.batch_cycles == 0:
+            self.save()
+            self.execute("COMMIT")
+            self.execute("BEGIN")
+
+    def save(self):
+        # the state needed to continue reading, committed with the rows
+        self.snapshots.flush()
+        self.store.set_meta("log_offset", self.log_offset)
+        self.store.set_meta("active_actions", self.active_actions)
+
+
+class StoredTable(Mapping):
+    # id -> object of a table of a SqliteStore, "im", "intention" or "event", in the order of the ids
+    page_size = 1000
+
+    def __init__(self, store: SqliteStore, kind: str, table: str):
+        self.store = store
+        self.kind = kind
+        self.table = table
+
+    def __getitem__(self, item_id: int):
+        item = self.store.get(self.kind, item_id)
+        if item is None:
+            raise KeyError(item_id)
+        return item
+
+    def __len__(self) -> int:
+        return self.store.counts[self.table]
+
+    def __iter__(self) -> Iterator[int]:
+        return (item.id for item in self.iter_values())
+
+    def values(self) -> "StoredValues":
+        return StoredValues(self)
+
+    def iter_values(self) -> Iterator:
+        # page by page, no cursor stays open between the pages
+        last_id = -sys.maxsize
+        while True:
+            page = self.store.load(self.kind, "id > ?", (last_id,), StoredTable.page_size)
+            yield from page
+            if len(page) < StoredTable.page_size:
+                return
+            last_id = page[-1].id
+
+
+class StoredValues:
+    def __init__(self, table: StoredTable):
+        self.table = table
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __iter__(self) -> Iterator:
+        return self.table.iter_values()
+
+
+class StoredBeliefs(Sequence):
+    # the belief changes in the order of the log
+    def __init__(self, store: SqliteStore):
+        self.store = store
+
+    def __len__(self) -> int:
+        return self.store.counts["beliefs"]
+
+    def __getitem__(self, index: int) -> BeliefChange:
+        if index < 0:
+            index += len(self)
+        changes = self.store.get_belief_changes("id = ?", (index,))
+        if not changes:
+            raise IndexError(index)
+        return changes[0]
+
+    def __iter__(self) -> Iterator[BeliefChange]:
+        for first in range(0, len(self), StoredTable.page_size):
+            yield from self.store.get_belief_changes("id >= ? AND id < ?", (first, first + StoredTable.page_size))
+
+
+class StoredBeliefIndex:
+    def __init__(self, store: SqliteStore):
+        self.store = store
+
+    def beliefs_at(self, cycle: int) -> set[str]:
+        return self.store.beliefs_at(cycle)
+
+    def update(self):
+        pass
+
+
+class StoredIntervalIndex:
+    # intentions or IMs active in a cycle, like IntervalIndex
+    def __init__(self, store: SqliteStore, kind: str):
+        self.store = store
+        self.kind = kind
+
+    def active_at(self, cycle: int) -> list:
+        return self.store.load(self.kind, "start_cycle <= ? AND end_cycle >= ?", (cycle, cycle))
+
+    def overlapping(self, start: int, end: int) -> list:
+        return self.store.load(self.kind, "start_cycle <= ? AND end_cycle >= ?", (end, start))
+
+    def extend(self, _):
+        pass
+
+
+class StoredChangeLog:
+    def __init__(self, store: SqliteStore):
+        self.store = store
+
+    def between(self, cycle1: int, cycle2: int) -> list[CycleChanges]:
+        return self.store.get_changes_between(cycle1, cycle2)
+
+    def last_cycle(self) -> int:
+        return self.store.counts["last_cycle"]
+
+
+class StoredBeliefTimeline:
+    # the intervals of one belief at a time, from its changes (found through the index on the beliefs)
+    def __init__(self, store: SqliteStore):
+        self.store = store
+
+    def get_timeline(self, belief: str) -> BeliefTimeline:
+        return BeliefTimeline(self.store.get_belief_changes("belief = ?", (belief,)))
+
+    def get_intervals(self, belief: str) -> list[tuple[int, int]]:
+        return self.get_timeline(belief).get_intervals(belief)
+
+    def holds_at(self, belief: str, cycle: int) -> bool:
+        return self.get_timeline(belief).holds_at(belief, cycle)
+
+    def overlapping(self, belief: str, first: int, last: int) -> list[tuple[int, int]]:
+        return self.get_timeline(belief).overlapping(belief, first, last)
+
+    def holds_throughout(self, belief: str, first: int, last: int) -> bool:
+        return self.get_timeline(belief).holds_throughout(belief, first, last)
+
+    def update(self):
+        pass
+
+
+def ingest_agent_log(log_path: str, snapshot_interval: int, profiling: bool = False) -> tuple[None, Optional[dict]]:
+    # runs in a worker process of AgentRepository.load_agents, like parse_agent_log, the data goes into the store
+    profiler.reset()
+    profiler.enabled = profiling
+    profiler.profiled_phases = set()
+    store = SqliteStore(log_path, snapshot_interval)
+    with profiler.phase("sqlite.ingest"):
+        profiler.count("cycles_parsed", store.ingest())
+    store.close()
+    return None, profiler.snapshot() if profiling else None
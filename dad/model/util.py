@@ -0,0 +1,37 @@
+import gc
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+
+@contextmanager
+def paused_gc():
+    # bulk loading creates millions of objects without garbage, the cyclic collector only slows it down
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class LoadCancelled(Exception):
+    # raised by a load that was cancelled through its cancelled callback, nothing of it is kept
+    pass
+
+
+class LoadProgress:
+    # reports how much of a log was read (bytes of the file on disk) and checks whether the load was cancelled,
+    # parse loops call update every interval cycles
+    interval = 1000
+
+    def __init__(self, progress: Optional[Callable[[int, int], None]] = None,
+                 cancelled: Optional[Callable[[], bool]] = None):
+        self.progress = progress
+        self.cancelled = cancelled
+
+    def update(self, done: int, total: int):
+        if self.cancelled and self.cancelled():
+            raise LoadCancelled()
+        if self.progress:
+            self.progress(done, total)
@@ -0,0 +1,165 @@
+import cProfile
+import json
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows, peak memory is not reported there
+    resource = None
+
+NO_PHASE = nullcontext()
+
+
+class PhaseStats:
+    __slots__ = ("calls", "seconds", "max_seconds", "peak_rss")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.peak_rss = 0  # bytes, peak of the process when the phase ended
+
+    def add(self, calls: int, seconds: float, max_seconds: float, peak_rss: int):
+        self.calls += calls
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, max_seconds)
+        self.peak_rss = max(self.peak_rss, peak_rss)
+
+    def to_dict(self) -> dict:
+        return {"calls": self.calls, "seconds": self.seconds, "max_seconds": self.max_seconds,
+                "peak_rss_mb": self.peak_rss / 1e6}
+
+
+class Profiler:
+    # wall time per phase, counters and peak memory, enabled with "profiling": true in config.json
+    # phases listed in "profile_phases" additionally run under cProfile
+    # while disabled, phase() hands out a shared no-op context manager and count() returns at once
+    def __init__(self):
+        self.enabled = False
+        self.profiled_phases: set[str] = set()
+        self.phases: dict[str, PhaseStats] = {}
+        self.counters: dict[str, int] = {}
+        self.profiles: dict[str, pstats.Stats] = {}
+        self.lock = threading.Lock()  # phases also run in the loader's worker threads
+
+    def configure(self, config):
+        self.enabled = bool(config.get("profiling"))
+        self.profiled_phases = set(config.get("profile_phases") or [])
+
+    def phase(self, name: str):
+        if not self.enabled:
+            return NO_PHASE
+        return self.measure(name)
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        profile = None
+        if name in self.profiled_phases:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:  # another profiler is active, e.g. a profiled phase around this one
+                profile = None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            if profile is not None:
+                profile.disable()
+            with self.lock:
+                self.phases.setdefault(name, PhaseStats()).add(1, seconds, seconds, get_peak_rss())
+                if profile is not None:
+                    if name in self.profiles:
+                        self.profiles[name].add(profile)
+                    else:
+                        self.profiles[name] = pstats.Stats(profile)
+
+    def timed(self, name: str, function: Callable) -> Callable:
+        # for functions called too often to be a phase each time (e.g. decoding a log line):
+        # their time is summed up into one phase, the function is returned unchanged while disabled
+        if not self.enabled:
+            return function
+        with self.lock:
+            stats = self.phases.setdefault(name, PhaseStats())
+        clock = time.perf_counter
+
+        def timed_function(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats.calls += 1
+                stats.seconds += clock() - start
+        return timed_function
+
+    def count(self, name: str, n: int = 1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def count_all(self, counts: dict[str, int], prefix: str = ""):
+        if not self.enabled:
+            return
+        with self.lock:
+            for name, n in counts.items():
+                self.counters[prefix + name] = self.counters.get(prefix + name, 0) + n
+
+    def merge(self, snapshot: Optional[dict]):
+        # adds the phases and counters of a snapshot, e.g. one taken in a worker process
+        if not snapshot:
+            return
+        with self.lock:
+            for name, phase in snapshot["phases"].items():
+                self.phases.setdefault(name, PhaseStats()).add(
+                    phase["calls"], phase["seconds"], phase["max_seconds"], int(phase["peak_rss_mb"] * 1e6))
+            for name, n in snapshot["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self):
+        with self.lock:
+            self.phases.clear()
+            self.counters.clear()
+            self.profiles.clear()
+
+    def snapshot(self, profile_rows: int = 0) -> dict:
+        # profile_rows: number of functions listed per profiled phase, by cumulative time
+        with self.lock:
+            result = {
+                "phases": {name: phase.to_dict() for name, phase in self.phases.items()},
+                "counters": dict(self.counters),
+                "peak_rss_mb": get_peak_rss() / 1e6,
+                "peak_rss_children_mb": get_peak_rss(children=True) / 1e6
+            }
+            if profile_rows:
+                result["profiles"] = {name: Profiler.get_top_functions(stats, profile_rows)
+                                      for name, stats in self.profiles.items()}
+        return result
+
+    @staticmethod
+    def get_top_functions(stats: pstats.Stats, rows: int) -> list[dict]:
+        entries = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:rows]
+        return [{"function": f"{file}:{line}({function})", "calls": calls, "primitive_calls": primitive_calls,
+                 "seconds": own_time, "cumulative_seconds": cumulative_time}
+                for (file, line, function), (primitive_calls, calls, own_time, cumulative_time, _) in entries]
+
+    def export(self, path: str, profile_rows: int = 50):
+        with open(path, "w") as export_file:
+            json.dump(self.snapshot(profile_rows), export_file, indent=2)
+
+
+def get_peak_rss(children: bool = False) -> int:
+    # peak resident memory in bytes, 0 where unknown
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+profiler = Profiler()
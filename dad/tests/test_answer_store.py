@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+import unittest
+
+from debug.answer_store import AnswerStore, ANSWER_FILE
+from model.bdi import IntendedMeans, Plan
+
+
+def create_im(trigger: str, res: str = "achieved", plan: str = "p1") -> IntendedMeans:
+    return IntendedMeans(0, None, 0, 0, res, None, "", 0, [], Plan(plan, trigger, "T", "", "", 0), trigger, "", [],
+                         None, None)
+
+
+class AnswerStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, ANSWER_FILE)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_answers_are_loaded_in_a_later_session(self):
+        store = AnswerStore.open(self.folder.name)
+        store.put(create_im("+!g(1)"), True)
+        store.put(create_im("+!g(2)"), False)
+        store.put(create_im("+!g(2)", "failed"), True)
+        store = AnswerStore.open(self.folder.name)
+        self.assertEqual(len(store), 3)
+        self.assertTrue(store.get(create_im("+!g(1)")))
+        self.assertFalse(store.get(create_im("+!g(2)")))
+        self.assertTrue(store.get(create_im("+!g(2)", "failed")))
+        self.assertIsNone(store.get(create_im("+!g(3)")))
+        self.assertIsNone(store.get(create_im("+!g(1)", plan="p2")))
+
+    def test_annotations_and_whitespace_are_ignored(self):
+        store = AnswerStore.open(self.folder.name)
+        store.put(create_im("+!g(a, b)[source(self)]"), True)
+        self.assertTrue(store.get(create_im("+!g(a,b)")))
+
+    def test_later_answers_override(self):
+        store = AnswerStore.open(self.folder.name)
+        im = create_im("+!g(1)")
+        store.put(im, True)
+        store.put(im, True)  # unchanged, not written again
+        store.put(im, False)
+        self.assertEqual(store.lines, 2)
+        self.assertFalse(AnswerStore.open(self.folder.name).get(im))
+
+    def test_cut_off_line_is_skipped(self):
+        with open(self.path, "w") as answer_file:
+            answer_file.write(json.dumps(["p1", "+!g(1)", "achieved", True]) + "\n")
+            answer_file.write('["p1", "+!g(2)", "ach')
+        store = AnswerStore.open(self.folder.name)
+        self.assertEqual(len(store), 1)
+        self.assertTrue(store.get(create_im("+!g(1)")))
+
+    def test_overridden_answers_are_compacted_on_load(self):
+        with open(self.path, "w") as answer_file:
+            for i in range(3000):
+                answer_file.write(json.dumps(["p1", f"+!g({i % 10})", "achieved", i % 3 == 0]) + "\n")
+        store = AnswerStore.open(self.folder.name)
+        self.assertEqual(len(store), 10)
+        self.assertEqual(store.lines, 10)
+        with open(self.path) as answer_file:
+            self.assertEqual(len(answer_file.readlines()), 10)
+        reloaded = AnswerStore.open(self.folder.name)
+        self.assertEqual(reloaded.answers, store.answers)
+        self.assertEqual(store.get(create_im("+!g(9)")), 2999 % 3 == 0)
+        self.assertEqual(os.listdir(self.folder.name), [ANSWER_FILE])
+
+
+if __name__ == "__main__":
+    unittest.main()
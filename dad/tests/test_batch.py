@@ -0,0 +1,98 @@
+import tempfile
+import unittest
+
+from benchmarks.synthetic import write_trace
+from config import StaticConfig
+from model.agent import AgentRepository
+from debug.batch import run_batch, debug_agent
+from debug.navigation_strategy import STRATEGIES, Result
+from debug.oracle import FailureOracle, Rule, RuleOracle
+from debug.session import DebuggingSession, find_failed_goals
+
+
+class BatchDebuggingTest(unittest.TestCase):
+    # run from dad: python -m unittest discover tests
+    @classmethod
+    def setUpClass(cls):
+        cls.folder = tempfile.TemporaryDirectory()
+        cls.names = write_trace(cls.folder.name, 2, 1500, 5)
+        cls.repo = AgentRepository(StaticConfig({"current_folder": cls.folder.name}))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.folder.cleanup()
+
+    def get_goals(self, name: str) -> list[int]:
+        goals = find_failed_goals(self.repo.get_agent_data(name))
+        self.assertTrue(goals)
+        return goals
+
+    def test_strategies_agree_with_a_scripted_oracle(self):
+        for name in self.names:
+            for goal in self.get_goals(name):
+                im = self.repo.get_agent_data(name).intended_means[goal]
+                bug = im
+                while bug.children:  # the bug is the last IM on the path through the last children
+                    bug = bug.children[-1]
+                rules = []
+                invalid = bug
+                while invalid is not im.parent:
+                    rules.append({"id": invalid.id, "answer": "invalid"})
+                    invalid = invalid.parent
+                oracle = RuleOracle.from_dict({"default": "valid", "rules": rules})
+                for strategy in STRATEGIES:
+                    report = DebuggingSession(self.repo, name, goal, strategy).run(oracle)
+                    self.assertTrue(report["complete"])
+                    self.assertEqual(report["bug"]["im"], bug.id, (name, goal, strategy))
+                    self.assertEqual(report["questions"], len(report["answers"]))
+
+    def test_failure_oracle_locates_an_invalid_goal_with_valid_subgoals(self):
+        oracle = FailureOracle()
+        for name in self.names:
+            data = self.repo.get_agent_data(name)
+            for goal in self.get_goals(name):
+                for strategy in STRATEGIES:
+                    report = DebuggingSession(self.repo, name, goal, strategy).run(oracle)
+                    bug = data.intended_means[report["bug"]["im"]]
+                    self.assertEqual(oracle.ask(bug), Result.Invalid)
+                    self.assertTrue(all(oracle.ask(child) == Result.Valid for child in bug.children))
+
+    def test_question_limit(self):
+        goal = self.get_goals(self.names[0])[0]  # failed, with subgoals: more than one question
+        report = DebuggingSession(self.repo, self.names[0], goal, "simple").run(FailureOracle(), max_questions=1)
+        self.assertFalse(report["complete"])
+        self.assertEqual(report["questions"], 1)
+        self.assertIsNone(report["bug"])
+
+    def test_unknown_goal(self):
+        with self.assertRaises(KeyError):
+            DebuggingSession(self.repo, self.names[0], -5)
+
+    def test_rule_oracle(self):
+        data = self.repo.get_agent_data(self.names[0])
+        im = data.intended_means[self.get_goals(self.names[0])[0]]
+        self.assertEqual(RuleOracle([]).ask(im), Result.Valid)
+        self.assertEqual(RuleOracle([], Result.Invalid).ask(im), Result.Invalid)
+        oracle = RuleOracle.from_dict({"default": "valid", "rules": [
+            {"trigger": "^$", "answer": "valid"},
+            {"plan": im.plan.label, "res": im.res, "answer": "invalid"},
+            {"id": im.id, "answer": "valid"}]})
+        self.assertEqual(oracle.ask(im), Result.Invalid)  # the first matching rule decides
+        self.assertTrue(Rule("valid", trigger=im.trigger[2:5]).matches(im))  # the trigger is searched
+        self.assertFalse(Rule("valid", im_id=im.id, res=["other"]).matches(im))
+        with self.assertRaises(ValueError):
+            Rule("maybe")
+
+    def test_batch_matches_sessions(self):
+        reports = run_batch(self.folder.name, strategy="divide_and_query", workers=1)
+        expected = [report for name in self.names
+                    for report in debug_agent(self.folder.name, name, None, None, "divide_and_query")]
+        self.assertEqual([(report["agent"], report["goal"], report["bug"]) for report in reports],
+                         [(report["agent"], report["goal"], report["bug"]) for report in expected])
+        reports = run_batch(self.folder.name, goals={self.names[1]: [-5]}, workers=1)
+        self.assertEqual(len(reports), 1)
+        self.assertIn("error", reports[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import random
+import unittest
+
+from model.bdi import BeliefChange
+from model.index import BeliefIndex
+
+
+def random_changes(rng: random.Random, cycles: int, beliefs: int) -> list[BeliefChange]:
+    # like a log: per cycle the additions (of false beliefs) come before the removals (of true ones)
+    true = set()
+    changes = []
+    for cycle in range(cycles):
+        if rng.random() < 0.3:
+            continue
+        for _ in range(rng.randrange(4)):
+            belief = f"b({rng.randrange(beliefs)})"
+            if belief not in true:
+                true.add(belief)
+                changes.append(BeliefChange(cycle, True, belief))
+        for belief in rng.sample(sorted(true), min(len(true), rng.randrange(3))):
+            true.discard(belief)
+            changes.append(BeliefChange(cycle, False, belief))
+    return changes
+
+
+def replay(changes: list[BeliefChange], cycle: int) -> set[str]:
+    beliefs = set()
+    for change in changes:
+        if change.cycle > cycle:
+            break
+        if change.added:
+            beliefs.add(change.belief)
+        else:
+            beliefs.discard(change.belief)
+    return beliefs
+
+
+class BeliefIndexTest(unittest.TestCase):
+    def test_beliefs_at_matches_replay(self):
+        rng = random.Random(1)
+        for interval in (0, 1, 7, 10000):
+            changes = random_changes(rng, 500, 40)
+            index = BeliefIndex(changes, interval)
+            for cycle in range(-1, 502):
+                self.assertEqual(index.beliefs_at(cycle), replay(changes, cycle), (interval, cycle))
+
+    def test_update_reads_appended_changes(self):
+        changes = random_changes(random.Random(2), 600, 30)
+        split = next(i for i, change in enumerate(changes) if change.cycle >= 300)
+        appended = changes[split:]
+        del changes[split:]
+        index = BeliefIndex(changes, 5)
+        changes.extend(appended)
+        index.update()
+        for cycle in range(0, 601, 3):
+            self.assertEqual(index.beliefs_at(cycle), replay(changes, cycle), cycle)
+
+    def test_no_changes(self):
+        self.assertEqual(BeliefIndex([]).beliefs_at(10), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
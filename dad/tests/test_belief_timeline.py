@@ -0,0 +1,84 @@
+import random
+import unittest
+
+from model.bdi import BeliefChange
+from model.index import BeliefTimeline
+
+
+def random_changes(rng: random.Random, cycles: int, beliefs: int) -> list[BeliefChange]:
+    # like a log: per cycle the additions (of false beliefs) come before the removals (of true ones), so a belief can
+    # be removed in the cycle it was added in, or added again in the cycle after its removal
+    true = set()
+    changes = []
+    for cycle in range(cycles):
+        for _ in range(rng.randrange(3)):
+            belief = f"b({rng.randrange(beliefs)})"
+            if belief not in true:
+                true.add(belief)
+                changes.append(BeliefChange(cycle, True, belief))
+        for belief in rng.sample(sorted(true), min(len(true), rng.randrange(3))):
+            true.discard(belief)
+            changes.append(BeliefChange(cycle, False, belief))
+    return changes
+
+
+def replay(changes: list[BeliefChange], cycles: int) -> list[set[str]]:
+    # the beliefs at the end of each cycle
+    states = []
+    beliefs = set()
+    i = 0
+    for cycle in range(cycles):
+        while i < len(changes) and changes[i].cycle == cycle:
+            (beliefs.add if changes[i].added else beliefs.discard)(changes[i].belief)
+            i += 1
+        states.append(set(beliefs))
+    return states
+
+
+class BeliefTimelineTest(unittest.TestCase):
+    cycles = 300
+
+    def setUp(self):
+        rng = random.Random(1)
+        self.rng = rng
+        self.changes = random_changes(rng, self.cycles, 12)
+        self.states = replay(self.changes, self.cycles)
+        self.beliefs = sorted({change.belief for change in self.changes}) + ["b(missing)"]
+
+    def check(self, timeline: BeliefTimeline, cycles: int):
+        for belief in self.beliefs:
+            holds = [belief in self.states[cycle] for cycle in range(cycles)]
+            for cycle in range(cycles):
+                self.assertEqual(timeline.holds_at(belief, cycle), holds[cycle], (belief, cycle))
+            for _ in range(50):
+                first = self.rng.randrange(cycles)
+                last = min(cycles - 1, first + self.rng.randrange(20))
+                self.assertEqual(timeline.holds_throughout(belief, first, last), all(holds[first:last + 1]))
+                intervals = timeline.overlapping(belief, first, last)
+                self.assertTrue(all(start <= last and end >= first for start, end in intervals))
+                self.assertEqual({cycle for start, end in intervals for cycle in range(max(start, first),
+                                                                                         min(end, last) + 1)},
+                                 {cycle for cycle in range(first, last + 1) if holds[cycle]}, (belief, first, last))
+
+    def test_matches_replay(self):
+        self.check(BeliefTimeline(self.changes), self.cycles)
+
+    def test_intervals_are_separate_and_sorted(self):
+        timeline = BeliefTimeline(self.changes)
+        for belief in self.beliefs:
+            intervals = timeline.get_intervals(belief)
+            self.assertTrue(all(start <= end for start, end in intervals))
+            self.assertTrue(all(end + 1 < next_start for (_, end), (next_start, _) in zip(intervals, intervals[1:])))
+
+    def test_update_reads_appended_changes(self):
+        split = next(i for i, change in enumerate(self.changes) if change.cycle >= self.cycles // 2)
+        changes = self.changes[:split]
+        timeline = BeliefTimeline(changes)
+        self.check(timeline, self.cycles // 2)
+        changes.extend(self.changes[split:])
+        timeline.update()
+        self.check(timeline, self.cycles)
+
+
+if __name__ == "__main__":
+    unittest.main()
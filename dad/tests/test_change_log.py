@@ -0,0 +1,70 @@
+import os
+import random
+import sys
+import unittest
+
+from model.agent import AgentRepository
+from model.bdi import BeliefChange
+from model.index import ChangeLog
+
+EXAMPLE_FOLDER = os.path.join(os.path.dirname(__file__), "..", "..", "examples", "blocksworld")
+
+
+class ChangeLogTest(unittest.TestCase):
+    def test_between_matches_filter(self):
+        rng = random.Random(1)
+        changes = [BeliefChange(rng.randrange(100), rng.random() < 0.5, f"b({i})") for i in range(300)]
+        log = ChangeLog()
+        for change in changes:  # out of order, the cycles are sorted when asked for
+            log.belief_changed(change)
+        for _ in range(200):
+            cycle1, cycle2 = sorted((rng.randrange(-5, 105), rng.randrange(-5, 105)))
+            buckets = log.between(cycle1, cycle2)
+            self.assertEqual([bucket.cycle for bucket in buckets],
+                             sorted({change.cycle for change in changes if cycle1 < change.cycle <= cycle2}))
+            self.assertEqual(sorted(change.belief for bucket in buckets for change in bucket.beliefs),
+                             sorted(change.belief for change in changes if cycle1 < change.cycle <= cycle2))
+
+
+class DiffTest(unittest.TestCase):
+    # run from dad: python -m unittest discover tests
+    def setUp(self):
+        self.repo = AgentRepository({"current_folder": EXAMPLE_FOLDER, "parse_cache": False})
+        self.name = "new_blocks_agent"
+        self.data = self.repo.get_agent_data(self.name)
+        ims = self.data.intended_means.values()
+        self.last = max([change.cycle for change in self.data.beliefs] +
+                        [cycle for im in ims for cycle in (im.start, im.end) if cycle != sys.maxsize])
+
+    def beliefs_at(self, cycle: int) -> set[str]:
+        beliefs = set()
+        for change in self.data.beliefs:
+            if change.cycle <= cycle:
+                (beliefs.add if change.added else beliefs.discard)(change.belief)
+        return beliefs
+
+    def test_diff_in_both_directions(self):
+        ims = self.data.intended_means.values()
+        for cycle1 in range(0, self.last + 2, 3):
+            for cycle2 in range(0, self.last + 2, 5):
+                diff = self.repo.get_diff(self.name, cycle1, cycle2)
+                first, last = min(cycle1, cycle2), max(cycle1, cycle2)
+                started = sorted(im.id for im in ims if first < im.start <= last)
+                ended = sorted(im.id for im in ims if first < im.end <= last)
+                # going back, the IMs that ended come back and the ones that started go away
+                added, achieved = (started, ended) if cycle1 <= cycle2 else (ended, started)
+                self.assertEqual(set(diff.beliefs_added), self.beliefs_at(cycle2) - self.beliefs_at(cycle1))
+                self.assertEqual(set(diff.beliefs_deleted), self.beliefs_at(cycle1) - self.beliefs_at(cycle2))
+                self.assertEqual(sorted(im.id for im in diff.goals_added), added, (cycle1, cycle2))
+                self.assertEqual(sorted(im.id for im in diff.goals_achieved), achieved, (cycle1, cycle2))
+
+    def test_diff_and_reverse_cancel(self):
+        for cycle1, cycle2 in ((0, self.last), (3, 17), (20, 21)):
+            forward = self.repo.get_diff(self.name, cycle1, cycle2)
+            backward = self.repo.get_diff(self.name, cycle2, cycle1)
+            self.assertEqual(sorted(forward.beliefs_added), sorted(backward.beliefs_deleted))
+            self.assertEqual(sorted(forward.beliefs_deleted), sorted(backward.beliefs_added))
+
+
+if __name__ == "__main__":
+    unittest.main()
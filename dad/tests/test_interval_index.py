@@ -0,0 +1,72 @@
+import random
+import sys
+import unittest
+from bisect import bisect_right
+from dataclasses import dataclass
+
+from model.index import IntervalIndex
+
+
+@dataclass
+class Item:
+    id: int
+    start: int
+    end: int
+
+
+def random_items(rng: random.Random, count: int, cycles: int) -> list[Item]:
+    items = []
+    for item_id in range(count):
+        start = rng.randrange(cycles)
+        end = sys.maxsize if rng.random() < 0.1 else start + int(rng.expovariate(0.05))
+        items.append(Item(item_id, start, end))
+    return items
+
+
+def ids(items) -> list[int]:
+    return [item.id for item in items]
+
+
+class IntervalIndexTest(unittest.TestCase):
+    def test_active_at_matches_scan(self):
+        items = random_items(random.Random(1), 1000, 400)
+        index = IntervalIndex(items)
+        for cycle in range(-1, 500):
+            expected = [item.id for item in items if item.start <= cycle <= item.end]
+            self.assertEqual(ids(index.active_at(cycle)), expected, cycle)
+
+    def test_overlapping_matches_scan(self):
+        rng = random.Random(2)
+        items = random_items(rng, 1000, 400)
+        index = IntervalIndex(items)
+        for _ in range(500):
+            start = rng.randrange(-10, 450)
+            end = start + rng.randrange(30)
+            expected = [item.id for item in items if item.start <= end and item.end >= start]
+            self.assertEqual(ids(index.overlapping(start, end)), expected, (start, end))
+
+    def test_extend_with_items_closed_later(self):
+        # a growing log: items are added open when they start, and closed in place when they end
+        final = sorted(random_items(random.Random(3), 600, 300), key=lambda x: x.start)
+        starts = [item.start for item in final]
+        index = IntervalIndex([])
+        live: list[Item] = []
+        for now in range(0, 400, 7):
+            added = [Item(item.id, item.start, sys.maxsize) for item in final[len(live):bisect_right(starts, now)]]
+            live.extend(added)
+            for item, final_item in zip(live, final):
+                if final_item.end <= now:
+                    item.end = final_item.end
+            index.extend(added)
+            for cycle in range(0, now + 1, 5):
+                self.assertEqual(ids(index.active_at(cycle)),
+                                 sorted(item.id for item in live if item.start <= cycle <= item.end), (now, cycle))
+
+    def test_empty(self):
+        index = IntervalIndex([])
+        self.assertEqual(index.active_at(0), [])
+        self.assertEqual(index.overlapping(0, 10), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
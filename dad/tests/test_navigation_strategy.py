@@ -0,0 +1,52 @@
+import random
+import unittest
+
+from benchmarks.navigation import create_im, random_tree, plant_bug
+from debug.navigation_strategy import JasonDebuggingTree, Result, STRATEGIES
+
+
+def run_strategy(strategy_class, tree: JasonDebuggingTree, invalid: set[int]) -> tuple[list[int], int]:
+    # a scripted oracle: the IMs in invalid are wrong, all others are fine
+    strategy = strategy_class(tree, None, "test")
+    asked = []
+    node = strategy.get_next()
+    while node is not None:
+        asked.append(node)
+        strategy.mark_node(node, Result.Invalid if tree.get_im(node).id in invalid else Result.Valid)
+        node = strategy.get_next()
+    return asked, strategy.final_bug
+
+
+class NavigationStrategyTest(unittest.TestCase):
+    def test_strategies_locate_the_same_bug(self):
+        rng = random.Random(1)
+        for shape in ("wide", "deep", "random"):
+            for _ in range(10):
+                ims = random_tree(rng.randrange(1, 400), rng, shape)
+                invalid = plant_bug(ims, rng, 0.05)
+                tree = JasonDebuggingTree(ims[0])
+                expected = max(tree.find(im_id) for im_id in invalid)  # the deepest invalid node
+                for name, strategy_class in STRATEGIES.items():
+                    asked, bug = run_strategy(strategy_class, tree, invalid)
+                    self.assertEqual(bug, expected, (shape, name))
+                    self.assertEqual(len(asked), len(set(asked)), (shape, name))  # nothing is asked twice
+
+    def test_no_bug_when_the_root_is_valid(self):
+        ims = random_tree(50, random.Random(2), "random")
+        tree = JasonDebuggingTree(ims[0])
+        for name, strategy_class in STRATEGIES.items():
+            self.assertEqual(run_strategy(strategy_class, tree, set()), ([0], None), name)
+
+    def test_divide_and_query_halves_a_chain(self):
+        ims = [create_im(0)]
+        for i in range(1, 1024):
+            ims.append(create_im(i, ims[-1]))
+        tree = JasonDebuggingTree(ims[0])
+        invalid = {im.id for im in ims[:700]}
+        asked, bug = run_strategy(STRATEGIES["divide_and_query"], tree, invalid)
+        self.assertEqual(bug, 699)
+        self.assertLessEqual(len(asked), 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
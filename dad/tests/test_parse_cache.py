@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from model.agent import AgentRepository, AgentData
+
+EXAMPLE_LOG = os.path.join(os.path.dirname(__file__), "..", "..", "examples", "blocksworld", "new_blocks_agent.log")
+
+
+def summarize(data: AgentData) -> tuple:
+    return (sorted(data.intentions), sorted(data.intended_means), len(data.events),
+            [(change.cycle, change.added, change.belief) for change in data.beliefs])
+
+
+class AppendDuringLoadTest(unittest.TestCase):
+    # run from dad: python -m unittest discover tests
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.name = "agent"
+        self.log_path = os.path.join(self.folder.name, self.name + ".log")
+        shutil.copyfile(EXAMPLE_LOG, self.log_path)
+        with open(self.log_path, "rb") as log_file:
+            self.lines = log_file.readlines()
+        self.parse_log = AgentRepository.parse_log
+
+    def tearDown(self):
+        AgentRepository.parse_log = staticmethod(self.parse_log)
+        self.folder.cleanup()
+
+    def load(self, parse_cache: bool) -> tuple:
+        config = {"current_folder": self.folder.name, "parse_cache": parse_cache}
+        return summarize(AgentRepository(config).get_agent_data(self.name))
+
+    def test_lines_appended_while_parsing_are_read_from_cache(self):
+        with open(self.log_path, "wb") as log_file:
+            log_file.writelines(self.lines[:40])
+        parse_log = self.parse_log
+
+        def parse_and_append(log_path, data, load_progress=None):  # the agent writes the rest right after the parser reached the end
+            cycles = parse_log(log_path, data, load_progress)
+            with open(log_path, "ab") as log_file:
+                log_file.writelines(self.lines[40:])
+            AgentRepository.parse_log = staticmethod(parse_log)
+            return cycles
+
+        AgentRepository.parse_log = staticmethod(parse_and_append)
+        self.load(True)
+        self.assertEqual(self.load(True), self.load(False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import sys
+import unittest
+
+from model.bdi import BeliefChange, BDIEvent, EventType, IntendedMeans, Instruction
+from model.search import SearchIndex, split_query
+
+
+def create_im(im_id: int, trigger: str, start: int, end: int, instructions: list[tuple[str, int]]) -> IntendedMeans:
+    return IntendedMeans(im_id, None, start, end, "achieved", None, "", 0,
+                         [Instruction("a.asl", 1, text, cycle, "action") for text, cycle in instructions], None,
+                         trigger, "", [], None, None)
+
+
+class SearchIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.ims = {im.id: im for im in (
+            create_im(1, "+!found(red)[source(self)]", 0, 5, [("drop(red)", 2), ('.print("hello world")', 3)]),
+            create_im(2, "+!found(blue)", 6, sys.maxsize, [("pick(blue, 2)", 7)]),
+            create_im(3, "+!move(a, b)", 8, 9, [("drop(a)", 9)]))}
+        self.events = {event.id: event for event in (
+            BDIEvent(10, None, "+!found(red)", EventType.GOAL_NEW_FOCUS, 0, 0),
+            BDIEvent(11, None, "+on(a,b)", EventType.BELIEF_UPDATE, 4, -1),
+            BDIEvent(12, None, "+!move(a,b)", EventType.SUB_GOAL, 8, 8))}
+        self.beliefs = [BeliefChange(1, True, "on(a,b)"), BeliefChange(3, False, "on(a,b)"),
+                        BeliefChange(4, True, "on(b,c)"), BeliefChange(6, True, "colour(red)"),
+                        BeliefChange(9, False, "colour(red)")]
+        self.index = SearchIndex(self.ims, self.events, self.beliefs)
+
+    def search(self, query: str) -> tuple[list[int], list[int], list[int]]:
+        result = self.index.search(query)
+        return [im.id for im in result.intended_means], [event.id for event in result.events], result.cycles
+
+    def test_term_patterns(self):
+        self.assertEqual(self.search("trigger:found(_)"), ([1, 2], [10], []))
+        self.assertEqual(self.search("trigger:found(red)"), ([1], [10], []))
+        self.assertEqual(self.search("trigger:found/1"), ([1, 2], [10], []))
+        self.assertEqual(self.search("trigger:move(X, X)"), ([3], [12], []))  # variables are not unified
+        self.assertEqual(self.search("trigger:+!move(a,b)"), ([3], [12], []))
+        self.assertEqual(self.search("trigger:-!move(a,b)"), ([], [], []))
+
+    def test_fields(self):
+        self.assertEqual(self.search("belief:on(a,_)"), ([], [], [1, 3]))
+        self.assertEqual(self.search("belief:+on(a,_)"), ([], [], [1]))
+        self.assertEqual(self.search("belief:-on(a,_)"), ([], [], [3]))
+        self.assertEqual(self.search("instr:drop(_)"), ([1, 3], [], [2, 9]))
+        self.assertEqual(self.search('instr:"hello world"'), ([1], [], [3]))
+        self.assertEqual(self.search("red"), ([1], [10], [2, 6, 9]))
+
+    def test_terms_restrict_their_own_results(self):
+        self.assertEqual(self.search("trigger:found(_) instr:drop(_)"), ([1], [10], [2, 9]))
+        self.assertEqual(self.search("found(_) cycle:5-8"), ([1, 2], [], []))
+        self.assertEqual(self.search("red cycle:6"), ([], [], [6]))
+
+    def test_update_indexes_appended_data(self):
+        self.ims[2].instructions.append(Instruction("a.asl", 2, "drop(blue)", 12, "action"))
+        self.ims[4] = create_im(4, "+!found(green)", 12, 13, [("drop(green)", 13)])
+        self.beliefs.append(BeliefChange(13, True, "colour(green)"))
+        self.index.update()
+        self.assertEqual(self.search("instr:drop(_)"), ([1, 2, 3, 4], [], [2, 9, 12, 13]))
+        self.assertEqual(self.search("green"), ([4], [], [13]))
+
+    def test_split_query(self):
+        self.assertEqual(split_query('  found(a, b)  instr:"x y" [1, 2] '), ["found(a, b)", 'instr:"x y"', "[1, 2]"])
+
+    def test_malformed_queries(self):
+        for query in ("", "   ", "cycle:x", "cycle:5-", "trigger:X", "found(a) a,b", "X+1", "found("):
+            with self.assertRaises(ValueError, msg=query):
+                self.index.search(query)
+
+
+if __name__ == "__main__":
+    unittest.main()
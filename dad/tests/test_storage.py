@@ -0,0 +1,125 @@
+import os
+import random
+import tempfile
+import unittest
+
+from benchmarks.synthetic import write_trace
+from config import StaticConfig
+from model.agent import AgentRepository, StoredAgentData
+
+
+def im_values(im) -> tuple:
+    reason = im.failure_reason
+    return (im.id, im.intention.id, im.start, im.end, im.res,
+            (reason.msg, reason.type, reason.src, reason.line) if reason else None, im.file, im.line, im.plan.label,
+            im.trigger, im.context, im.parent.id if im.parent else None, im.event.id if im.event else None,
+            [child.id for child in im.children],
+            [(i.file, i.line, i.text, i.cycle, i.type, i.end, i.result, i.unifier) for i in im.instructions])
+
+
+def event_values(event) -> tuple:
+    return (event.id, event.parent.id if event.parent else None, event.name, event.type, event.cycle_added,
+            event.cycle_selected)
+
+
+def intention_values(intention) -> tuple:
+    return (intention.id, intention.start, intention.end, [im.id for im in intention.means],
+            [event.id for event in intention.events])
+
+
+def ids(items) -> list[int]:
+    return sorted(item.id for item in items)
+
+
+class StorageParityTest(unittest.TestCase):
+    # the agent data in a SqliteStore gives the same answers as the data parsed into objects
+    # run from dad: python -m unittest discover tests
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.name = write_trace(self.folder.name, 1, 2000, 3)[0]
+        self.log_path = os.path.join(self.folder.name, self.name + ".log")
+        self.repos: list[AgentRepository] = []
+
+    def tearDown(self):
+        for repo in self.repos:
+            data = repo.get_loaded_agent_data(self.name)
+            if isinstance(data, StoredAgentData):
+                data.store.close()
+        self.folder.cleanup()
+
+    def create_repo(self, storage: str) -> AgentRepository:
+        repo = AgentRepository(StaticConfig({"current_folder": self.folder.name, "parse_cache": False,
+                                             "storage": storage}))
+        self.repos.append(repo)
+        return repo
+
+    def assert_same(self, memory: AgentRepository, stored: AgentRepository):
+        name = self.name
+        data, stored_data = memory.get_agent_data(name), stored.get_agent_data(name)
+        self.assertIsInstance(stored_data, StoredAgentData)
+        self.assertEqual(data.get_counts(), stored_data.get_counts())
+        self.assertEqual(list(map(im_values, data.intended_means.values())),
+                         list(map(im_values, stored_data.intended_means.values())))
+        self.assertEqual(list(map(event_values, data.events.values())),
+                         list(map(event_values, stored_data.events.values())))
+        self.assertEqual(list(map(intention_values, data.intentions.values())),
+                         list(map(intention_values, stored_data.intentions.values())))
+        self.assertEqual({label: plan.used for label, plan in data.plans.items()},
+                         {label: plan.used for label, plan in stored_data.plans.items()})
+        self.assertEqual(list(data.beliefs), list(stored_data.beliefs))
+        self.assertEqual(ids(data.get_failed_intentions()), ids(stored_data.get_failed_intentions()))
+        last = data.changes.last_cycle()
+        self.assertEqual(last, stored_data.changes.last_cycle())
+        rng = random.Random(1)
+        for cycle in rng.sample(range(last + 2), 100):
+            state, stored_state = memory.get_agent_state(name, cycle), stored.get_agent_state(name, cycle)
+            self.assertEqual(sorted(state["beliefs"]), sorted(stored_state["beliefs"]), cycle)
+            self.assertEqual(sorted(state["imeans"]), sorted(stored_state["imeans"]), cycle)
+            self.assertEqual(ids(state["intentions"]), ids(stored_state["intentions"]), cycle)
+        for _ in range(100):
+            cycle1, cycle2 = rng.randrange(-1, last + 2), rng.randrange(-1, last + 2)
+            diff, stored_diff = memory.get_diff(name, cycle1, cycle2), stored.get_diff(name, cycle1, cycle2)
+            self.assertEqual(sorted(diff.beliefs_added), sorted(stored_diff.beliefs_added))
+            self.assertEqual(sorted(diff.beliefs_deleted), sorted(stored_diff.beliefs_deleted))
+            self.assertEqual(ids(diff.goals_added), ids(stored_diff.goals_added))
+            self.assertEqual(ids(diff.goals_achieved), ids(stored_diff.goals_achieved))
+        timeline, stored_timeline = memory.get_belief_timeline(name), stored.get_belief_timeline(name)
+        for belief in {change.belief for change in data.beliefs}:
+            self.assertEqual(timeline.get_intervals(belief), stored_timeline.get_intervals(belief))
+
+    def test_stored_data_matches_parsed(self):
+        self.assert_same(self.create_repo(""), self.create_repo("sqlite"))
+
+    def test_appended_lines_are_ingested(self):
+        with open(self.log_path, "rb") as log_file:
+            lines = log_file.readlines()
+        half = len(lines) // 2
+        with open(self.log_path, "wb") as log_file:
+            log_file.writelines(lines[:half])
+            log_file.write(lines[half][:10])  # a line that is still being written
+        stored = self.create_repo("sqlite")
+        stored_data = stored.get_agent_data(self.name)
+        ims = list(stored_data.intended_means.values())
+        events = list(stored_data.events.values())
+        intentions = list(stored_data.intentions.values())
+        with open(self.log_path, "wb") as log_file:
+            log_file.writelines(lines)
+        self.assertTrue(stored.update_agent_data(self.name))
+        memory = self.create_repo("")
+        self.assert_same(memory, stored)
+        data = memory.get_agent_data(self.name)
+        # objects loaded before the append see the ends and selections read after it
+        self.assertEqual(list(map(im_values, ims)), [im_values(data.intended_means[im.id]) for im in ims])
+        self.assertEqual(list(map(event_values, events)), [event_values(data.events[event.id]) for event in events])
+        self.assertEqual(list(map(intention_values, intentions)),
+                         [intention_values(data.intentions[intention.id]) for intention in intentions])
+
+    def test_reopened_store_is_not_ingested_again(self):
+        self.create_repo("sqlite").get_agent_data(self.name)
+        stored = self.create_repo("sqlite")
+        self.assertEqual(stored.get_agent_data(self.name).ingest(), 0)
+        self.assert_same(self.create_repo(""), stored)
+
+
+if __name__ == "__main__":
+    unittest.main()